@@ -0,0 +1,299 @@
+"""
+HTTP JSON API (ASGI) untuk Prediksi Harga Rumah
+
+Berjalan di samping aplikasi Streamlit. Model dan preprocessing info dimuat
+sekali saat startup (atau, jika registry model ada, dilayani lewat
+ModelRouter yang melakukan hot-swap dan routing A/B), lalu request single
+yang datang bersamaan dikumpulkan menjadi micro-batch sehingga satu
+panggilan `model.predict` mencakup banyak baris.
+
+Jalankan dengan:
+    uvicorn api:app --host 0.0.0.0 --port 8000
+
+Endpoint:
+    GET  /health   -> status service dan statistik micro-batch
+    GET  /metrics  -> metrik per tahap dalam format teks Prometheus
+    GET  /drift    -> ringkasan dan tabel drift input per kolom
+    GET  /models   -> versi yang dilayani dan perbandingan latensi/error per versi
+    POST /predict  -> body berupa satu objek rumah atau list objek rumah
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+
+from inference import Predictor
+from metrics import REGISTRY
+from model_registry import ModelRouter, registry_exists
+import warnings
+# Model scikit-learn menerima array NumPy dari FeatureEncoder, bukan DataFrame
+warnings.filterwarnings('ignore', message='X does not have valid feature names',
+                        category=UserWarning)
+
+
+MAX_BATCH_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 64))
+MAX_WAIT_MS = float(os.environ.get('BATCH_MAX_WAIT_MS', 5))
+
+
+class MicroBatcher:
+    """
+    Pengumpul request single menjadi micro-batch.
+
+    Batch dikirim ke model ketika sudah berisi `max_batch_size` baris atau
+    ketika baris pertama sudah menunggu `max_wait_ms` milidetik. Prediksi
+    dijalankan di thread executor agar event loop tetap melayani request.
+    """
+
+    def __init__(self, predictor, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.rows = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def predict(self, record):
+        """Masukkan satu rumah ke antrian dan tunggu hasil prediksinya"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((record, future))
+        return await future
+
+    async def _collect(self):
+        """Ambil satu batch dari antrian sesuai batas ukuran dan waktu tunggu"""
+        items = [await self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(items) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    def _predict_batch(self, records):
+        """
+        Prediksi satu batch; jika batch gagal, setiap record diprediksi
+        sendiri sehingga hanya request yang bermasalah yang menerima error
+
+        Returns:
+            list berisi float prediksi atau exception per record
+        """
+        try:
+            return [float(prediction) for prediction in self.predictor.predict(records)]
+        except Exception as e:
+            if len(records) == 1:
+                return [e]
+        results = []
+        for record in records:
+            try:
+                results.append(float(self.predictor.predict([record])[0]))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._collect()
+            records = [record for record, _ in items]
+            try:
+                results = await loop.run_in_executor(None, self._predict_batch, records)
+            except Exception as e:
+                results = [e] * len(items)
+            self.batches += 1
+            self.rows += len(items)
+            for (_, future), result in zip(items, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+def json_safe(value):
+    """Ganti float NaN/inf (misalnya prediksi atau PSI yang tidak terdefinisi) dengan None"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(item) for item in value]
+    return value
+
+
+class PredictionAPI:
+    """Aplikasi ASGI minimal tanpa framework tambahan"""
+
+    def __init__(self, model_path='model.pkl', preprocessing_path='preprocessing_info.pkl'):
+        self.model_path = model_path
+        self.preprocessing_path = preprocessing_path
+        self.batcher = None
+        self.router = None
+        self.started_at = None
+
+    def load(self):
+        """
+        Load model dan preprocessing info (sekali per proses)
+
+        Jika registry model ada, ModelRouter dipakai sebagai predictor:
+        versi baru di registry dimuat dan ditukar di latar belakang tanpa
+        restart, dan sebagian traffic bisa diarahkan ke versi kandidat.
+        """
+        if registry_exists():
+            predictor = self.router = ModelRouter()
+        else:
+            predictor = Predictor.load(model_path=self.model_path,
+                                       preprocessing_path=self.preprocessing_path)
+        self.batcher = MicroBatcher(predictor)
+        self.batcher.start()
+        self.started_at = time.time()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    self.load()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.batcher is not None:
+                    await self.batcher.stop()
+                if self.router is not None:
+                    self.router.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body', False):
+                return body
+
+    async def _respond(self, send, status, payload):
+        body = json.dumps(json_safe(payload), allow_nan=False).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _http(self, scope, receive, send):
+        method, path = scope['method'], scope['path']
+
+        if path == '/health' and method == 'GET':
+            if self.batcher is None:
+                await self._respond(send, 503, {'status': 'loading'})
+                return
+            await self._respond(send, 200, {
+                'status': 'ok',
+                'uptime_seconds': round(time.time() - self.started_at, 1),
+                'batches': self.batcher.batches,
+                'rows': self.batcher.rows,
+                'model_version': self.router.state.production if self.router is not None else None,
+            })
+            return
+
+        if path == '/predict' and method == 'POST':
+            if self.batcher is None:
+                await self._respond(send, 503, {'error': 'Model belum dimuat'})
+                return
+            try:
+                payload = json.loads(await self._read_body(receive))
+            except ValueError:
+                await self._respond(send, 400, {'error': 'Body harus berupa JSON'})
+                return
+            if isinstance(payload, dict):
+                records = [payload]
+            elif isinstance(payload, list) and all(isinstance(r, dict) for r in payload):
+                records = payload
+            else:
+                await self._respond(send, 400, {'error': 'Body harus objek atau list objek rumah'})
+                return
+            # return_exceptions agar error setiap record diambil, bukan hanya yang pertama
+            predictions = await asyncio.gather(
+                *(self.batcher.predict(record) for record in records), return_exceptions=True
+            )
+            errors = [result for result in predictions if isinstance(result, Exception)]
+            if errors:
+                await self._respond(send, 422, {'error': f'Error saat prediksi: {str(errors[0])}'})
+                return
+            if isinstance(payload, dict):
+                await self._respond(send, 200, {'prediction': predictions[0]})
+            else:
+                await self._respond(send, 200, {'predictions': predictions})
+            return
+
+        if path == '/metrics' and method == 'GET':
+            body = REGISTRY.to_prometheus().encode('utf-8')
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [(b'content-type', b'text/plain; version=0.0.4'),
+                            (b'content-length', str(len(body)).encode())],
+            })
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        if path == '/models' and method == 'GET':
+            if self.router is None:
+                await self._respond(send, 404, {'error': 'Registry model tidak dipakai'})
+                return
+            state = self.router.state
+            await self._respond(send, 200, {
+                'production': state.production,
+                'candidate': state.candidate,
+                'candidate_share': state.candidate_share,
+                'swaps': self.router.swaps,
+                'last_error': self.router.last_error,
+                'versions': self.router.compare(),
+            })
+            return
+
+        if path == '/drift' and method == 'GET':
+            predictor = self.batcher.predictor if self.batcher is not None else None
+            if self.router is not None:
+                predictor = self.router.production
+            if predictor is None or predictor.monitor is None:
+                await self._respond(send, 404, {'error': 'Monitor drift tidak aktif'})
+                return
+            report = predictor.drift_report()
+            await self._respond(send, 200, {
+                'summary': predictor.monitor.summary(predictor.drift_reference),
+                'columns': json.loads(report.to_json(orient='records')),
+            })
+            return
+
+        await self._respond(send, 404, {'error': 'Not found'})
+
+
+app = PredictionAPI()
@@ -1,11 +1,14 @@
 """
 Aplikasi Streamlit untuk Prediksi Harga Rumah
+
+Modul berat (pandas, numpy, scikit-learn) baru diimpor ketika halaman
+yang membutuhkan model dibuka, sehingga startup dan rerun halaman
+informasi tetap ringan.
 """
 
 import streamlit as st
-import pandas as pd
-import numpy as np
-import joblib
+from prediction_cache import PredictionCache, make_key, model_fingerprint
+from metrics import REGISTRY, stage
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -16,14 +19,18 @@ st.set_page_config(
     layout="wide"
 )
 
+# Jumlah baris hasil batch yang ditampilkan di tabel (hasil lengkap lewat download)
+BATCH_PREVIEW_ROWS = 1000
+
 # Load model dan preprocessing info
-@st.cache_resource
-def load_model():
+# (dimuat ulang otomatis ketika fingerprint file model berubah)
+@st.cache_resource(max_entries=1)
+def load_model(fingerprint):
     """Load model dan preprocessing info"""
+    from inference import Predictor
     try:
-        model = joblib.load('model.pkl')
-        preprocessing_info = joblib.load('preprocessing_info.pkl')
-        return model, preprocessing_info
+        # Engine inferensi dipilih lewat env INFERENCE_ENGINE ('sklearn', 'flat' atau 'mmap')
+        return Predictor.load()
     except FileNotFoundError as e:
         st.error(f"❌ Model tidak ditemukan! Silakan jalankan train_model.py terlebih dahulu.\n\nError: {str(e)}")
         st.info("📝 Langkah-langkah:\n1. Jalankan: `python train_model.py`\n2. Pastikan file `train.csv` ada di direktori yang sama")
@@ -32,11 +39,91 @@ def load_model():
         st.error(f"❌ Error saat memuat model: {str(e)}")
         st.stop()
 
-# Load model
-try:
-    model, prep_info = load_model()
-except:
-    st.stop()
+@st.cache_resource(max_entries=2)
+def load_explainer(model_key, _predictor=None):
+    """Penjelas kontribusi fitur untuk model yang sedang dipakai (per versi registry)"""
+    from explain import Explainer
+    return Explainer(_predictor if _predictor is not None else load_model(model_key))
+
+@st.cache_resource
+def get_router(enabled):
+    """
+    Router registry model yang dipakai bersama oleh semua sesi
+
+    Versi baru di registry dimuat dan ditukar oleh thread latar belakang,
+    sehingga model bisa diganti tanpa restart aplikasi.
+    """
+    if not enabled:
+        return None
+    from model_registry import ModelRouter
+    try:
+        return ModelRouter()
+    except Exception as e:
+        st.warning(f"⚠️ Registry model tidak bisa dimuat, memakai model.pkl: {str(e)}")
+        return None
+
+@st.cache_resource(max_entries=1)
+def load_schema(fingerprint):
+    """Skema input (kolom, dtype, level dan rentang) untuk validasi file batch"""
+    from schema import BatchSchema
+    return BatchSchema.load()
+
+@st.cache_resource
+def get_job_runner():
+    """Pool worker job batch yang dipakai bersama oleh semua sesi"""
+    from batch_jobs import JobRunner
+    return JobRunner()
+
+@st.cache_resource
+def get_prediction_cache():
+    """Cache hasil prediksi yang dipakai bersama oleh semua sesi"""
+    return PredictionCache()
+
+def get_active_router():
+    """
+    Router registry model, atau None jika registry belum ada
+
+    Hanya dipanggil oleh halaman yang butuh model, sehingga halaman lain
+    tidak memuat model sama sekali.
+    """
+    from model_registry import registry_exists
+    return get_router(registry_exists())
+
+def get_predictor():
+    """Load model saat pertama kali dibutuhkan oleh halaman (versi production jika registry dipakai)"""
+    router = get_active_router()
+    if router is not None:
+        state = router.state
+        candidate = (f", kandidat {state.candidate} ({state.candidate_share:.0%} traffic)"
+                     if state.candidate else "")
+        st.sidebar.caption(f"Registry model: production {state.production}{candidate}")
+        return router.production
+    # load_model sendiri menampilkan error dan memanggil st.stop()
+    predictor = load_model(fingerprint)
+    load_stats = getattr(predictor.model, 'load_stats', None)
+    if load_stats:
+        st.sidebar.caption(f"Artifact memory-map: dimuat dalam {load_stats['load_seconds'] * 1000:.1f} ms, "
+                           f"ukuran file {load_stats['artifact_bytes'] / 1e6:.1f} MB, "
+                           f"RSS proses {load_stats['rss_bytes'] / 1e6:.0f} MB")
+    return predictor
+
+def route_predictor(input_data):
+    """
+    Pilih model untuk satu input rumah
+
+    Dengan registry, input yang sama selalu di-route ke versi yang sama.
+
+    Returns:
+        (versi atau None, predictor, kunci model untuk cache)
+    """
+    router = get_active_router()
+    if router is not None:
+        version, predictor = router.route(make_key('route', sorted(input_data.items())))
+        return version, predictor, version
+    return None, get_predictor(), fingerprint
+
+fingerprint = model_fingerprint()
+prediction_cache = get_prediction_cache()
 
 # Judul aplikasi
 st.title("🏠 Prediksi Harga Rumah")
@@ -45,7 +132,7 @@ st.markdown("### Aplikasi Machine Learning untuk Memperkirakan Harga Jual Rumah"
 st.sidebar.title("📋 Menu")
 menu = st.sidebar.radio(
     "Pilih halaman:",
-    ["🔮 Prediksi Single", "📊 Prediksi Batch", "ℹ️ Informasi Model"]
+    ["🔮 Prediksi Single", "📊 Prediksi Batch", "ℹ️ Informasi Model", "🩺 Diagnostik"]
 )
 
 if menu == "🔮 Prediksi Single":
@@ -97,183 +184,228 @@ if menu == "🔮 Prediksi Single":
             "Blueste"
         ])
     
+    # Dictionary input (dipakai prediksi dan analisis what-if)
+    input_data = {
+        'MSSubClass': ms_sub_class,
+        'LotFrontage': lot_frontage,
+        'LotArea': lot_area,
+        'OverallQual': overall_qual,
+        'OverallCond': overall_cond,
+        'YearBuilt': year_built,
+        'YearRemodAdd': year_remod_add,
+        'TotalBsmtSF': total_bsmt_sf,
+        '1stFlrSF': first_flr_sf,
+        '2ndFlrSF': second_flr_sf,
+        'GrLivArea': gr_liv_area,
+        'FullBath': full_bath,
+        'HalfBath': half_bath,
+        'BedroomAbvGr': bedrooms,
+        'KitchenAbvGr': 1,
+        'TotRmsAbvGrd': tot_rms_abv_grd,
+        'Fireplaces': fireplaces,
+        'GarageCars': garage_cars,
+        'GarageArea': garage_area,
+        'MSZoning': ms_zoning,
+        'Street': street,
+        'LotShape': lot_shape,
+        'Neighborhood': neighborhood,
+        'KitchenQual': kitchen_qual,
+    }
+    
     # Tombol prediksi
     if st.button("🔮 Prediksi Harga", type="primary"):
         try:
-            # Buat dictionary input
-            input_data = {
-                'MSSubClass': ms_sub_class,
-                'LotFrontage': lot_frontage,
-                'LotArea': lot_area,
-                'OverallQual': overall_qual,
-                'OverallCond': overall_cond,
-                'YearBuilt': year_built,
-                'YearRemodAdd': year_remod_add,
-                'TotalBsmtSF': total_bsmt_sf,
-                '1stFlrSF': first_flr_sf,
-                '2ndFlrSF': second_flr_sf,
-                'GrLivArea': gr_liv_area,
-                'FullBath': full_bath,
-                'HalfBath': half_bath,
-                'BedroomAbvGr': bedrooms,
-                'KitchenAbvGr': 1,
-                'TotRmsAbvGrd': tot_rms_abv_grd,
-                'Fireplaces': fireplaces,
-                'GarageCars': garage_cars,
-                'GarageArea': garage_area,
-                'MSZoning': ms_zoning,
-                'Street': street,
-                'LotShape': lot_shape,
-                'Neighborhood': neighborhood,
-                'KitchenQual': kitchen_qual,
-            }
-            
-            # Buat DataFrame dengan SEMUA kolom dari training data
-            # Buat dictionary lengkap dengan semua kolom yang diperlukan
-            all_columns = prep_info['numeric_cols'] + prep_info['categorical_cols']
-            complete_data = {}
-            
-            # Isi dengan data input yang diberikan
-            for key, value in input_data.items():
-                if key in all_columns:
-                    complete_data[key] = value
-            
-            # Tambahkan nilai default untuk kolom numerik yang belum diisi
-            for col in prep_info['numeric_cols']:
-                if col not in complete_data:
-                    if col in prep_info['numeric_medians']:
-                        complete_data[col] = prep_info['numeric_medians'][col]
-                    else:
-                        complete_data[col] = 0
-            
-            # Tambahkan nilai default untuk kolom kategorikal yang NA berarti 'None'
-            for col in prep_info['categorical_na_cols']:
-                if col not in complete_data:
-                    complete_data[col] = 'None'
-            
-            # Fill missing categorical dengan mode
-            for col in prep_info['categorical_cols']:
-                if col not in complete_data:
-                    if col in prep_info['categorical_modes']:
-                        complete_data[col] = prep_info['categorical_modes'][col]
-                    elif col in prep_info['categorical_na_cols']:
-                        complete_data[col] = 'None'
-                    else:
-                        # Default value untuk kategori lain - gunakan mode jika ada
-                        complete_data[col] = prep_info['categorical_modes'].get(col, 'Unknown')
-            
-            # Buat DataFrame dengan urutan kolom sesuai training
-            input_df = pd.DataFrame([complete_data])
-            input_df = input_df[all_columns]
+            version, predictor, model_key = route_predictor(input_data)
             
-            # One-hot encoding
-            X_encoded = pd.get_dummies(input_df, columns=prep_info['categorical_cols'], drop_first=False)
+            # Cek cache berdasarkan versi model dan baris input yang sudah diimputasi lengkap
+            with stage('cache_key', rows=1):
+                cache_key = make_key(model_key, predictor.encoder.impute_record(input_data))
+            prediction = prediction_cache.get(cache_key)
             
-            # Align columns dengan training data - pastikan semua kolom ada
-            for col in prep_info['feature_columns']:
-                if col not in X_encoded.columns:
-                    X_encoded[col] = 0
-            
-            # Pastikan urutan kolom sesuai dengan training
-            X_encoded = X_encoded[prep_info['feature_columns']]
-            
-            # Prediksi
-            prediction = model.predict(X_encoded)[0]
+            if prediction is None:
+                # Prediksi + interval dari output semua pohon dalam satu pass;
+                # kolom yang tidak diisi memakai nilai default
+                # (median/mode/'None') dari preprocessing training
+                if version is not None:
+                    with get_active_router().track(version):
+                        result = predictor.predict_interval(input_data)
+                else:
+                    result = predictor.predict_interval(input_data)
+                prediction = {name: float(values[0]) for name, values in result.items()}
+                # Kontribusi kolom asli (atribusi jalur di semua pohon)
+                with stage('explain', rows=1):
+                    prediction['bias'], prediction['top'] = \
+                        load_explainer(model_key, predictor).top_contributions(input_data, k=8)
+                prediction_cache.put(cache_key, prediction)
             
             # Tampilkan hasil
             st.success("✅ Prediksi Berhasil!")
             st.markdown("---")
             st.metric(
                 label="**Prediksi Harga Rumah**",
-                value=f"${prediction:,.2f}",
+                value=f"${prediction['prediction']:,.2f}",
                 delta=None
             )
-            st.info(f"💡 Harga prediksi: **${prediction:,.0f}**")
+            st.info(f"💡 Harga prediksi: **${prediction['prediction']:,.0f}**  \n"
+                    f"📏 Interval 90% antar pohon: **${prediction['lower']:,.0f} – "
+                    f"${prediction['upper']:,.0f}** (standar deviasi ${prediction['std']:,.0f})")
+            
+            st.markdown("#### 🔍 Faktor yang Paling Berpengaruh")
+            st.caption(f"Harga dasar (rata-rata model): ${prediction['bias']:,.0f}. "
+                       "Kontribusi positif menaikkan harga, negatif menurunkan.")
+            st.dataframe(
+                [{'Kolom': col, 'Kontribusi ($)': round(value)} for col, value in prediction['top']],
+                hide_index=True
+            )
+            cache_stats = prediction_cache.stats()
+            st.caption(f"Cache prediksi: {cache_stats['hits']} hit, {cache_stats['misses']} miss "
+                       f"({cache_stats['hit_rate']:.0%} hit rate)")
+            if version is not None:
+                st.caption(f"Dilayani oleh model versi {version}")
             
         except Exception as e:
             st.error(f"❌ Error saat prediksi: {str(e)}")
             st.info("Pastikan semua input sudah diisi dengan benar.")
+    
+    # Analisis what-if: semua variasi kolom terpilih diprediksi dalam satu pass
+    st.markdown("---")
+    st.subheader("🔁 Analisis What-If")
+    st.markdown("Lihat perubahan harga jika satu atau dua kolom rumah di atas diubah, "
+                "sementara kolom lain tetap.")
+    what_if_features = st.multiselect("Kolom yang divariasikan (maksimal 2)", list(input_data),
+                                      default=['OverallQual'], max_selections=2)
+    what_if_points = st.slider("Jumlah titik untuk kolom numerik", 10, 200, 100, step=10)
+    if what_if_features and st.button("📈 Hitung Kurva What-If"):
+        try:
+            import pandas as pd
+            from what_if import sensitivity_grid
+            version, predictor, model_key = route_predictor(input_data)
+            # Grid di-cache per rumah dasar, kolom dan jumlah titik
+            cache_key = make_key(model_key, ('what_if', tuple(what_if_features), what_if_points,
+                                             predictor.encoder.impute_record(input_data)))
+            grid = prediction_cache.get(cache_key)
+            if grid is None:
+                grid = sensitivity_grid(predictor, input_data, what_if_features, what_if_points)
+                prediction_cache.put(cache_key, grid)
+            
+            feature = what_if_features[0]
+            numeric = pd.api.types.is_numeric_dtype(grid[feature])
+            base = grid[grid['is_base']].iloc[0]
+            best = grid.loc[grid['prediction'].idxmax()]
+            def describe(row):
+                return ', '.join(f"{f}={row[f]:g}" if isinstance(row[f], float) else f"{f}={row[f]}"
+                                 for f in what_if_features)
+            col1, col2 = st.columns(2)
+            col1.metric(f"Harga saat ini ({describe(base)})", f"${base['prediction']:,.0f}")
+            col2.metric(f"Harga tertinggi ({describe(best)})",
+                        f"${best['prediction']:,.0f}",
+                        delta=f"{best['prediction'] - base['prediction']:,.0f}")
+            if len(what_if_features) == 1:
+                if not numeric:
+                    st.bar_chart(grid.set_index(feature)['prediction'].sort_values())
+                else:
+                    st.line_chart(grid.set_index(feature)[['lower', 'prediction', 'upper']])
+                    st.caption("Garis lower/upper: interval 90% antar pohon.")
+            else:
+                # Satu garis per nilai kolom kedua
+                pivot = grid.pivot(index=feature, columns=what_if_features[1], values='prediction')
+                pivot.columns = [f"{what_if_features[1]}={value}" for value in pivot.columns]
+                if not numeric:
+                    st.bar_chart(pivot)
+                else:
+                    st.line_chart(pivot)
+            with st.expander("Tabel grid"):
+                st.dataframe(grid.drop(columns=['is_base']), hide_index=True)
+            st.caption(f"{len(grid)} variasi dihitung dalam satu pass forest")
+        except Exception as e:
+            st.error(f"❌ Error saat analisis what-if: {str(e)}")
 
 elif menu == "📊 Prediksi Batch":
     st.header("Prediksi Harga Rumah (Batch Upload)")
     st.markdown("Upload file CSV untuk prediksi batch.")
     
+    from batch_jobs import BACKGROUND_MIN_BYTES
     uploaded_file = st.file_uploader("Upload file CSV", type=['csv'])
+    # File besar default ke job latar belakang: tidak ada DataFrame hasil dan CSV
+    # di memori sesi, dan halaman tidak terblokir selama prediksi
+    background = st.checkbox(
+        "⚙️ Jalankan sebagai job latar belakang (untuk file besar)",
+        value=uploaded_file is not None and uploaded_file.size >= BACKGROUND_MIN_BYTES,
+        help="File disimpan ke antrean di disk lalu diproses per chunk oleh worker "
+             "terpisah. Job tetap berjalan walaupun halaman di-refresh atau browser ditutup. "
+             f"Aktif otomatis untuk file {BACKGROUND_MIN_BYTES / 1e6:g} MB atau lebih."
+    )
     
-    if uploaded_file is not None:
+    if uploaded_file is not None and background:
         try:
-            df = pd.read_csv(uploaded_file)
+            st.success(f"✅ File berhasil diupload: {uploaded_file.size / 1e6:.1f} MB")
+            
+            if st.button("🔮 Lakukan Prediksi Batch", type="primary"):
+                job_id = get_job_runner().submit(uploaded_file, uploaded_file.name)
+                st.success(f"✅ Job `{job_id}` dimasukkan ke antrean. Progres ada di tabel job di bawah.")
+                    
+        except Exception as e:
+            st.error(f"❌ Error: {str(e)}")
+    
+    elif uploaded_file is not None:
+        try:
+            from schema import summarize_report
+            predictor = get_predictor()
+            schema = load_schema(fingerprint)
+            with stage('read_csv') as timer:
+                # Hint dtype dari skema: kolom kategorikal langsung dibaca sebagai category
+                df = schema.read_csv(uploaded_file)
+                timer.rows = len(df)
             st.success(f"✅ File berhasil diupload: {df.shape[0]} baris, {df.shape[1]} kolom")
             
+            # Validasi dan koreksi per kolom; baris dengan error tidak diprediksi
+            with stage('validate', rows=len(df)):
+                clean_df, report, valid = schema.validate(df)
+            n_invalid = int((~valid).sum())
+            if not report.empty:
+                n_warnings = int((report['severity'] == 'warning').sum())
+                message = (f"⚠️ Validasi: {n_invalid} baris dengan error tidak akan diprediksi, "
+                           f"{n_warnings} warning (tetap diprediksi).")
+                if n_invalid:
+                    st.error(message)
+                else:
+                    st.warning(message)
+                with st.expander("Laporan validasi"):
+                    st.dataframe(summarize_report(report), hide_index=True)
+                    st.dataframe(report.head(1000), hide_index=True)
+                    st.download_button(
+                        label="📥 Download Laporan Validasi (CSV)",
+                        data=report.to_csv(index=False),
+                        file_name="validation_report.csv",
+                        mime="text/csv"
+                    )
+            
+            with_intervals = st.checkbox("📏 Tambahkan interval prediksi (kuantil 5%–95% antar pohon)")
+            
             if st.button("🔮 Lakukan Prediksi Batch", type="primary"):
+                import io
+                import pandas as pd
+                from batch_predict import predict_csv_stream
                 with st.spinner("Memproses data..."):
-                    # Preprocessing mirip dengan fungsi di train_model.py
-                    X = df.copy()
-                    
-                    # Hapus kolom yang tidak diperlukan jika ada
-                    if 'Id' in X.columns:
-                        X = X.drop('Id', axis=1)
-                    
-                    # Pastikan semua kolom dari training data ada
-                    all_required_cols = prep_info['numeric_cols'] + prep_info['categorical_cols']
-                    for col in all_required_cols:
-                        if col not in X.columns:
-                            if col in prep_info['numeric_cols']:
-                                # Isi dengan median jika numeric
-                                if col in prep_info['numeric_medians']:
-                                    X[col] = prep_info['numeric_medians'][col]
-                                else:
-                                    X[col] = 0
-                            else:
-                                # Isi dengan mode jika categorical
-                                if col in prep_info['categorical_modes']:
-                                    X[col] = prep_info['categorical_modes'][col]
-                                elif col in prep_info['categorical_na_cols']:
-                                    X[col] = 'None'
-                                else:
-                                    X[col] = prep_info['categorical_modes'].get(col, 'Unknown')
-                    
-                    # Pastikan urutan kolom sesuai training
-                    X = X[all_required_cols]
-                    
-                    # Apply preprocessing
-                    for col in prep_info['categorical_na_cols']:
-                        if col in X.columns:
-                            X[col] = X[col].fillna('None')
-                    
-                    for col, median_val in prep_info['numeric_medians'].items():
-                        if col in X.columns:
-                            X[col] = X[col].fillna(median_val)
+                    # Hasil ditulis per chunk langsung ke buffer CSV (tanpa salinan
+                    # DataFrame penuh); baris dengan error validasi tetap ada di
+                    # hasil dengan prediksi kosong
+                    uploaded_file.seek(0)
+                    buffer = io.StringIO()
+                    progress = {'total_rows': 0, 'invalid_rows': 0}
+                    for progress in predict_csv_stream(uploaded_file, buffer, predictor,
+                                                       intervals=with_intervals, schema=schema):
+                        pass
+                    csv = buffer.getvalue()
                     
-                    for col, mode_val in prep_info['categorical_modes'].items():
-                        if col in X.columns:
-                            X[col] = X[col].fillna(mode_val)
-                    
-                    # One-hot encoding
-                    X_encoded = pd.get_dummies(X, columns=prep_info['categorical_cols'], drop_first=False)
-                    
-                    # Align columns dengan training data
-                    for col in prep_info['feature_columns']:
-                        if col not in X_encoded.columns:
-                            X_encoded[col] = 0
-                    
-                    # Pastikan urutan kolom sesuai training
-                    X_encoded = X_encoded[prep_info['feature_columns']]
-                    
-                    # Prediksi
-                    predictions = model.predict(X_encoded)
-                    
-                    # Buat hasil
-                    results_df = df.copy()
-                    if 'Id' not in results_df.columns:
-                        results_df['Id'] = range(1, len(results_df) + 1)
-                    results_df['PredictedSalePrice'] = predictions
-                    
-                    st.success(f"✅ Prediksi selesai untuk {len(predictions)} rumah!")
-                    st.dataframe(results_df)
+                    st.success(f"✅ Prediksi selesai untuk "
+                               f"{progress['total_rows'] - progress['invalid_rows']} rumah!")
+                    st.dataframe(pd.read_csv(io.StringIO(csv), nrows=BATCH_PREVIEW_ROWS))
+                    if progress['total_rows'] > BATCH_PREVIEW_ROWS:
+                        st.caption(f"Menampilkan {BATCH_PREVIEW_ROWS} dari {progress['total_rows']} "
+                                   f"baris; hasil lengkap ada di file download.")
                     
                     # Download button
-                    csv = results_df.to_csv(index=False)
                     st.download_button(
                         label="📥 Download Hasil Prediksi (CSV)",
                         data=csv,
@@ -283,6 +415,61 @@ elif menu == "📊 Prediksi Batch":
                     
         except Exception as e:
             st.error(f"❌ Error: {str(e)}")
+    
+    # Daftar job latar belakang (status dibaca dari disk setiap rerun)
+    import os
+    from batch_jobs import errors_path, list_jobs, output_path
+    jobs = list_jobs()
+    if jobs:
+        st.markdown("---")
+        st.subheader("⚙️ Job Batch")
+        runner = get_job_runner()
+        st.caption(f"{runner.active_jobs()} job aktif, maksimal {runner.max_workers} berjalan bersamaan")
+        st.button("🔄 Refresh status")
+        for job in jobs[:10]:
+            label = f"`{job['job_id']}` — {job['filename']} — **{job['state']}**"
+            if job['state'] == 'running':
+                fraction = job['rows'] / job['total_rows'] if job['total_rows'] else 0.0
+                st.progress(min(fraction, 1.0), text=f"{label}: {job['rows']}/{job['total_rows']} baris "
+                                                     f"({job['rows_per_sec']:,.0f} baris/detik)")
+            elif job['state'] == 'done':
+                drift = job.get('drift')
+                drift_text = (f", PSI maks {drift['max_psi']:.2f}, {drift['imputed_rate']:.1%} nilai diimputasi"
+                              if drift else "")
+                invalid_text = (f", {job['invalid_rows']} baris error tidak diprediksi"
+                                if job.get('invalid_rows') else "")
+                st.markdown(f"{label}: {job['rows']} baris "
+                            f"({job['rows_per_sec']:,.0f} baris/detik){invalid_text}{drift_text}")
+            elif job['state'] == 'failed':
+                st.error(f"{label}: {job['error']}")
+            else:
+                st.markdown(f"{label}: menunggu di antrean ({job['total_rows']} baris)")
+        
+        # Hanya hasil job yang dipilih yang dibaca dari disk, bukan semua job setiap rerun
+        finished = [job['job_id'] for job in jobs[:10] if job['state'] == 'done']
+        if finished:
+            selected = st.selectbox("📥 Download hasil job", finished, index=None,
+                                    placeholder="Pilih job...")
+            if selected is not None:
+                col_output, col_report = st.columns(2)
+                with open(output_path(selected), 'rb') as f:
+                    col_output.download_button(
+                        label="📥 Download Hasil Prediksi (CSV)",
+                        data=f,
+                        file_name=f"predictions_{selected}.csv",
+                        mime="text/csv",
+                        key=f"download_{selected}"
+                    )
+                report_path = errors_path(selected)
+                if os.path.exists(report_path) and os.path.getsize(report_path):
+                    with open(report_path, 'rb') as f:
+                        col_report.download_button(
+                            label="📥 Download Laporan Validasi (CSV)",
+                            data=f,
+                            file_name=f"validation_{selected}.csv",
+                            mime="text/csv",
+                            key=f"errors_{selected}"
+                        )
 
 elif menu == "ℹ️ Informasi Model":
     st.header("Informasi Model")
@@ -320,6 +507,84 @@ elif menu == "ℹ️ Informasi Model":
     importance untuk setiap fitur. Fitur dengan importance tinggi 
     memiliki pengaruh lebih besar dalam prediksi harga rumah.
     """)
+    
+    import os
+    from explain import IMPORTANCE_PATH
+    if os.path.exists(IMPORTANCE_PATH):
+        import pandas as pd
+        importance_df = pd.read_csv(IMPORTANCE_PATH)
+        st.markdown("**Importance per kolom asli** (kolom one-hot digabung; "
+                    "MeanAbsContribution = rata-rata |kontribusi| dalam $ pada data training):")
+        st.bar_chart(importance_df.head(15).set_index('Feature')['MeanAbsContribution'])
+        st.dataframe(importance_df, hide_index=True)
+    else:
+        st.caption(f"Tabel '{IMPORTANCE_PATH}' belum ada. Jalankan `python train_model.py` untuk membuatnya.")
+
+elif menu == "🩺 Diagnostik":
+    st.header("Diagnostik Jalur Prediksi")
+    st.markdown("Latensi per tahap di proses aplikasi ini sejak dijalankan "
+                "(p50/p95/p99 diperkirakan dari bucket histogram).")
+    
+    summary = REGISTRY.summary()
+    if summary:
+        st.dataframe(summary)
+    else:
+        st.info("Belum ada data. Lakukan prediksi single atau batch terlebih dahulu.")
+    
+    cache_stats = prediction_cache.stats()
+    st.caption(f"Cache prediksi: {cache_stats['size']}/{cache_stats['max_size']} entri, "
+               f"{cache_stats['hits']} hit, {cache_stats['misses']} miss "
+               f"({cache_stats['hit_rate']:.0%} hit rate)")
+    
+    prometheus_text = REGISTRY.to_prometheus()
+    with st.expander("Format Prometheus"):
+        st.code(prometheus_text, language='text')
+    st.download_button(
+        label="📥 Download metrics.prom",
+        data=prometheus_text,
+        file_name="metrics.prom",
+        mime="text/plain"
+    )
+    if REGISTRY.path:
+        st.caption(f"Metrik juga ditulis ke '{REGISTRY.path}' setiap "
+                   f"{REGISTRY.flush_seconds:.0f} detik (env METRICS_FILE)")
+    
+    # Perbandingan versi production dan kandidat di registry model
+    router = get_active_router()
+    if router is not None:
+        st.subheader("Versi Model")
+        state = router.state
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Production", state.production)
+        col2.metric("Kandidat", state.candidate or "-")
+        col3.metric("Traffic kandidat", f"{state.candidate_share:.0%}")
+        comparison = router.compare()
+        if comparison:
+            st.dataframe(comparison, hide_index=True)
+        else:
+            st.caption("Belum ada prediksi yang di-route sejak registry dimuat.")
+        if router.last_error:
+            st.warning(f"⚠️ Versi baru di registry gagal dimuat, versi lama tetap dilayani: "
+                       f"{router.last_error}")
+    
+    # Drift input yang dilayani proses ini terhadap profil training
+    st.subheader("Drift Input")
+    predictor = get_predictor()
+    if predictor.monitor is None:
+        st.caption("Monitor drift tidak aktif. Jalankan `python train_model.py` untuk membuat "
+                   "`drift_reference.npz` (atau env DRIFT_MONITOR=0 sedang dipakai).")
+    elif predictor.monitor.n_rows == 0:
+        st.info("Belum ada baris yang dilayani sejak model dimuat.")
+    else:
+        drift = predictor.monitor.summary(predictor.drift_reference)
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Baris dipantau", f"{drift['rows']:,}")
+        col2.metric("PSI maksimum", f"{drift['max_psi']:.3f}",
+                    help="< 0.1 stabil, 0.1–0.25 sedang, > 0.25 signifikan")
+        col3.metric("Nilai diimputasi", f"{drift['imputed_rate']:.1%}",
+                    help=f"Data training: {drift['reference_imputed_rate']:.1%}")
+        col4.metric("Kategori tidak dikenal", f"{drift['unseen_rate']:.1%}")
+        st.dataframe(predictor.drift_report(), hide_index=True)
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,337 @@
+"""
+Job prediksi batch di latar belakang dengan antrean di disk.
+
+Setiap job adalah satu direktori di BATCH_JOBS_DIR:
+    input.csv    -> salinan file yang diupload
+    output.csv   -> hasil prediksi (muncul setelah job selesai)
+    errors.csv   -> laporan validasi per baris (baris error tidak diprediksi)
+    status.json  -> state (queued/running/done/failed), progres, throughput
+                    dan ringkasan drift input job tersebut
+    owner.pid    -> PID proses JobRunner yang menjadwalkan job (lease)
+
+Job dijalankan oleh pool worker proses (JobRunner) dengan batas konkurensi
+BATCH_JOB_WORKERS (default 1) dan prioritas proses lebih rendah, sehingga
+upload besar tidak mengganggu prediksi single yang interaktif. Karena
+status disimpan di disk, job tetap berjalan dan bisa dipantau walaupun
+halaman Streamlit di-rerun atau browser terputus. Job yang belum selesai
+saat proses aplikasi mati dijalankan ulang ketika JobRunner dibuat lagi;
+job milik JobRunner lain yang masih hidup (owner.pid) tidak disentuh.
+
+Contoh:
+    python batch_jobs.py submit listings.csv
+    python batch_jobs.py list
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import secrets
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+JOBS_DIR = os.environ.get('BATCH_JOBS_DIR', 'batch_jobs')
+MAX_WORKERS = int(os.environ.get('BATCH_JOB_WORKERS', 1))
+JOB_TTL_SECONDS = float(os.environ.get('BATCH_JOB_TTL', 24 * 3600))
+# Upload sebesar ini atau lebih diproses sebagai job latar belakang secara default
+BACKGROUND_MIN_BYTES = int(float(os.environ.get('BATCH_BACKGROUND_MIN_MB', 5)) * 1e6)
+JOB_CHUNKSIZE = 20000
+WORKER_NICE = 10
+
+# Predictor milik worker proses, dimuat ulang jika file model berubah
+_WORKER = {}
+
+
+def job_dir(job_id, jobs_dir=JOBS_DIR):
+    return os.path.join(jobs_dir, job_id)
+
+
+def read_status(job_id, jobs_dir=JOBS_DIR):
+    with open(os.path.join(job_dir(job_id, jobs_dir), 'status.json')) as f:
+        return json.load(f)
+
+
+def write_status(job_id, status, jobs_dir=JOBS_DIR):
+    """Tulis status secara atomik agar pembaca tidak melihat file setengah jadi"""
+    path = os.path.join(job_dir(job_id, jobs_dir), 'status.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(status, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def count_rows(path):
+    """Jumlah baris data CSV (tanpa header); newline di dalam nilai ber-kutip tidak dihitung"""
+    from sharded_predict import count_records
+    return count_records(path)
+
+
+def submit_job(source, filename=None, jobs_dir=JOBS_DIR):
+    """
+    Fungsi untuk memasukkan file CSV ke antrean job
+
+    Args:
+        source: path atau file-like object CSV input
+        filename: nama file asli (untuk ditampilkan)
+
+    Returns:
+        job_id: ID job baru (state 'queued')
+    """
+    job_id = time.strftime('%Y%m%d-%H%M%S-') + secrets.token_hex(3)
+    directory = job_dir(job_id, jobs_dir)
+    os.makedirs(directory)
+    input_path = os.path.join(directory, 'input.csv')
+    if isinstance(source, str):
+        filename = filename or os.path.basename(source)
+        shutil.copyfile(source, input_path)
+    else:
+        with open(input_path, 'wb') as f:
+            shutil.copyfileobj(source, f)
+
+    write_status(job_id, {
+        'job_id': job_id,
+        'filename': filename or 'input.csv',
+        'state': 'queued',
+        'created_at': time.time(),
+        'started_at': None,
+        'finished_at': None,
+        'rows': 0,
+        'total_rows': count_rows(input_path),
+        'rows_per_sec': 0.0,
+        'invalid_rows': 0,
+        'error': None,
+    }, jobs_dir)
+    return job_id
+
+
+def list_jobs(jobs_dir=JOBS_DIR):
+    """Status semua job, terbaru lebih dulu"""
+    if not os.path.isdir(jobs_dir):
+        return []
+    jobs = []
+    for job_id in os.listdir(jobs_dir):
+        try:
+            jobs.append(read_status(job_id, jobs_dir))
+        except (FileNotFoundError, ValueError):
+            continue
+    return sorted(jobs, key=lambda status: status['created_at'], reverse=True)
+
+
+def output_path(job_id, jobs_dir=JOBS_DIR):
+    return os.path.join(job_dir(job_id, jobs_dir), 'output.csv')
+
+
+def _pid_alive(pid):
+    """True jika proses dengan PID ini masih ada"""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _owner_path(job_id, jobs_dir=JOBS_DIR):
+    return os.path.join(job_dir(job_id, jobs_dir), 'owner.pid')
+
+
+def read_owner(job_id, jobs_dir=JOBS_DIR):
+    """PID JobRunner pemilik job, atau None jika belum ada"""
+    try:
+        with open(_owner_path(job_id, jobs_dir)) as f:
+            return int(f.read().strip() or 0) or None
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def claim_job(job_id, jobs_dir=JOBS_DIR):
+    """
+    Ambil alih job yang pemiliknya sudah mati
+
+    Lease lama di-rename (atomik, hanya satu proses yang berhasil) lalu
+    owner.pid baru dibuat dengan O_EXCL, sehingga dua JobRunner yang
+    melakukan recover bersamaan tidak menjalankan job yang sama.
+
+    Returns:
+        True jika job berhasil diklaim oleh proses ini
+    """
+    path = _owner_path(job_id, jobs_dir)
+    if os.path.exists(path):
+        stale = f"{path}.{os.getpid()}"
+        try:
+            os.rename(path, stale)
+        except FileNotFoundError:
+            return False
+        os.remove(stale)
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w') as f:
+        f.write(str(os.getpid()))
+    return True
+
+
+def _init_worker():
+    # Turunkan prioritas agar prediksi interaktif tetap responsif
+    try:
+        os.nice(WORKER_NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+def errors_path(job_id, jobs_dir=JOBS_DIR):
+    return os.path.join(job_dir(job_id, jobs_dir), 'errors.csv')
+
+
+def _get_predictor():
+    from inference import Predictor
+    from model_registry import load_version, read_state, registry_exists, version_dir
+    from prediction_cache import model_fingerprint
+    from schema import BatchSchema
+
+    # Dengan registry model, job memakai versi production saat job dimulai
+    production = read_state()['production'] if registry_exists() else None
+    fingerprint = production or model_fingerprint()
+    if _WORKER.get('fingerprint') != fingerprint:
+        predictor = load_version(production) if production else Predictor.load()
+        # Paralelisme dibatasi oleh jumlah worker, bukan thread model
+        if hasattr(predictor.model, 'n_jobs'):
+            predictor.model.n_jobs = 1
+        schema = (BatchSchema.load(os.path.join(version_dir(production), 'preprocessing_info.pkl'),
+                                   reference_path=os.path.join(version_dir(production),
+                                                               'drift_reference.npz'))
+                  if production else BatchSchema.load())
+        _WORKER.update(predictor=predictor, schema=schema, fingerprint=fingerprint)
+    return _WORKER['predictor'], _WORKER['schema']
+
+
+def run_job(job_id, jobs_dir=JOBS_DIR, chunksize=JOB_CHUNKSIZE):
+    """
+    Fungsi untuk menjalankan satu job (dipanggil di worker proses)
+
+    Progres ditulis ke status.json setiap chunk. Hasil ditulis ke file
+    sementara lalu di-rename menjadi output.csv setelah selesai.
+    """
+    from batch_predict import predict_csv_stream
+
+    directory = job_dir(job_id, jobs_dir)
+    status = read_status(job_id, jobs_dir)
+    status.update(state='running', started_at=time.time(), rows=0, error=None, pid=os.getpid())
+    write_status(job_id, status, jobs_dir)
+
+    part_path = os.path.join(directory, 'output.csv.part')
+    try:
+        predictor, schema = _get_predictor()
+        # Monitor drift worker dihitung per job dan diringkas di status.json
+        if predictor.monitor is not None:
+            predictor.monitor.reset()
+        for progress in predict_csv_stream(os.path.join(directory, 'input.csv'),
+                                           part_path, predictor, chunksize, schema=schema,
+                                           errors_path=errors_path(job_id, jobs_dir)):
+            elapsed = time.time() - status['started_at']
+            status.update(rows=progress['total_rows'], invalid_rows=progress['invalid_rows'],
+                          rows_per_sec=progress['total_rows'] / elapsed if elapsed > 0 else 0.0)
+            write_status(job_id, status, jobs_dir)
+        os.replace(part_path, output_path(job_id, jobs_dir))
+        status.update(state='done', finished_at=time.time(), total_rows=status['rows'])
+        if predictor.monitor is not None:
+            status['drift'] = predictor.monitor.summary(predictor.drift_reference)
+    except Exception as e:
+        status.update(state='failed', finished_at=time.time(), error=str(e))
+    write_status(job_id, status, jobs_dir)
+    return status
+
+
+class JobRunner:
+    """
+    Pool worker proses untuk job batch dengan batas konkurensi.
+
+    Job dikirim ke pool berukuran max_workers; job lain menunggu di antrean
+    (state 'queued'). Saat dibuat, job lama yang belum selesai dan pemiliknya
+    sudah mati dimasukkan lagi ke antrean, dan job yang lebih tua dari
+    ttl_seconds dihapus.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, jobs_dir=JOBS_DIR, ttl_seconds=JOB_TTL_SECONDS):
+        self.max_workers = max_workers
+        self.jobs_dir = jobs_dir
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(jobs_dir, exist_ok=True)
+        # spawn: worker tidak mewarisi thread milik server Streamlit
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+        self._futures = {}
+        self._lock = threading.Lock()
+        self.recover()
+
+    def recover(self):
+        """Hapus job kedaluwarsa dan jadwalkan ulang job yang belum selesai"""
+        now = time.time()
+        for status in list_jobs(self.jobs_dir):
+            if status['state'] in ('done', 'failed') and now - status['created_at'] > self.ttl_seconds:
+                shutil.rmtree(job_dir(status['job_id'], self.jobs_dir), ignore_errors=True)
+            elif status['state'] in ('queued', 'running'):
+                # Job yang masih dijalankan atau diantrekan proses lain yang hidup dilewati
+                if _pid_alive(status.get('pid')) and status['state'] == 'running':
+                    continue
+                if _pid_alive(read_owner(status['job_id'], self.jobs_dir)):
+                    continue
+                if not claim_job(status['job_id'], self.jobs_dir):
+                    continue
+                status.update(state='queued', rows=0, started_at=None, pid=None)
+                write_status(status['job_id'], status, self.jobs_dir)
+                self._schedule(status['job_id'])
+
+    def _schedule(self, job_id):
+        with self._lock:
+            self._futures[job_id] = self._executor.submit(run_job, job_id, self.jobs_dir)
+
+    def submit(self, source, filename=None):
+        """Simpan input ke antrean dan jadwalkan; langsung mengembalikan job ID"""
+        job_id = submit_job(source, filename, self.jobs_dir)
+        claim_job(job_id, self.jobs_dir)
+        self._schedule(job_id)
+        return job_id
+
+    def active_jobs(self):
+        with self._lock:
+            return sum(not future.done() for future in self._futures.values())
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Job prediksi batch di latar belakang")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    submit_parser = subparsers.add_parser('submit', help="Jalankan job untuk file CSV dan tunggu selesai")
+    submit_parser.add_argument('input', help="Path CSV input")
+    subparsers.add_parser('list', help="Tampilkan status semua job")
+    args = parser.parse_args()
+
+    if args.command == 'submit':
+        runner = JobRunner()
+        job_id = runner.submit(args.input)
+        print(f"Job {job_id} dimasukkan ke antrean")
+        runner.shutdown(wait=True)
+        status = read_status(job_id)
+        print(f"Job {job_id}: {status['state']}, {status['rows']} baris "
+              f"({status['rows_per_sec']:,.0f} baris/detik)")
+        if status['state'] == 'done':
+            print(f"Hasil: {output_path(job_id)}")
+    else:
+        for status in list_jobs():
+            print(f"{status['job_id']}  {status['state']:8s}  {status['rows']}/{status['total_rows']} baris  "
+                  f"{status['filename']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Script untuk prediksi batch secara streaming (per chunk) pada file CSV besar.
+
+Input dibaca per chunk berukuran tetap, setiap chunk di-encode dan
+diprediksi, lalu hasilnya langsung ditulis ke file output. Memori puncak
+hanya bergantung pada ukuran chunk, bukan jumlah baris input.
+
+Dengan --validate setiap chunk diperiksa terhadap skema model (schema.py):
+baris dengan error tidak diprediksi (PredictedSalePrice kosong) dan semua
+masalah ditulis ke laporan per baris.
+
+Contoh:
+    python batch_predict.py listings.csv predictions.csv --chunksize 50000
+    python batch_predict.py listings.csv predictions.csv --validate --errors errors.csv
+"""
+
+import argparse
+import contextlib
+import time
+
+import numpy as np
+import pandas as pd
+
+from inference import Predictor
+from prediction_cache import predict_deduplicated
+from metrics import REGISTRY, stage
+import warnings
+warnings.filterwarnings('ignore')
+
+
+DEFAULT_CHUNKSIZE = 50000
+
+
+def _scatter(values, valid):
+    """Kembalikan hasil prediksi baris valid ke posisi aslinya (NaN untuk baris error)"""
+    if valid is None:
+        return values
+    out = np.full(len(valid), np.nan)
+    out[valid] = values
+    return out
+
+
+def predict_csv_stream(source, output_path, predictor, chunksize=DEFAULT_CHUNKSIZE,
+                       intervals=False, schema=None, errors_path=None):
+    """
+    Fungsi untuk prediksi CSV secara streaming
+
+    Args:
+        source: path atau file-like object CSV input
+        output_path: path file CSV output, atau file-like object teks
+            (misalnya io.StringIO untuk hasil di memori)
+        predictor: Predictor (model + preprocessing)
+        chunksize: jumlah baris per chunk
+        intervals: tambahkan kolom PredictionStd/Lower/Upper dari sebaran antar pohon
+        schema: BatchSchema untuk hint dtype dan validasi per chunk (opsional)
+        errors_path: path CSV laporan masalah per baris (jika schema diberikan)
+
+    Yields:
+        progress: dict berisi nomor chunk, baris di chunk, total baris dan
+            total baris yang tidak diprediksi karena error
+    """
+    total_rows = invalid_rows = 0
+    errors = open(errors_path, 'w', newline='') if schema is not None and errors_path else None
+    if hasattr(output_path, 'write'):
+        output_file = contextlib.nullcontext(output_path)
+    else:
+        output_file = open(output_path, 'w', newline='')
+    with output_file as output:
+        # Tanpa hint float64: nilai yang bukan angka dilaporkan validate(), bukan menggagalkan file
+        reader = pd.read_csv(source, chunksize=chunksize,
+                             dtype=schema.dtypes(numeric=False) if schema is not None else None)
+        chunk_number = 0
+        while True:
+            with stage('read_csv') as timer:
+                chunk = next(reader, None)
+                timer.rows = 0 if chunk is None else len(chunk)
+            if chunk is None:
+                break
+            data, valid = chunk, None
+            if schema is not None:
+                with stage('validate', rows=len(chunk)):
+                    data, report, valid = schema.validate(chunk, start_row=total_rows)
+                if errors is not None:
+                    report.to_csv(errors, index=False, header=(chunk_number == 0))
+                invalid_rows += int((~valid).sum())
+                if valid.all():
+                    valid = None
+                else:
+                    data = data[valid]
+            if valid is not None and not valid.any():
+                # Semua baris di chunk error: tidak ada yang perlu diprediksi
+                result = dict.fromkeys(('prediction', 'std', 'lower', 'upper'), np.empty(0))
+            elif intervals:
+                result = predictor.predict_interval(data)
+            else:
+                X_encoded = predictor.encode(data)
+                result = {'prediction': predict_deduplicated(predictor.model, X_encoded)[0]}
+            predictions = _scatter(result['prediction'], valid)
+
+            if 'Id' not in chunk.columns:
+                chunk['Id'] = range(total_rows + 1, total_rows + len(chunk) + 1)
+            chunk['PredictedSalePrice'] = predictions
+            if intervals:
+                chunk['PredictionStd'] = _scatter(result['std'], valid)
+                chunk['PredictionLower'] = _scatter(result['lower'], valid)
+                chunk['PredictionUpper'] = _scatter(result['upper'], valid)
+            with stage('to_csv', rows=len(chunk)):
+                chunk.to_csv(output, index=False, header=(chunk_number == 0))
+
+            total_rows += len(chunk)
+            yield {
+                'chunk': chunk_number,
+                'rows': len(chunk),
+                'total_rows': total_rows,
+                'invalid_rows': invalid_rows,
+            }
+            chunk_number += 1
+    if errors is not None:
+        errors.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prediksi batch streaming untuk CSV besar")
+    parser.add_argument('input', help="Path CSV input")
+    parser.add_argument('output', help="Path CSV output")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"Jumlah baris per chunk (default: {DEFAULT_CHUNKSIZE})")
+    parser.add_argument('--model', default='model.pkl', help="Path model")
+    parser.add_argument('--engine', choices=['sklearn', 'flat', 'mmap'], default=None,
+                        help="Engine inferensi (default: env INFERENCE_ENGINE atau sklearn)")
+    parser.add_argument('--preprocessing', default='preprocessing_info.pkl',
+                        help="Path preprocessing info")
+    parser.add_argument('--variant', default=None,
+                        help="Varian model terkompresi dari compress_model.py (default: env MODEL_VARIANT)")
+    parser.add_argument('--sparse', action='store_true', default=None,
+                        help="Encode chunk sebagai matriks sparse CSR (default: env SPARSE_FEATURES)")
+    parser.add_argument('--intervals', action='store_true',
+                        help="Tambahkan interval prediksi (kuantil 5%%-95%% antar pohon)")
+    parser.add_argument('--validate', action='store_true',
+                        help="Validasi dan koreksi input terhadap skema model (baris error dilewati)")
+    parser.add_argument('--errors', default=None,
+                        help="Path laporan masalah per baris (default: <output>.errors.csv)")
+    parser.add_argument('--metrics', default=None,
+                        help="Tulis metrik per tahap (format Prometheus) ke path ini")
+    args = parser.parse_args()
+
+    predictor = Predictor.load(args.engine, model_path=args.model,
+                               preprocessing_path=args.preprocessing, sparse=args.sparse,
+                               variant=args.variant)
+
+    schema, errors_path = None, None
+    if args.validate:
+        from schema import BatchSchema
+        schema = BatchSchema.load(args.preprocessing)
+        errors_path = args.errors or f"{args.output}.errors.csv"
+
+    start = time.perf_counter()
+    total_rows = invalid_rows = 0
+    for progress in predict_csv_stream(args.input, args.output, predictor, args.chunksize,
+                                       args.intervals, schema, errors_path):
+        total_rows, invalid_rows = progress['total_rows'], progress['invalid_rows']
+        elapsed = time.perf_counter() - start
+        print(f"   Chunk {progress['chunk'] + 1}: {progress['rows']} baris "
+              f"(total {total_rows}, {total_rows / elapsed:,.0f} baris/detik)")
+    print(f"Prediksi selesai untuk {total_rows} rumah. Hasil disimpan di '{args.output}'")
+    if schema is not None:
+        print(f"{invalid_rows} baris dengan error tidak diprediksi; "
+              f"laporan per baris di '{errors_path}'")
+    if predictor.monitor is not None:
+        drift = predictor.monitor.summary(predictor.drift_reference)
+        print(f"Drift input: PSI maks {drift['max_psi']:.3f} ({drift['drifted_columns']} kolom signifikan), "
+              f"{drift['imputed_rate']:.2%} nilai diimputasi, "
+              f"{drift['unseen_rate']:.2%} kategori tidak dikenal")
+    if args.metrics:
+        REGISTRY.write_prometheus(args.metrics)
+        print(f"Metrik disimpan di '{args.metrics}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Benchmark performa training, preprocessing dan inferensi.
+
+Berjalan offline memakai train.csv/test.csv, dengan opsi memperbesar data
+secara sintetis (sampling ulang + sedikit noise) sampai jutaan baris.
+Hasil berupa JSON (latensi p50/p95/p99, baris/detik, memori puncak) dan
+bisa dibandingkan dengan baseline yang tersimpan.
+
+Contoh:
+    python benchmark.py --rows 100000 --output bench.json
+    python benchmark.py --save-baseline bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json --tolerance 0.2
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from feature_encoder import FeatureEncoder
+from inference import Predictor
+from forest_engine import FlatForest, FLAT_FOREST_PATH
+from model_artifact import ARTIFACT_DIR, load_artifact
+from train_model import preprocess_data
+from dataset_cache import load_encoded_dataset
+import warnings
+warnings.filterwarnings('ignore')
+
+
+# Metrik yang dibandingkan dengan baseline (semakin kecil semakin baik)
+COMPARED_METRICS = ('p50_ms', 'p95_ms', 'seconds')
+
+
+def upscale(df, n_rows, seed=42):
+    """
+    Fungsi untuk memperbesar dataset secara sintetis
+
+    Baris diambil ulang secara acak lalu kolom numerik diberi noise
+    multiplikatif kecil agar tidak semuanya duplikat.
+    """
+    if n_rows is None or n_rows == len(df):
+        return df
+    rng = np.random.default_rng(seed)
+    sampled = df.iloc[rng.integers(0, len(df), n_rows)].reset_index(drop=True)
+    skip = {'Id', 'SalePrice', 'MSSubClass', 'OverallQual', 'OverallCond'}
+    for col in sampled.select_dtypes(include=[np.number]).columns:
+        if col in skip:
+            continue
+        noise = 1 + rng.normal(0, 0.02, n_rows)
+        values = sampled[col] * noise
+        if pd.api.types.is_integer_dtype(sampled[col]):
+            values = values.round().astype(sampled[col].dtype)
+        sampled[col] = values
+    if 'Id' in sampled.columns:
+        sampled['Id'] = np.arange(1, n_rows + 1)
+    return sampled
+
+
+def summarize(latencies, rows_per_call=1):
+    """Ringkas daftar latensi (detik) menjadi persentil dan throughput"""
+    latencies = np.asarray(latencies)
+    return {
+        'calls': int(len(latencies)),
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p95_ms': float(np.percentile(latencies, 95) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'rows_per_sec': float(rows_per_call * len(latencies) / latencies.sum()),
+    }
+
+
+def peak_memory(fn):
+    """
+    Jalankan fn sekali dengan tracemalloc dan kembalikan memori puncak (byte)
+
+    tracemalloc memperlambat setiap alokasi, jadi run ini hanya dipakai
+    untuk memori dan tidak pernah untuk waktu.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(fn, repeat, rows_per_call=1, warmup=1):
+    """Ukur latensi fn sebanyak `repeat` kali, lalu memori puncaknya di run terpisah"""
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    result = summarize(latencies, rows_per_call)
+    result['peak_memory_mb'] = peak_memory(fn) / 1e6
+    return result
+
+
+def measure_once(fn, rows):
+    """
+    Ukur fungsi yang mahal, misalnya fit atau preprocessing
+
+    Waktu diambil dari run tanpa tracemalloc; memori puncak dari run
+    kedua yang di-trace (fn dijalankan dua kali).
+    """
+    gc.collect()
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+    return {
+        'seconds': seconds,
+        'rows': rows,
+        'rows_per_sec': rows / seconds,
+        'peak_memory_mb': peak_memory(fn) / 1e6,
+    }
+
+
+def load_models():
+    """Muat semua engine inferensi yang tersedia beserta waktu load-nya"""
+    models, load_times = {}, {}
+
+    start = time.perf_counter()
+    models['sklearn'] = joblib.load('model.pkl')
+    load_times['sklearn'] = {'seconds': time.perf_counter() - start}
+
+    try:
+        start = time.perf_counter()
+        models['flat'] = FlatForest.load(FLAT_FOREST_PATH)
+        load_times['flat'] = {'seconds': time.perf_counter() - start}
+    except FileNotFoundError:
+        pass
+
+    try:
+        start = time.perf_counter()
+        models['mmap'] = load_artifact(ARTIFACT_DIR)[0]
+        load_times['mmap'] = {'seconds': time.perf_counter() - start}
+    except FileNotFoundError:
+        pass
+    return models, load_times
+
+
+def matrix_megabytes(X):
+    """Ukuran matriks fitur (dense atau CSR) dalam MB"""
+    if hasattr(X, 'indptr'):
+        return (X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) / 1e6
+    return X.nbytes / 1e6
+
+
+def compare_representations(train_df, test_df, preprocessing_info, fit_estimators=100,
+                            skip_fit=False):
+    """
+    Fungsi untuk membandingkan matriks fitur dense dan sparse CSR
+
+    Returns:
+        benchmarks: dictionary hasil (ukuran matriks, encode, fit dan prediksi batch)
+    """
+    from sklearn.ensemble import RandomForestRegressor
+
+    encoder = FeatureEncoder(preprocessing_info)
+    raw = train_df.drop(columns=['Id', 'SalePrice'])
+    y = train_df['SalePrice']
+    benchmarks = {}
+    model = joblib.load('model.pkl')
+    for kind, sparse in (('dense', False), ('sparse', True)):
+        print(f"5. Representasi {kind} ({len(train_df)} baris)...")
+        result = measure_once(lambda: encoder.transform(raw, sparse=sparse), len(raw))
+        X = encoder.transform(raw, sparse=sparse)
+        result['matrix_mb'] = matrix_megabytes(X)
+        benchmarks[f'encode.{kind}'] = result
+
+        if not skip_fit:
+            benchmarks[f'fit.{kind}'] = measure_once(
+                lambda: RandomForestRegressor(
+                    n_estimators=fit_estimators, max_depth=15, random_state=42, n_jobs=-1
+                ).fit(X, y),
+                len(raw),
+            )
+        del X
+
+        predictor = Predictor(model, preprocessing_info, sparse=sparse)
+        benchmarks[f'batch_encode_predict.{kind}'] = measure_once(
+            lambda: predictor.predict(test_df), len(test_df)
+        )
+    return benchmarks
+
+
+def run_benchmarks(n_rows=None, single_repeat=200, batch_repeat=5, fit_estimators=100,
+                   skip_fit=False, representations=False):
+    """
+    Fungsi untuk menjalankan seluruh benchmark
+
+    Args:
+        n_rows: jumlah baris sintetis untuk train dan batch (default: ukuran asli)
+        single_repeat: jumlah pengulangan prediksi single
+        batch_repeat: jumlah pengulangan prediksi batch
+        fit_estimators: jumlah pohon untuk benchmark fit
+        skip_fit: lewati benchmark RandomForestRegressor.fit
+        representations: bandingkan juga matriks fitur dense vs sparse CSR
+
+    Returns:
+        report: dictionary hasil benchmark (siap disimpan sebagai JSON)
+    """
+    from sklearn.ensemble import RandomForestRegressor
+
+    train_df = upscale(pd.read_csv('train.csv'), n_rows)
+    test_df = upscale(pd.read_csv('test.csv'), n_rows)
+    preprocessing_info = joblib.load('preprocessing_info.pkl')
+    benchmarks = {}
+
+    print(f"1. preprocess_data ({len(train_df)} baris)...")
+    benchmarks['preprocess_data'] = measure_once(
+        lambda: preprocess_data(train_df), len(train_df)
+    )
+
+    if n_rows is None:
+        load_encoded_dataset('train.csv')
+        benchmarks['load_encoded_dataset'] = measure_once(
+            lambda: load_encoded_dataset('train.csv'), len(train_df)
+        )
+
+    print("2. Load model...")
+    models, load_times = load_models()
+    for engine, result in load_times.items():
+        benchmarks[f'load_model.{engine}'] = result
+
+    record = test_df.drop(columns=['Id']).iloc[0].to_dict()
+    for engine, model in models.items():
+        print(f"3. Prediksi single + batch ({engine})...")
+        predictor = Predictor(model, preprocessing_info)
+        benchmarks[f'single.{engine}'] = measure(
+            lambda: predictor.predict(record), single_repeat,
+        )
+        benchmarks[f'batch.{engine}'] = measure(
+            lambda: predictor.predict(test_df),
+            batch_repeat, rows_per_call=len(test_df),
+        )
+        # Interval prediksi dari output semua pohon (satu pass FlatForest).
+        # Konversi sklearn -> FlatForest dibangun sekali di sini agar tidak ikut terukur
+        _ = predictor.tree_engine
+        benchmarks[f'single_interval.{engine}'] = measure(
+            lambda: predictor.predict_interval(record), single_repeat,
+        )
+        benchmarks[f'batch_interval.{engine}'] = measure(
+            lambda: predictor.predict_interval(test_df),
+            batch_repeat, rows_per_call=len(test_df),
+        )
+
+    if not skip_fit:
+        print(f"4. RandomForestRegressor.fit ({fit_estimators} pohon)...")
+        if n_rows is None:
+            X_encoded, y, _, _ = load_encoded_dataset('train.csv')
+        else:
+            X_encoded, y, _ = preprocess_data(train_df)
+        benchmarks['fit'] = measure_once(
+            lambda: RandomForestRegressor(
+                n_estimators=fit_estimators, max_depth=15, random_state=42, n_jobs=-1
+            ).fit(X_encoded, y),
+            len(X_encoded),
+        )
+
+    if representations:
+        benchmarks.update(compare_representations(
+            train_df, test_df, preprocessing_info, fit_estimators, skip_fit
+        ))
+
+    return {
+        'meta': {
+            'rows': len(train_df),
+            'test_rows': len(test_df),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'benchmarks': benchmarks,
+    }
+
+
+def compare_with_baseline(report, baseline, tolerance):
+    """
+    Fungsi untuk membandingkan hasil dengan baseline
+
+    Returns:
+        regressions: list pesan metrik yang lebih lambat dari baseline * (1 + tolerance)
+
+    Raises:
+        ValueError: jika jumlah baris baseline berbeda dengan hasil ini
+    """
+    if report['meta']['rows'] != baseline['meta']['rows']:
+        raise ValueError(
+            f"Baseline diukur pada {baseline['meta']['rows']} baris, hasil ini "
+            f"{report['meta']['rows']} baris; jalankan dengan --rows yang sama"
+        )
+    regressions = []
+    for name, result in report['benchmarks'].items():
+        base = baseline['benchmarks'].get(name)
+        if base is None:
+            continue
+        for metric in COMPARED_METRICS:
+            if metric in result and metric in base and base[metric] > 0:
+                ratio = result[metric] / base[metric]
+                if ratio > 1 + tolerance:
+                    regressions.append(
+                        f"{name}.{metric}: {result[metric]:.3f} vs baseline "
+                        f"{base[metric]:.3f} ({(ratio - 1) * 100:+.0f}%)"
+                    )
+    return regressions
+
+
+def print_report(report):
+    print("\n" + "="*60)
+    print(f"HASIL BENCHMARK ({report['meta']['rows']} baris)")
+    print("="*60)
+    for name, result in report['benchmarks'].items():
+        if 'p50_ms' in result:
+            print(f"   {name:22s} p50 {result['p50_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  "
+                  f"p99 {result['p99_ms']:9.2f} ms  {result['rows_per_sec']:12,.0f} baris/detik")
+        else:
+            line = f"   {name:22s} {result['seconds']:9.3f} s"
+            if 'rows_per_sec' in result:
+                line += f"  {result['rows_per_sec']:12,.0f} baris/detik"
+            if 'peak_memory_mb' in result:
+                line += f"  puncak {result['peak_memory_mb']:9.1f} MB"
+            if 'matrix_mb' in result:
+                line += f"  matriks {result['matrix_mb']:9.1f} MB"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prediksi harga rumah")
+    parser.add_argument('--rows', type=int, default=None,
+                        help="Jumlah baris sintetis (default: ukuran asli train.csv/test.csv)")
+    parser.add_argument('--single-repeat', type=int, default=200)
+    parser.add_argument('--batch-repeat', type=int, default=5)
+    parser.add_argument('--fit-estimators', type=int, default=100)
+    parser.add_argument('--skip-fit', action='store_true', help="Lewati benchmark fit")
+    parser.add_argument('--representations', action='store_true',
+                        help="Bandingkan memori dan waktu matriks fitur dense vs sparse CSR")
+    parser.add_argument('--output', default='benchmark_results.json', help="Path output JSON")
+    parser.add_argument('--baseline', help="Path JSON baseline untuk perbandingan")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Batas perlambatan relatif terhadap baseline (default: 0.2 = 20%%)")
+    parser.add_argument('--save-baseline', help="Simpan hasil juga sebagai baseline di path ini")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.rows, args.single_repeat, args.batch_repeat,
+                            args.fit_estimators, args.skip_fit, args.representations)
+    print_report(report)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nHasil disimpan sebagai '{args.output}'")
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline disimpan sebagai '{args.save_baseline}'")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        try:
+            regressions = compare_with_baseline(report, baseline, args.tolerance)
+        except ValueError as e:
+            print(f"\n❌ {e}")
+            sys.exit(2)
+        if regressions:
+            print("\n❌ REGRESI PERFORMA TERDETEKSI:")
+            for message in regressions:
+                print(f"   - {message}")
+            sys.exit(1)
+        print("\n✅ Tidak ada regresi dibanding baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,9 @@
 Script untuk mengecek setup dan dependencies sebelum menjalankan aplikasi
 """
 
+import argparse
+import importlib.util
+import subprocess
 import sys
 import os
 
@@ -37,11 +40,11 @@ def check_dependencies():
     
     missing_packages = []
     
+    # find_spec hanya mencari modul tanpa mengimpornya (jauh lebih cepat)
     for module, package in required_packages.items():
-        try:
-            __import__(module)
+        if importlib.util.find_spec(module) is not None:
             print(f"✅ {package} - OK")
-        except ImportError:
+        else:
             print(f"❌ {package} - NOT INSTALLED")
             missing_packages.append(package)
     
@@ -100,6 +103,48 @@ def check_model_files():
         print("\n✅ Model files found!")
         return True
 
+def measure_import_cost(module):
+    """
+    Ukur waktu import satu modul di proses Python baru dengan -X importtime
+
+    Returns:
+        cumulative_us: waktu import kumulatif dalam mikrodetik, atau None jika gagal
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    for line in reversed(result.stderr.splitlines()):
+        # Format: "import time: self [us] | cumulative | imported package"
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1])
+    return None
+
+def check_import_cost():
+    """Laporkan biaya import per modul (untuk mengukur cold start container)"""
+    print("\n" + "="*60)
+    print("IMPORT COST (cold start per modul)")
+    print("="*60)
+    
+    modules = ['streamlit', 'pandas', 'numpy', 'sklearn', 'joblib', 'matplotlib',
+               'prediction_cache', 'feature_encoder', 'forest_engine', 'inference']
+    costs = []
+    for module in modules:
+        cost = measure_import_cost(module)
+        if cost is None:
+            print(f"⚠️  {module} - tidak bisa diimpor")
+            continue
+        costs.append((module, cost))
+    
+    for module, cost in sorted(costs, key=lambda item: item[1], reverse=True):
+        print(f"   {module:20s} {cost / 1000:9.1f} ms")
+    print("\n   Catatan: app.py hanya mengimpor streamlit dan prediction_cache saat startup;")
+    print("   pandas/numpy/sklearn dimuat saat halaman prediksi pertama kali dibuka.")
+    return costs
+
 def main():
     """Main function"""
     print("\n" + "="*60)
@@ -141,5 +186,12 @@ def main():
     print("="*60 + "\n")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Cek setup aplikasi prediksi harga rumah")
+    parser.add_argument('--import-cost', action='store_true',
+                        help="Laporkan waktu import setiap modul")
+    args = parser.parse_args()
+    if args.import_cost:
+        check_import_cost()
+    else:
+        main()
 
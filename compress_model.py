@@ -0,0 +1,187 @@
+"""
+Script untuk membuat varian model serving yang lebih kecil.
+
+Dari forest penuh (model.pkl) dibuat beberapa varian FlatForest:
+    trees_<k>            -> k pohon pertama
+    depth_<d>            -> semua pohon dipotong pada kedalaman d (node
+                            terpotong memakai value internalnya)
+    trees_<k>_depth_<d>  -> kombinasi keduanya
+    distilled            -> forest kecil yang dilatih ulang untuk meniru
+                            prediksi forest penuh pada data training
+
+Setiap varian dievaluasi pada held-out split yang sama dengan
+train_model.py (RMSE, R²), latensi prediksi single (p50/p99) dan ukuran
+file, lalu disimpan di model_variants/<nama>.npz beserta report.csv.
+Setiap varian menyimpan hash model.pkl dan kolom fitur sumbernya; serving
+memilih varian lewat env MODEL_VARIANT (default: model penuh) dan menolak
+varian yang tidak cocok dengan model yang sedang dipakai.
+
+Contoh:
+    python compress_model.py
+    python compress_model.py --trees 10 20 --depths 8 --distill-trees 15
+    MODEL_VARIANT=trees_25_depth_10 streamlit run app.py
+"""
+
+import argparse
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+
+from dataset_cache import load_encoded_dataset
+from forest_engine import FlatForest, VARIANTS_DIR, variant_metadata
+from inference import Predictor
+import warnings
+warnings.filterwarnings('ignore')
+
+
+def distill(teacher, X_train, n_estimators=20, max_depth=10):
+    """
+    Fungsi untuk melatih forest kecil dengan target prediksi forest penuh
+
+    Returns:
+        FlatForest hasil distilasi
+    """
+    student = RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth,
+                                    random_state=42, n_jobs=-1)
+    student.fit(X_train, teacher.predict(X_train))
+    return FlatForest.from_sklearn(student)
+
+
+def build_variants(full, X_train, tree_counts=(10, 25, 50), depths=(8, 10),
+                   distill_trees=20, distill_depth=10):
+    """
+    Fungsi untuk membuat semua varian dari FlatForest penuh
+
+    Returns:
+        variants: dict {nama varian: FlatForest}
+    """
+    variants = {'full': full}
+    for k in tree_counts:
+        if k < full.n_trees:
+            variants[f'trees_{k}'] = full.subset(np.arange(k))
+    for d in depths:
+        if d < full.max_depth:
+            variants[f'depth_{d}'] = full.truncate(d)
+            for k in tree_counts:
+                if k < full.n_trees:
+                    variants[f'trees_{k}_depth_{d}'] = full.subset(np.arange(k)).truncate(d)
+    if distill_trees:
+        variants['distilled'] = distill(full, X_train, distill_trees, distill_depth)
+    return variants
+
+
+def evaluate_variant(flat_forest, preprocessing_info, X_test, y_test, record, repeat=300):
+    """
+    Fungsi untuk mengukur akurasi dan latensi satu varian
+
+    Returns:
+        metrics: dict berisi rmse, r2, latensi single p50/p99 (encode + predict),
+            p99 model saja, dan baris/detik batch
+    """
+    predictions = flat_forest.predict(X_test)
+    predictor = Predictor(flat_forest, preprocessing_info)
+    predictor.predict(record)
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predictor.predict(record)
+        latencies.append(time.perf_counter() - start)
+    # Latensi model saja (tanpa encoding) untuk satu baris
+    row = X_test[:1]
+    model_latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        flat_forest.predict(row)
+        model_latencies.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    flat_forest.predict(X_test)
+    batch_seconds = time.perf_counter() - start
+    return {
+        'trees': flat_forest.n_trees,
+        'max_depth': flat_forest.max_depth,
+        'nodes': flat_forest.node_count,
+        'rmse': float(np.sqrt(mean_squared_error(y_test, predictions))),
+        'r2': float(r2_score(y_test, predictions)),
+        'single_p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'single_p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'model_p99_ms': float(np.percentile(model_latencies, 99) * 1000),
+        'batch_rows_per_sec': len(X_test) / batch_seconds,
+    }
+
+
+def compress_model(model_path='model.pkl', output_dir=VARIANTS_DIR, tree_counts=(10, 25, 50),
+                   depths=(8, 10), distill_trees=20, distill_depth=10):
+    """
+    Fungsi untuk membuat, mengevaluasi dan menyimpan varian model
+
+    Returns:
+        report: DataFrame trade-off akurasi vs latensi vs ukuran per varian
+    """
+    print("="*60)
+    print("KOMPRESI MODEL UNTUK SERVING")
+    print("="*60)
+
+    print("\n1. Memuat model dan dataset...")
+    model = joblib.load(model_path)
+    X_encoded, y, preprocessing_info, _ = load_encoded_dataset('train.csv')
+    # Split sama dengan train_model.py sehingga X_test tidak dipakai saat training
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_encoded.to_numpy(), y.to_numpy(), test_size=0.2, random_state=42
+    )
+    full = FlatForest.from_sklearn(model)
+
+    print("\n2. Membuat varian...")
+    variants = build_variants(full, X_train, tree_counts, depths, distill_trees, distill_depth)
+    print(f"   {len(variants)} varian: {', '.join(variants)}")
+
+    print("\n3. Mengevaluasi dan menyimpan varian...")
+    os.makedirs(output_dir, exist_ok=True)
+    record = pd.read_csv('test.csv').drop(columns=['Id']).iloc[0].to_dict()
+    rows = []
+    # Asal varian dicatat agar serving menolak varian dari model lain
+    origin = variant_metadata(model_path, preprocessing_info['feature_columns'])
+    for name, flat_forest in variants.items():
+        path = os.path.join(output_dir, f'{name}.npz')
+        flat_forest.metadata.update(origin, variant=name)
+        flat_forest.save(path)
+        metrics = evaluate_variant(flat_forest, preprocessing_info, X_test, y_test, record)
+        rows.append({'variant': name, **metrics, 'size_mb': os.path.getsize(path) / 1e6})
+
+    report = pd.DataFrame(rows)
+    report_path = os.path.join(output_dir, 'report.csv')
+    report.to_csv(report_path, index=False)
+
+    print("\n" + "="*60)
+    print("TRADE-OFF AKURASI vs LATENSI vs UKURAN (held-out split)")
+    print("="*60)
+    print(report.to_string(index=False, float_format=lambda v: f'{v:,.3f}'))
+    print(f"\nVarian disimpan di '{output_dir}/', laporan di '{report_path}'")
+    print("Pilih varian untuk serving dengan env MODEL_VARIANT=<nama varian>")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kompresi model Random Forest untuk serving")
+    parser.add_argument('--model', default='model.pkl', help="Path model penuh")
+    parser.add_argument('--output-dir', default=VARIANTS_DIR, help="Direktori varian")
+    parser.add_argument('--trees', type=int, nargs='*', default=[10, 25, 50],
+                        help="Jumlah pohon untuk varian subset (default: 10 25 50)")
+    parser.add_argument('--depths', type=int, nargs='*', default=[8, 10],
+                        help="Batas kedalaman untuk varian depth (default: 8 10)")
+    parser.add_argument('--distill-trees', type=int, default=20,
+                        help="Jumlah pohon model distilasi (0 untuk melewati)")
+    parser.add_argument('--distill-depth', type=int, default=10,
+                        help="Kedalaman maksimal model distilasi")
+    args = parser.parse_args()
+    compress_model(args.model, args.output_dir, args.trees, args.depths,
+                   args.distill_trees, args.distill_depth)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Cache dataset training dalam format biner kolumnar.
+
+Untuk satu file CSV disimpan:
+    raw/<kolom>.npy          -> frame mentah per kolom (numerik apa adanya,
+                                kolom teks sebagai kode int32 + daftar kategori)
+    X.npy, y.npy             -> matriks fitur hasil preprocess_data dan target
+    preprocessing_info.pkl   -> info preprocessing yang sama dengan training
+    meta.json                -> urutan/tipe kolom dan kunci cache
+
+Kunci cache adalah hash isi CSV ditambah konfigurasi preprocessing, jadi
+cache hanya dibangun ulang jika salah satunya berubah. Array dibuka dengan
+memory-map sehingga eksperimen berulang melewati parsing CSV dan encoding.
+
+Contoh:
+    python dataset_cache.py train.csv
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+
+CACHE_DIR = '.dataset_cache'
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(csv_path):
+    """Kunci cache dari isi CSV dan konfigurasi preprocessing"""
+    from train_model import CATEGORICAL_NA_COLS, PREPROCESSING_VERSION
+
+    config = json.dumps({
+        'preprocessing_version': PREPROCESSING_VERSION,
+        'categorical_na_cols': CATEGORICAL_NA_COLS,
+    }, sort_keys=True)
+    digest = hashlib.sha256(file_sha256(csv_path).encode())
+    digest.update(config.encode())
+    return digest.hexdigest()[:20]
+
+
+def _write_raw_frame(df, directory):
+    """Simpan frame mentah per kolom; kolom teks disimpan sebagai kode + kategori"""
+    os.makedirs(directory, exist_ok=True)
+    columns = []
+    for idx, col in enumerate(df.columns):
+        path = os.path.join(directory, f'{idx:04d}.npy')
+        series = df[col]
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            np.save(path, series.to_numpy())
+            columns.append({'name': col, 'kind': 'numeric'})
+        else:
+            codes, categories = pd.factorize(series, use_na_sentinel=True)
+            np.save(path, codes.astype(np.int32))
+            columns.append({'name': col, 'kind': 'categorical',
+                            'categories': [str(c) for c in categories]})
+    return columns
+
+
+def _read_raw_frame(directory, columns, mmap_mode):
+    data = {}
+    for idx, spec in enumerate(columns):
+        values = np.load(os.path.join(directory, f'{idx:04d}.npy'), mmap_mode=mmap_mode)
+        if spec['kind'] == 'numeric':
+            data[spec['name']] = values
+        else:
+            categories = np.array(spec['categories'] + [np.nan], dtype=object)
+            # Kode -1 (NaN) menunjuk ke elemen terakhir
+            data[spec['name']] = categories[values]
+    return pd.DataFrame(data)
+
+
+def build_cache(csv_path, cache_dir=CACHE_DIR):
+    """
+    Fungsi untuk membangun cache dari CSV (parsing + preprocessing sekali)
+
+    Returns:
+        directory: direktori cache untuk CSV ini
+    """
+    from train_model import preprocess_data
+
+    key = cache_key(csv_path)
+    directory = os.path.join(cache_dir, key)
+    tmp_directory = directory + '.tmp'
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    os.makedirs(tmp_directory)
+
+    df = pd.read_csv(csv_path)
+    columns = _write_raw_frame(df, os.path.join(tmp_directory, 'raw'))
+
+    meta = {'key': key, 'source': os.path.abspath(csv_path), 'rows': len(df), 'columns': columns}
+    if 'SalePrice' in df.columns:
+        X_encoded, y, preprocessing_info = preprocess_data(df)
+        np.save(os.path.join(tmp_directory, 'X.npy'), X_encoded.to_numpy())
+        np.save(os.path.join(tmp_directory, 'y.npy'), y.to_numpy())
+        joblib.dump(preprocessing_info, os.path.join(tmp_directory, 'preprocessing_info.pkl'))
+        meta['encoded'] = True
+    else:
+        meta['encoded'] = False
+
+    with open(os.path.join(tmp_directory, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_directory, directory)
+    return directory
+
+
+def get_cache_dir(csv_path, cache_dir=CACHE_DIR):
+    """
+    Direktori cache yang valid untuk CSV ini (dibangun jika belum ada)
+
+    Returns:
+        directory: path direktori cache
+        hit: True jika cache sudah ada sebelumnya
+    """
+    directory = os.path.join(cache_dir, cache_key(csv_path))
+    if os.path.exists(os.path.join(directory, 'meta.json')):
+        return directory, True
+    return build_cache(csv_path, cache_dir), False
+
+
+def load_raw_frame(csv_path, cache_dir=CACHE_DIR, mmap=True):
+    """Frame mentah bertipe (setara pd.read_csv) dari cache"""
+    directory, _ = get_cache_dir(csv_path, cache_dir)
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+    return _read_raw_frame(os.path.join(directory, 'raw'), meta['columns'],
+                           'r' if mmap else None)
+
+
+def load_encoded_dataset(csv_path='train.csv', cache_dir=CACHE_DIR, mmap=True):
+    """
+    Fungsi untuk memuat hasil preprocess_data dari cache
+
+    Args:
+        csv_path: path CSV training (harus punya kolom SalePrice)
+        mmap: buka X dan y sebagai memory-map (read-only)
+
+    Returns:
+        X_encoded: DataFrame fitur (nama kolom = feature_columns)
+        y: Series target
+        preprocessing_info: dictionary preprocessing
+        hit: True jika data berasal dari cache yang sudah ada
+    """
+    directory, hit = get_cache_dir(csv_path, cache_dir)
+    mmap_mode = 'r' if mmap else None
+    preprocessing_info = joblib.load(os.path.join(directory, 'preprocessing_info.pkl'))
+    X = np.load(os.path.join(directory, 'X.npy'), mmap_mode=mmap_mode)
+    y = np.load(os.path.join(directory, 'y.npy'), mmap_mode=mmap_mode)
+    X_encoded = pd.DataFrame(X, columns=preprocessing_info['feature_columns'], copy=False)
+    return X_encoded, pd.Series(y, name='SalePrice', copy=False), preprocessing_info, hit
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:] or ['train.csv']:
+        directory, hit = get_cache_dir(path)
+        status = "sudah ada" if hit else "dibangun"
+        print(f"Cache untuk '{path}' {status}: {directory}")
@@ -0,0 +1,332 @@
+"""
+Monitoring drift distribusi input pada request yang dilayani.
+
+Saat training, train_model.py menyimpan profil referensi (drift_reference.npz)
+dari train.csv:
+    - kolom numerik: batas desil nilai training dan jumlah baris per bin
+    - kolom kategorikal: jumlah baris per level yang punya kolom one-hot
+
+Saat serving, DriftMonitor menghitung histogram yang sama untuk setiap
+baris yang di-encode. Memori tetap (satu array counter berukuran
+n_kolom x n_bin), berapa pun jumlah request. Update-nya memakai blok yang
+sudah dihitung FeatureEncoder (mask nilai kosong dan index one-hot),
+sehingga biayanya hanya beberapa operasi NumPy tervektorisasi per batch.
+
+Skor drift per kolom adalah Population Stability Index (PSI) antara
+distribusi live dan referensi (< 0.1 stabil, 0.1-0.25 sedang, > 0.25
+signifikan), dihitung hanya dari nilai yang benar-benar dikirim dan baru
+setelah kolom punya minimal MIN_OBSERVED nilai. Selain
+itu dilaporkan rasio nilai yang diimputasi (kosong atau kolom tidak
+dikirim, termasuk NA yang menjadi 'None') dan rasio kategori yang tidak
+dikenal, yang diam-diam diisi median/mode atau menjadi baris nol di one-hot.
+
+Monitor aktif otomatis di Predictor.load() jika file referensi ada
+(matikan dengan env DRIFT_MONITOR=0).
+
+Contoh:
+    python drift_monitor.py test.csv     # laporan drift sebuah CSV
+"""
+
+import argparse
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from feature_encoder import FeatureEncoder
+from metrics import stage
+
+
+DRIFT_REFERENCE_PATH = 'drift_reference.npz'
+
+# Jumlah bin histogram numerik (batas = kuantil training)
+N_BINS = 10
+
+# Ambang PSI untuk status drift
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+# Proporsi minimum agar log PSI tetap terdefinisi untuk bin kosong
+PSI_EPSILON = 1e-4
+
+# Jumlah nilai minimum (live dan referensi) agar PSI sebuah kolom dihitung
+MIN_OBSERVED = 50
+
+
+class DriftMonitor:
+    """
+    Histogram streaming per kolom input dengan memori tetap.
+
+    Layout counter:
+        numeric_counts[j]      -> N_BINS bin nilai + 1 slot imputasi
+        categorical_counts     -> per kolom: level dikenal, 1 slot kategori
+                                  tidak dikenal, 1 slot imputasi
+    """
+
+    def __init__(self, preprocessing_info, numeric_edges):
+        self.preprocessing_info = preprocessing_info
+        self.numeric_cols = list(preprocessing_info['numeric_cols'])
+        self.categorical_cols = list(preprocessing_info['categorical_cols'])
+        # Batas kuantil penuh (min..max) dan batas dalam yang dipakai untuk binning
+        self.numeric_edges = np.asarray(numeric_edges, dtype=np.float64)
+        self.inner_edges = self.numeric_edges[:, 1:-1]
+        self.n_bins = self.numeric_edges.shape[1] - 1
+
+        encoder = FeatureEncoder(preprocessing_info)
+        # Slot global untuk setiap kolom fitur one-hot dan slot khusus per kolom
+        self.feature_slot = np.full(encoder.n_features, -1, dtype=np.intp)
+        unseen_slot, imputed_slot = [], []
+        offset = 0
+        for col in self.categorical_cols:
+            levels, indices = encoder.category_maps[col]
+            self.feature_slot[indices] = offset + np.arange(len(indices))
+            unseen_slot.append(offset + len(indices))
+            imputed_slot.append(offset + len(indices) + 1)
+            offset += len(indices) + 2
+        self.unseen_slot = np.array(unseen_slot, dtype=np.intp)
+        self.imputed_slot = np.array(imputed_slot, dtype=np.intp)
+        self.numeric_offset = np.arange(len(self.numeric_cols)) * (self.n_bins + 1)
+
+        self.numeric_counts = np.zeros((len(self.numeric_cols), self.n_bins + 1), dtype=np.int64)
+        self.categorical_counts = np.zeros(offset, dtype=np.int64)
+        self.n_rows = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, X, preprocessing_info, n_bins=N_BINS):
+        """
+        Fungsi untuk membangun profil referensi dari DataFrame mentah
+
+        Args:
+            X: DataFrame training (tanpa Id dan SalePrice)
+            preprocessing_info: dictionary hasil preprocess_data
+
+        Returns:
+            monitor: DriftMonitor yang counter-nya berisi distribusi X
+        """
+        quantiles = np.linspace(0, 1, n_bins + 1)
+        edges = np.zeros((len(preprocessing_info['numeric_cols']), n_bins + 1))
+        for j, col in enumerate(preprocessing_info['numeric_cols']):
+            values = pd.to_numeric(X[col], errors='coerce').dropna().to_numpy(dtype=np.float64)
+            if len(values):
+                edges[j] = np.quantile(values, quantiles)
+        monitor = cls(preprocessing_info, edges)
+        FeatureEncoder(preprocessing_info).transform(X, observer=monitor)
+        return monitor
+
+    def observe(self, numeric, numeric_missing, columns, categorical_missing):
+        """
+        Tambahkan satu batch ke histogram (dipanggil oleh FeatureEncoder)
+
+        Args:
+            numeric: blok numerik (n_baris, n_numeric), nilai kosong sudah diimputasi
+            numeric_missing: mask nilai numerik yang diimputasi
+            columns: index kolom one-hot per kolom kategorikal, -1 jika tidak dikenal
+            categorical_missing: mask nilai kategorikal yang kosong sebelum imputasi
+        """
+        n_rows = len(numeric)
+        if n_rows == 0:
+            return
+        with stage('drift_update', rows=n_rows):
+            # Bin = jumlah batas dalam yang lebih kecil dari nilai (NaN -> slot imputasi)
+            bins = (numeric[:, :, None] > self.inner_edges[None]).sum(axis=2)
+            bins[numeric_missing] = self.n_bins
+            numeric_counts = np.bincount(
+                (bins + self.numeric_offset).ravel(), minlength=self.numeric_counts.size
+            ).reshape(self.numeric_counts.shape)
+
+            slots = np.where(columns >= 0, self.feature_slot[columns], self.unseen_slot)
+            slots[categorical_missing] = np.broadcast_to(
+                self.imputed_slot, slots.shape)[categorical_missing]
+            categorical_counts = np.bincount(slots.ravel(), minlength=self.categorical_counts.size)
+
+            with self._lock:
+                self.numeric_counts += numeric_counts
+                self.categorical_counts += categorical_counts
+                self.n_rows += n_rows
+
+    def reset(self):
+        with self._lock:
+            self.numeric_counts[:] = 0
+            self.categorical_counts[:] = 0
+            self.n_rows = 0
+
+    def merge(self, other):
+        """Gabungkan counter monitor lain (misalnya dari worker proses)"""
+        with self._lock:
+            self.numeric_counts += other.numeric_counts
+            self.categorical_counts += other.categorical_counts
+            self.n_rows += other.n_rows
+
+    def save(self, path=DRIFT_REFERENCE_PATH):
+        """Simpan batas bin dan counter sebagai .npz"""
+        with self._lock:
+            np.savez(path, numeric_edges=self.numeric_edges, numeric_counts=self.numeric_counts,
+                     categorical_counts=self.categorical_counts, n_rows=self.n_rows)
+
+    @classmethod
+    def load(cls, preprocessing_info, path=DRIFT_REFERENCE_PATH):
+        """Load profil yang disimpan dengan save()"""
+        with np.load(path) as data:
+            monitor = cls(preprocessing_info, data['numeric_edges'])
+            if data['categorical_counts'].shape != monitor.categorical_counts.shape:
+                raise ValueError(f"Profil '{path}' tidak cocok dengan preprocessing info")
+            monitor.numeric_counts[:] = data['numeric_counts']
+            monitor.categorical_counts[:] = data['categorical_counts']
+            monitor.n_rows = int(data['n_rows'])
+        return monitor
+
+    def _categorical_blocks(self, counts):
+        """Potong counter kategorikal per kolom: (level dikenal, unseen, imputasi)"""
+        start = 0
+        for col, unseen in zip(self.categorical_cols, self.unseen_slot):
+            yield col, counts[start:unseen], counts[unseen], counts[unseen + 1]
+            start = unseen + 2
+
+    def report(self, reference):
+        """
+        Fungsi untuk membandingkan distribusi live dengan referensi
+
+        Args:
+            reference: DriftMonitor berisi profil training (bin yang sama)
+
+        Returns:
+            DataFrame per kolom: column, type, psi, status, imputed_rate,
+            reference_imputed_rate, unseen_rate, median (perkiraan live) dan
+            reference_median; terurut dari PSI terbesar
+        """
+        with self._lock:
+            numeric_counts = self.numeric_counts.copy()
+            categorical_counts = self.categorical_counts.copy()
+            n_rows = self.n_rows
+        rows = []
+        for j, col in enumerate(self.numeric_cols):
+            live, ref = numeric_counts[j], reference.numeric_counts[j]
+            rows.append({
+                'column': col, 'type': 'numeric',
+                'psi': psi(live[:-1], ref[:-1]),
+                'imputed_rate': live[-1] / n_rows if n_rows else 0.0,
+                'reference_imputed_rate': ref[-1] / max(reference.n_rows, 1),
+                'unseen_rate': 0.0,
+                'median': histogram_quantile(live[:-1], self.numeric_edges[j], 0.5),
+                'reference_median': histogram_quantile(ref[:-1], self.numeric_edges[j], 0.5),
+            })
+        for (col, live, unseen, imputed), (_, ref, _, ref_imputed) in zip(
+                self._categorical_blocks(categorical_counts),
+                reference._categorical_blocks(reference.categorical_counts)):
+            observed = live.sum() + unseen
+            rows.append({
+                'column': col, 'type': 'categorical',
+                'psi': psi(live, ref),
+                'imputed_rate': imputed / n_rows if n_rows else 0.0,
+                'reference_imputed_rate': ref_imputed / max(reference.n_rows, 1),
+                'unseen_rate': unseen / observed if observed else 0.0,
+                'median': np.nan,
+                'reference_median': np.nan,
+            })
+        table = pd.DataFrame(rows)
+        table['status'] = np.select(
+            [table['psi'].isna(), table['psi'] > PSI_SIGNIFICANT, table['psi'] > PSI_MODERATE],
+            ['data kurang', 'signifikan', 'sedang'], 'stabil',
+        )
+        return table.sort_values('psi', ascending=False, na_position='last').reset_index(drop=True)
+
+    def imputed_rate(self):
+        """Rasio seluruh nilai input yang kosong dan diisi saat encoding"""
+        with self._lock:
+            imputed = (self.numeric_counts[:, -1].sum()
+                       + self.categorical_counts[self.imputed_slot].sum())
+            n_values = self.n_rows * (len(self.numeric_cols) + len(self.categorical_cols))
+        return float(imputed / n_values) if n_values else 0.0
+
+    def summary(self, reference):
+        """Ringkasan satu baris untuk ditampilkan"""
+        table = self.report(reference)
+        with self._lock:
+            n_rows = self.n_rows
+            unseen = self.categorical_counts[self.unseen_slot].sum()
+        return {
+            'rows': n_rows,
+            'max_psi': float(table['psi'].max()) if table['psi'].notna().any() else 0.0,
+            'drifted_columns': int((table['psi'] > PSI_SIGNIFICANT).sum()),
+            'imputed_rate': self.imputed_rate(),
+            'reference_imputed_rate': reference.imputed_rate(),
+            'unseen_rate': float(unseen / (n_rows * len(self.categorical_cols))) if n_rows else 0.0,
+        }
+
+
+def psi(live, reference, min_observed=MIN_OBSERVED):
+    """Population Stability Index antara dua vektor counter (NaN jika data terlalu sedikit)"""
+    live_total, reference_total = live.sum(), reference.sum()
+    if live_total < max(min_observed, 1) or reference_total < max(min_observed, 1):
+        return np.nan
+    p = np.maximum(live / live_total, PSI_EPSILON)
+    q = np.maximum(reference / reference_total, PSI_EPSILON)
+    return float(np.sum((p - q) * np.log(p / q)))
+
+
+def histogram_quantile(counts, edges, q):
+    """Perkiraan kuantil dari histogram dengan interpolasi linear di dalam bin"""
+    total = counts.sum()
+    if total == 0:
+        return np.nan
+    cumulative = np.cumsum(counts)
+    position = int(np.searchsorted(cumulative, q * total))
+    before = cumulative[position - 1] if position else 0
+    fraction = (q * total - before) / counts[position] if counts[position] else 0.0
+    return float(edges[position] + (edges[position + 1] - edges[position]) * fraction)
+
+
+def save_reference(X, preprocessing_info, path=DRIFT_REFERENCE_PATH):
+    """Bangun profil referensi dari data training dan simpan ke file"""
+    reference = DriftMonitor.from_frame(X, preprocessing_info)
+    reference.save(path)
+    return reference
+
+
+def load_monitor(preprocessing_info, path=DRIFT_REFERENCE_PATH):
+    """
+    Fungsi untuk membuat monitor kosong dengan bin profil referensi
+
+    Returns:
+        (monitor, reference), atau (None, None) jika monitoring dimatikan
+        (env DRIFT_MONITOR=0) atau file referensi belum ada/tidak cocok
+    """
+    if os.environ.get('DRIFT_MONITOR', '1') == '0' or not os.path.exists(path):
+        return None, None
+    try:
+        reference = DriftMonitor.load(preprocessing_info, path)
+    except (ValueError, KeyError, OSError):
+        return None, None
+    return DriftMonitor(preprocessing_info, reference.numeric_edges), reference
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Laporan drift input terhadap data training")
+    parser.add_argument('input', help="Path CSV input (kolom sama dengan train.csv)")
+    parser.add_argument('--preprocessing', default='preprocessing_info.pkl',
+                        help="Path preprocessing info")
+    parser.add_argument('--reference', default=DRIFT_REFERENCE_PATH, help="Path profil referensi")
+    parser.add_argument('--chunksize', type=int, default=20000, help="Baris per chunk")
+    args = parser.parse_args()
+
+    import joblib
+    preprocessing_info = joblib.load(args.preprocessing)
+    reference = DriftMonitor.load(preprocessing_info, args.reference)
+    monitor = DriftMonitor(preprocessing_info, reference.numeric_edges)
+    encoder = FeatureEncoder(preprocessing_info)
+    for chunk in pd.read_csv(args.input, chunksize=args.chunksize):
+        encoder.transform(chunk, observer=monitor)
+
+    summary = monitor.summary(reference)
+    print(f"{summary['rows']} baris, PSI maks {summary['max_psi']:.3f}, "
+          f"{summary['drifted_columns']} kolom drift signifikan, "
+          f"{summary['imputed_rate']:.2%} nilai diimputasi "
+          f"(training {summary['reference_imputed_rate']:.2%}), "
+          f"{summary['unseen_rate']:.2%} kategori tidak dikenal")
+    print(monitor.report(reference).head(15).to_string(index=False, float_format=lambda v: f'{v:,.3f}'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Harness evaluasi model: akurasi dan biaya selalu dilaporkan bersama.
+
+Satu train_test_split tidak cukup untuk melihat apakah perubahan demi
+kecepatan (pohon lebih sedikit, kedalaman lebih kecil, engine lain)
+benar-benar menurunkan akurasi. Script ini menjalankan banyak split acak
+berulang (ShuffleSplit dengan seed tetap, sehingga hasilnya reproducible)
+secara paralel:
+
+    - setiap split di-fit tepat sekali di worker proses; matriks fitur
+      dibuka worker sebagai memmap dari dataset cache (tanpa pickle)
+    - worker hanya mengembalikan prediksi baris validasi, waktu fit,
+      waktu prediksi dan ukuran model
+    - skor (RMSE, RMSE log seperti metrik Kaggle, MAE, R²) dihitung
+      sekaligus untuk semua split dari matriks (split x baris validasi)
+
+Interval kepercayaan memakai koreksi varians Nadeau-Bengio untuk split
+berulang (set training antar split saling tumpang tindih, sehingga
+standar error biasa terlalu optimis).
+
+Model final di-fit pada seluruh data untuk membuat submission Kaggle
+(Id, SalePrice) dari test.csv dengan urutan Id yang sama dengan
+sample_submission.csv. Satu baris ringkasan per run ditambahkan ke
+evaluation_report.csv agar run dengan konfigurasi berbeda bisa dibandingkan.
+
+Contoh:
+    python evaluate_model.py
+    python evaluate_model.py --splits 30 --n-estimators 50 --label pohon_50
+    python evaluate_model.py --engine flat --max-depth 10 --no-submission
+"""
+
+import argparse
+import io
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import ShuffleSplit
+
+from dataset_cache import load_encoded_dataset
+from forest_engine import FlatForest
+from inference import Predictor
+import warnings
+warnings.filterwarnings('ignore')
+
+
+# Parameter sama dengan train_model.py
+DEFAULT_PARAMS = {'n_estimators': 100, 'max_depth': 15}
+METRICS = ['rmse', 'rmse_log', 'mae', 'r2']
+REPORT_PATH = 'evaluation_report.csv'
+SUBMISSION_PATH = 'submission.csv'
+
+# Matriks fitur (memory-mapped) di setiap worker proses
+_SHARED = {}
+
+
+def _init_worker(csv_path):
+    """Buka dataset cache sebagai memmap (dibangun sekali di proses utama)"""
+    X_encoded, y, _, _ = load_encoded_dataset(csv_path)
+    _SHARED['X'] = X_encoded.to_numpy()
+    _SHARED['y'] = y.to_numpy()
+
+
+def _fit_split(split, train_idx, valid_idx, params, engine, seed):
+    """
+    Fit satu split dan kembalikan prediksi validasi beserta biayanya
+
+    Returns:
+        dict: split, predictions (urut sesuai valid_idx), fit_seconds,
+            predict_seconds, size_bytes, nodes
+    """
+    X, y = _SHARED['X'], _SHARED['y']
+    model = RandomForestRegressor(random_state=seed, n_jobs=1, **params)
+    start = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - start
+
+    buffer = io.BytesIO()
+    if engine == 'flat':
+        model = FlatForest.from_sklearn(model)
+        model.save(buffer)
+        nodes = model.node_count
+    else:
+        pickle.dump(model, buffer, protocol=pickle.HIGHEST_PROTOCOL)
+        nodes = sum(tree.tree_.node_count for tree in model.estimators_)
+
+    X_valid = np.ascontiguousarray(X[valid_idx])
+    start = time.perf_counter()
+    predictions = model.predict(X_valid)
+    predict_seconds = time.perf_counter() - start
+    return {
+        'split': split,
+        'predictions': np.asarray(predictions, dtype=np.float64),
+        'fit_seconds': fit_seconds,
+        'predict_seconds': predict_seconds,
+        'size_bytes': buffer.getbuffer().nbytes,
+        'nodes': nodes,
+    }
+
+
+def score_splits(y_true, y_pred):
+    """
+    Fungsi untuk menghitung metrik semua split sekaligus
+
+    Args:
+        y_true, y_pred: array (n_split, n_baris_validasi)
+
+    Returns:
+        scores: dict {metrik: array (n_split,)}
+    """
+    errors = y_pred - y_true
+    log_errors = np.log1p(np.clip(y_pred, 0, None)) - np.log1p(y_true)
+    total = ((y_true - y_true.mean(axis=1, keepdims=True)) ** 2).sum(axis=1)
+    return {
+        'rmse': np.sqrt((errors ** 2).mean(axis=1)),
+        'rmse_log': np.sqrt((log_errors ** 2).mean(axis=1)),
+        'mae': np.abs(errors).mean(axis=1),
+        'r2': 1.0 - (errors ** 2).sum(axis=1) / total,
+    }
+
+
+def confidence_interval(values, test_fraction, confidence=0.95):
+    """
+    Interval kepercayaan rata-rata metrik dari split berulang
+
+    Varians dikoreksi dengan faktor (1/n + n_test/n_train) (Nadeau & Bengio)
+    karena split acak berulang memakai data yang saling tumpang tindih.
+
+    Returns:
+        (mean, lower, upper)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mean = float(values.mean())
+    if len(values) < 2:
+        return mean, np.nan, np.nan
+    corrected = values.var(ddof=1) * (1.0 / len(values) + test_fraction / (1.0 - test_fraction))
+    half_width = NormalDist().inv_cdf(0.5 + confidence / 2) * np.sqrt(corrected)
+    return mean, mean - half_width, mean + half_width
+
+
+def write_submission(params, engine='sklearn', seed=42, test_path='test.csv',
+                     sample_path='sample_submission.csv', output_path=SUBMISSION_PATH):
+    """
+    Fungsi untuk fit model pada seluruh data training dan menulis submission Kaggle
+
+    Prediksi test.csv memakai Predictor (encoding yang sama dengan serving).
+    Kolom dan urutan Id mengikuti sample_submission.csv.
+
+    Returns:
+        submission: DataFrame (Id, SalePrice)
+    """
+    X_encoded, y, preprocessing_info, _ = load_encoded_dataset('train.csv')
+    model = RandomForestRegressor(random_state=seed, n_jobs=-1, **params)
+    model.fit(X_encoded.to_numpy(), y.to_numpy())
+    if engine == 'flat':
+        model = FlatForest.from_sklearn(model)
+
+    test_df = pd.read_csv(test_path)
+    predictions = Predictor(model, preprocessing_info).predict(test_df.drop(columns=['Id']))
+    submission = pd.DataFrame({'Id': test_df['Id'], 'SalePrice': predictions})
+
+    if os.path.exists(sample_path):
+        sample = pd.read_csv(sample_path)
+        if set(sample['Id']) != set(submission['Id']):
+            raise ValueError(f"Id di {test_path} tidak sama dengan Id di {sample_path}")
+        submission = sample[['Id']].merge(submission, on='Id', how='left')[list(sample.columns)]
+    submission.to_csv(output_path, index=False)
+    return submission
+
+
+def evaluate_model(params=None, n_splits=20, test_size=0.2, n_workers=None, engine='sklearn',
+                   seed=42, confidence=0.95, label=None, report_path=REPORT_PATH,
+                   submission_path=SUBMISSION_PATH):
+    """
+    Fungsi untuk mengevaluasi satu konfigurasi dengan split acak berulang
+
+    Args:
+        params: parameter RandomForestRegressor (default: sama dengan train_model.py)
+        n_splits: jumlah split acak
+        test_size: porsi data validasi per split
+        n_workers: jumlah worker proses (default: jumlah CPU)
+        engine: 'sklearn' atau 'flat' (FlatForest) untuk waktu prediksi dan ukuran
+        seed: seed split dan model (hasil sama untuk seed yang sama)
+        label: nama run di evaluation_report.csv
+        report_path: CSV ringkasan (satu baris ditambahkan per run); None untuk melewati
+        submission_path: path submission Kaggle; None untuk melewati
+
+    Returns:
+        summary: dict ringkasan (metrik + interval, waktu fit/prediksi, ukuran)
+        splits: DataFrame metrik dan biaya per split
+    """
+    params = dict(DEFAULT_PARAMS if params is None else params)
+    print("="*60)
+    print("EVALUASI MODEL DENGAN SPLIT ACAK BERULANG")
+    print("="*60)
+    start_time = time.perf_counter()
+
+    print("\n1. Memuat dataset...")
+    X_encoded, y, _, _ = load_encoded_dataset('train.csv')
+    y_values = y.to_numpy()
+    splitter = ShuffleSplit(n_splits=n_splits, test_size=test_size, random_state=seed)
+    folds = list(splitter.split(X_encoded))
+    n_valid = len(folds[0][1])
+    print(f"   {X_encoded.shape[0]} baris, {X_encoded.shape[1]} fitur; "
+          f"{n_splits} split dengan {n_valid} baris validasi")
+    print(f"   Parameter: {params}, engine: {engine}")
+
+    n_workers = min(n_workers or os.cpu_count(), n_splits)
+    print(f"\n2. Fit {n_splits} split dengan {n_workers} worker...")
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                             initargs=('train.csv',)) as executor:
+        results = list(executor.map(
+            _fit_split, range(n_splits), *zip(*folds),
+            [params] * n_splits, [engine] * n_splits, [seed] * n_splits,
+        ))
+    wall_seconds = time.perf_counter() - start_time
+
+    print("\n3. Menghitung metrik semua split sekaligus...")
+    valid_idx = np.stack([valid for _, valid in folds])
+    y_pred = np.stack([result['predictions'] for result in results])
+    scores = score_splits(y_values[valid_idx], y_pred)
+    splits = pd.DataFrame({
+        'split': np.arange(n_splits),
+        **scores,
+        'fit_seconds': [result['fit_seconds'] for result in results],
+        'predict_seconds': [result['predict_seconds'] for result in results],
+        'size_bytes': [result['size_bytes'] for result in results],
+        'nodes': [result['nodes'] for result in results],
+    })
+
+    summary = {
+        'label': label or f"{engine}:" + ",".join(f"{k}={v}" for k, v in sorted(params.items())),
+        'timestamp': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'engine': engine,
+        'params': json.dumps(params, sort_keys=True),
+        'splits': n_splits,
+        'test_size': test_size,
+        'seed': seed,
+    }
+    for metric in METRICS:
+        mean, lower, upper = confidence_interval(splits[metric], test_size, confidence)
+        summary.update({metric: mean, f'{metric}_lower': lower, f'{metric}_upper': upper,
+                        f'{metric}_std': float(splits[metric].std(ddof=1))})
+    summary.update({
+        'fit_seconds': float(splits['fit_seconds'].mean()),
+        'predict_us_per_row': float(splits['predict_seconds'].mean() / n_valid * 1e6),
+        'size_mb': float(splits['size_bytes'].mean() / 1e6),
+        'nodes': float(splits['nodes'].mean()),
+        'wall_seconds': wall_seconds,
+    })
+
+    print("\n" + "="*60)
+    print(f"HASIL ({n_splits} split, interval {confidence:.0%})")
+    print("="*60)
+    for metric in METRICS:
+        print(f"   {metric:9s} {summary[metric]:14,.4f}  "
+              f"[{summary[f'{metric}_lower']:,.4f}, {summary[f'{metric}_upper']:,.4f}]  "
+              f"std antar split {summary[f'{metric}_std']:,.4f}")
+    print(f"   Fit per split     : {summary['fit_seconds']:.2f} s")
+    print(f"   Prediksi per baris: {summary['predict_us_per_row']:.1f} µs ({engine})")
+    print(f"   Ukuran model      : {summary['size_mb']:.2f} MB, {summary['nodes']:,.0f} node")
+    print(f"   Total waktu       : {wall_seconds:.1f} s")
+
+    if report_path:
+        report = pd.DataFrame([summary])
+        report.to_csv(report_path, mode='a', index=False, header=not os.path.exists(report_path))
+        print(f"\n   Ringkasan ditambahkan ke '{report_path}'")
+
+    if submission_path:
+        print("\n4. Fit model pada seluruh data dan membuat submission...")
+        submission = write_submission(params, engine, seed, output_path=submission_path)
+        print(f"   {len(submission)} prediksi disimpan di '{submission_path}' "
+              f"(format sample_submission.csv)")
+    return summary, splits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluasi model dengan split acak berulang")
+    parser.add_argument('--splits', type=int, default=20, help="Jumlah split acak (default: 20)")
+    parser.add_argument('--test-size', type=float, default=0.2,
+                        help="Porsi data validasi per split (default: 0.2)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Jumlah worker proses (default: jumlah CPU)")
+    parser.add_argument('--engine', choices=['sklearn', 'flat'], default='sklearn',
+                        help="Engine prediksi untuk waktu prediksi dan ukuran model")
+    parser.add_argument('--seed', type=int, default=42, help="Seed split dan model (default: 42)")
+    parser.add_argument('--confidence', type=float, default=0.95,
+                        help="Tingkat kepercayaan interval (default: 0.95)")
+    parser.add_argument('--n-estimators', type=int, default=DEFAULT_PARAMS['n_estimators'])
+    parser.add_argument('--max-depth', type=int, default=DEFAULT_PARAMS['max_depth'],
+                        help="Kedalaman maksimal pohon (0 untuk tanpa batas)")
+    parser.add_argument('--max-features', default=None,
+                        help="max_features RandomForestRegressor (misalnya sqrt atau 0.5)")
+    parser.add_argument('--min-samples-leaf', type=int, default=1)
+    parser.add_argument('--params', default=None,
+                        help="Path file JSON parameter (menggantikan opsi parameter di atas)")
+    parser.add_argument('--label', default=None, help="Nama run di laporan")
+    parser.add_argument('--report', default=REPORT_PATH, help="CSV ringkasan antar run")
+    parser.add_argument('--submission', default=SUBMISSION_PATH, help="Path submission Kaggle")
+    parser.add_argument('--no-submission', action='store_true',
+                        help="Jangan fit model final dan membuat submission")
+    parser.add_argument('--splits-output', default=None,
+                        help="Simpan metrik per split ke CSV ini")
+    args = parser.parse_args()
+
+    if args.params:
+        with open(args.params) as f:
+            params = json.load(f)
+    else:
+        params = {'n_estimators': args.n_estimators,
+                  'max_depth': args.max_depth or None,
+                  'min_samples_leaf': args.min_samples_leaf}
+        if args.max_features is not None:
+            try:
+                params['max_features'] = float(args.max_features)
+            except ValueError:
+                params['max_features'] = args.max_features
+
+    _, splits = evaluate_model(params, args.splits, args.test_size, args.workers, args.engine,
+                               args.seed, args.confidence, args.label, args.report,
+                               None if args.no_submission else args.submission)
+    if args.splits_output:
+        splits.to_csv(args.splits_output, index=False)
+        print(f"   Metrik per split disimpan di '{args.splits_output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Encoder fitur terkompilasi untuk preprocessing data rumah.
+
+Encoder dibangun sekali dari `preprocessing_info` lalu dipakai ulang untuk
+setiap request: hasil imputasi dan one-hot encoding ditulis langsung ke
+matriks NumPy yang sudah dialokasikan, tanpa `pd.get_dummies` dan tanpa
+menambah kolom satu per satu.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Batas jumlah baris untuk lookup kategori memakai dict Python
+SMALL_BATCH = 64
+
+
+def category_levels(preprocessing_info):
+    """
+    Fungsi untuk membaca level kategori dari `feature_columns`
+
+    Args:
+        preprocessing_info: dictionary hasil preprocess_data
+
+    Returns:
+        levels: dict {kolom kategorikal: [(level, index kolom fitur), ...]}
+    """
+    categorical_cols = preprocessing_info['categorical_cols']
+    numeric_cols = set(preprocessing_info['numeric_cols'])
+    # Urutkan prefix dari yang terpanjang agar nama kolom yang mirip tidak tertukar
+    prefixes = sorted(categorical_cols, key=len, reverse=True)
+
+    levels = {col: [] for col in categorical_cols}
+    for idx, name in enumerate(preprocessing_info['feature_columns']):
+        if name in numeric_cols:
+            continue
+        for col in prefixes:
+            if name.startswith(col + '_'):
+                levels[col].append((name[len(col) + 1:], idx))
+                break
+    return levels
+
+
+def categorical_default(preprocessing_info, col):
+    """Nilai default untuk kolom kategorikal yang tidak ada di input"""
+    if col in preprocessing_info['categorical_modes']:
+        return preprocessing_info['categorical_modes'][col]
+    if col in preprocessing_info['categorical_na_cols']:
+        return 'None'
+    return 'Unknown'
+
+
+class FeatureEncoder:
+    """
+    Encoder yang mengubah data mentah menjadi matriks fitur model.
+
+    Semua lookup (index kolom numerik, peta kategori -> index kolom, dan
+    vektor default) dihitung sekali di konstruktor. Kategori yang tidak
+    dikenal atau kosong menghasilkan baris nol pada blok one-hot-nya,
+    sama seperti `pd.get_dummies` yang diikuti penyelarasan kolom.
+    """
+
+    def __init__(self, preprocessing_info):
+        self.preprocessing_info = preprocessing_info
+        self.feature_columns = list(preprocessing_info['feature_columns'])
+        self.numeric_cols = list(preprocessing_info['numeric_cols'])
+        self.categorical_cols = list(preprocessing_info['categorical_cols'])
+        self.n_features = len(self.feature_columns)
+
+        column_index = {name: idx for idx, name in enumerate(self.feature_columns)}
+        medians = preprocessing_info['numeric_medians']
+        na_cols = set(preprocessing_info['categorical_na_cols'])
+        modes = preprocessing_info['categorical_modes']
+
+        # Index kolom numerik di matriks fitur dan nilai imputasinya
+        self.numeric_index = np.array(
+            [column_index[col] for col in self.numeric_cols], dtype=np.intp
+        )
+        self.numeric_fill = np.array(
+            [medians.get(col, np.nan) for col in self.numeric_cols], dtype=np.float64
+        )
+
+        # Peta kategori -> index kolom fitur untuk setiap kolom kategorikal
+        self.category_maps = {}
+        for col, pairs in category_levels(preprocessing_info).items():
+            self.category_maps[col] = (
+                pd.Index([level for level, _ in pairs], dtype=object),
+                np.array([idx for _, idx in pairs], dtype=np.intp),
+            )
+
+        self.category_lookup = {
+            col: {level: position for position, level in enumerate(levels)}
+            for col, (levels, _) in self.category_maps.items()
+        }
+        self.categorical_defaults = {
+            col: categorical_default(preprocessing_info, col) for col in self.categorical_cols
+        }
+
+        # Nilai pengganti NaN untuk kolom kategorikal yang ada di input
+        self.categorical_fill = {}
+        for col in self.categorical_cols:
+            if col in na_cols:
+                self.categorical_fill[col] = 'None'
+            elif col in modes:
+                self.categorical_fill[col] = modes[col]
+
+        # Vektor default untuk kolom yang tidak ada sama sekali di input
+        self.defaults = np.zeros(self.n_features, dtype=np.float64)
+        self.defaults[self.numeric_index] = np.where(
+            np.isnan(self.numeric_fill), 0.0, self.numeric_fill
+        )
+        for col in self.categorical_cols:
+            levels, indices = self.category_maps[col]
+            position = levels.get_indexer([self.categorical_defaults[col]])[0]
+            if position >= 0:
+                self.defaults[indices[position]] = 1.0
+
+    def impute_record(self, record):
+        """
+        Fungsi untuk membuat baris input lengkap yang sudah diimputasi
+
+        Args:
+            record: dictionary input satu rumah (kolom boleh tidak lengkap)
+
+        Returns:
+            values: tuple nilai kolom numeric_cols + categorical_cols dalam
+                bentuk kanonik (float untuk numerik, str untuk kategorikal)
+        """
+        values = []
+        for col, fill, default in zip(self.numeric_cols, self.numeric_fill,
+                                      self.defaults[self.numeric_index]):
+            if col not in record:
+                values.append(float(default))
+            elif pd.isna(record[col]):
+                values.append(float(fill))
+            else:
+                values.append(float(record[col]))
+        for col in self.categorical_cols:
+            value = record.get(col)
+            if col not in record:
+                value = self.categorical_defaults[col]
+            elif pd.isna(value):
+                value = self.categorical_fill.get(col)
+            values.append(None if value is None else str(value))
+        return tuple(values)
+
+    def _encode_blocks(self, numeric, numeric_present, categorical, categorical_present, convert,
+                       observer=None, precoded=None):
+        """
+        Imputasi blok numerik (float64) dan kategorikal (object)
+
+        Args:
+            numeric: array (n_baris, n_numeric) dengan NaN untuk nilai kosong
+            numeric_present: mask kolom numerik yang ada di input
+            categorical: array object (n_baris, n_categorical)
+            categorical_present: mask kolom kategorikal yang ada di input
+            convert: mask kolom kategorikal yang nilainya perlu diubah ke str
+            observer: objek dengan method observe (misalnya DriftMonitor) yang
+                menerima blok hasil encoding beserta mask nilai kosong
+            precoded: dict {posisi kolom kategorikal: posisi level per baris}
+                untuk kolom bertipe category (lookup sudah dilakukan per kategori)
+
+        Returns:
+            numeric: blok numerik yang sudah diimputasi
+            columns: array (n_baris, n_categorical) berisi index kolom one-hot
+                yang bernilai 1, atau -1 untuk kategori kosong/tidak dikenal
+        """
+        n_rows = len(numeric)
+
+        # Blok numerik: isi NaN dengan median (kolom ada) atau default (kolom tidak ada)
+        fill = np.where(numeric_present, self.numeric_fill, self.defaults[self.numeric_index])
+        numeric_missing = np.isnan(numeric)
+        if numeric_missing.any():
+            numeric[numeric_missing] = np.broadcast_to(fill, numeric.shape)[numeric_missing]
+
+        # Blok kategorikal: isi NaN sekaligus dengan 'None'/mode/default
+        fill = np.array([
+            self.categorical_fill.get(col) if present else self.categorical_defaults[col]
+            for col, present in zip(self.categorical_cols, categorical_present)
+        ], dtype=object)
+        categorical_missing = pd.isna(categorical)
+        if categorical_missing.any():
+            categorical[categorical_missing] = np.broadcast_to(fill, categorical.shape)[categorical_missing]
+
+        columns = np.full((n_rows, len(self.categorical_cols)), -1, dtype=np.intp)
+        for j, col in enumerate(self.categorical_cols):
+            levels, indices = self.category_maps[col]
+            if len(indices) == 0:
+                continue
+            if precoded and j in precoded:
+                codes = precoded[j]
+                if categorical_missing[:, j].any():
+                    codes = np.where(categorical_missing[:, j],
+                                     self.category_lookup[col].get(fill[j], -1), codes)
+                columns[:, j] = np.where(codes >= 0, indices[codes], -1)
+                continue
+            values = categorical[:, j]
+            if convert[j]:
+                values = np.array([v if v is None or isinstance(v, str) else str(v)
+                                   for v in values], dtype=object)
+            if n_rows <= SMALL_BATCH:
+                # Untuk batch kecil lookup dict lebih cepat dari get_indexer
+                lookup = self.category_lookup[col]
+                codes = np.array([lookup.get(v, -1) for v in values], dtype=np.intp)
+            else:
+                codes = levels.get_indexer(values)
+            columns[:, j] = np.where(codes >= 0, indices[codes], -1)
+        if observer is not None:
+            observer.observe(numeric, numeric_missing, columns, categorical_missing)
+        return numeric, columns
+
+    def _assemble(self, numeric, columns, sparse=False):
+        """Gabungkan blok numerik dan index one-hot menjadi matriks fitur"""
+        if sparse:
+            return self._assemble_sparse(numeric, columns)
+        out = np.zeros((len(numeric), self.n_features), dtype=np.float64)
+        out[:, self.numeric_index] = numeric
+        rows, positions = np.nonzero(columns >= 0)
+        out[rows, columns[rows, positions]] = 1.0
+        return out
+
+    def _assemble_sparse(self, numeric, columns):
+        """
+        Matriks fitur sebagai CSR float32: hanya nilai numerik bukan nol dan
+        satu entri per kolom kategorikal yang dikenal
+
+        Dense float64 memakai 8 byte x n_fitur per baris, sedangkan CSR hanya
+        8 byte (nilai + index kolom) per entri bukan nol (~80 dari 302 fitur).
+        """
+        from scipy import sparse
+
+        n_rows = len(numeric)
+        numeric_rows, numeric_positions = np.nonzero(numeric != 0)
+        category_rows, category_positions = np.nonzero(columns >= 0)
+        rows = np.concatenate([numeric_rows, category_rows])
+        cols = np.concatenate([self.numeric_index[numeric_positions],
+                               columns[category_rows, category_positions]])
+        data = np.concatenate([numeric[numeric_rows, numeric_positions].astype(np.float32),
+                               np.ones(len(category_rows), dtype=np.float32)])
+        matrix = sparse.csr_matrix(
+            (data, (rows.astype(np.int32), cols.astype(np.int32))),
+            shape=(n_rows, self.n_features), dtype=np.float32,
+        )
+        matrix.sort_indices()
+        return matrix
+
+    def transform(self, X, sparse=False, observer=None):
+        """
+        Fungsi untuk mengubah DataFrame mentah menjadi matriks fitur
+
+        Args:
+            X: DataFrame dengan kolom asli dataset (kolom boleh tidak lengkap)
+            sparse: kembalikan scipy.sparse CSR float32 alih-alih array dense
+            observer: penerima statistik input (lihat _encode_blocks)
+
+        Returns:
+            out: np.ndarray float64 berukuran (n_baris, n_fitur), atau CSR
+                jika sparse=True
+        """
+        numeric = X.reindex(columns=self.numeric_cols).to_numpy(
+            dtype=np.float64, na_value=np.nan
+        )
+        categorical = X.reindex(columns=self.categorical_cols).to_numpy(dtype=object)
+        convert = [
+            col in X.columns and not (pd.api.types.is_string_dtype(X[col]) or X[col].dtype == object)
+            for col in self.categorical_cols
+        ]
+        # Kolom category (misalnya dari read_csv dengan hint dtype): lookup
+        # level cukup sekali per kategori unik, lalu dipetakan lewat kode
+        precoded = {}
+        for j, col in enumerate(self.categorical_cols):
+            if col in X.columns and isinstance(X[col].dtype, pd.CategoricalDtype):
+                series = X[col]
+                levels, _ = self.category_maps[col]
+                lookup = np.append(levels.get_indexer(series.cat.categories.astype(str)), -1)
+                precoded[j] = lookup[series.cat.codes.to_numpy()]
+        numeric, columns = self._encode_blocks(
+            numeric, np.array([col in X.columns for col in self.numeric_cols]),
+            categorical, [col in X.columns for col in self.categorical_cols], convert, observer,
+            precoded,
+        )
+        return self._assemble(numeric, columns, sparse)
+
+    def transform_records(self, records, sparse=False, observer=None):
+        """
+        Encode satu dictionary atau list of dictionary input
+
+        Hasilnya sama dengan transform(pd.DataFrame.from_records(records)),
+        tetapi tanpa membangun DataFrame sehingga jauh lebih cepat untuk
+        request kecil.
+        """
+        if isinstance(records, dict):
+            records = [records]
+        keys = set().union(*records) if records else set()
+        numeric = np.array(
+            [[record.get(col, np.nan) for col in self.numeric_cols] for record in records],
+            dtype=np.float64,
+        ).reshape(len(records), len(self.numeric_cols))
+        categorical = np.array(
+            [[record.get(col) for col in self.categorical_cols] for record in records],
+            dtype=object,
+        ).reshape(len(records), len(self.categorical_cols))
+        numeric, columns = self._encode_blocks(
+            numeric, np.array([col in keys for col in self.numeric_cols]),
+            categorical, [col in keys for col in self.categorical_cols],
+            [True] * len(self.categorical_cols), observer,
+        )
+        return self._assemble(numeric, columns, sparse)
+
+    def to_frame(self, X):
+        """Encode dan kembalikan sebagai DataFrame dengan nama kolom fitur"""
+        return pd.DataFrame(self.transform(X), columns=self.feature_columns, index=X.index)
@@ -0,0 +1,619 @@
+"""
+Engine inferensi Random Forest berbasis array NumPy.
+
+Semua node dari semua pohon `RandomForestRegressor` diratakan ke array
+kontigu (feature, threshold, left, right, value). Prediksi berjalan level
+demi level untuk seluruh batch dan seluruh pohon sekaligus, tanpa dispatch
+per-estimator milik scikit-learn.
+
+Cek paritas terhadap `model.predict` pada test.csv:
+    python forest_engine.py
+"""
+
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+
+
+FLAT_FOREST_PATH = 'forest_flat.npz'
+
+# Direktori varian model terkompresi (lihat compress_model.py)
+VARIANTS_DIR = 'model_variants'
+
+# Jumlah baris per blok saat prediksi, membatasi ukuran array (baris x pohon)
+ROW_BLOCK = 256
+
+# Jumlah baris matriks sparse yang di-densify sekaligus untuk FlatForest
+SPARSE_BLOCK = 4096
+
+# Jumlah baris per langkah TreeSHAP (satu baris: array leaf x fitur tetap di cache CPU)
+SHAP_ROW_BLOCK = 1
+
+# Cakupan default interval prediksi (kuantil 5% dan 95% antar pohon)
+INTERVAL_COVERAGE = 0.9
+
+
+class FlatForest:
+    """
+    Representasi forest yang sudah diratakan.
+
+    Index node bersifat global (semua pohon dalam satu array). Leaf dibuat
+    menunjuk ke dirinya sendiri sehingga penelusuran cukup diulang sebanyak
+    `max_depth` kali tanpa percabangan per baris.
+    """
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'missing_left', 'value', 'roots')
+    # Tidak ada di file lama: cover (jumlah sampel training berbobot per node) untuk TreeSHAP
+    OPTIONAL_ARRAYS = ('cover',)
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, max_depth,
+                 metadata=None, cover=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.cover = cover
+        self.max_depth = int(max_depth)
+        # Asal forest (misalnya model dan kolom fitur sumber varian), ikut disimpan
+        self.metadata = dict(metadata or {})
+        self._leaf_paths = None
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def node_count(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """
+        Fungsi untuk meratakan RandomForestRegressor yang sudah di-fit
+
+        Args:
+            model: RandomForestRegressor (single output)
+
+        Returns:
+            FlatForest
+        """
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        covers = []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            own = np.arange(offset, offset + n, dtype=np.int32)
+            is_leaf = tree.children_left < 0
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, own, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, own, tree.children_right + offset).astype(np.int32))
+            if hasattr(tree, 'missing_go_to_left'):
+                missing.append(tree.missing_go_to_left.astype(bool))
+            else:
+                missing.append(np.zeros(n, dtype=bool))
+            values.append(tree.value[:, 0, 0])
+            covers.append(tree.weighted_n_node_samples)
+            roots.append(offset)
+
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            missing_left=np.concatenate(missing),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.array(roots, dtype=np.int32),
+            max_depth=max_depth,
+            cover=np.concatenate(covers).astype(np.float64),
+        )
+
+    def node_depths(self):
+        """Kedalaman setiap node (root = 0), dihitung level demi level"""
+        depths = np.full(self.node_count, -1, dtype=np.int32)
+        frontier = self.roots
+        depth = 0
+        while len(frontier):
+            depths[frontier] = depth
+            internal = frontier[self.left[frontier] != frontier]
+            frontier = np.concatenate([self.left[internal], self.right[internal]])
+            depth += 1
+        return depths
+
+    def _compact(self, keep, roots, feature=None, threshold=None, left=None, right=None):
+        """Buang node yang tidak dipakai dan petakan ulang index anak/root"""
+        feature = self.feature if feature is None else feature
+        threshold = self.threshold if threshold is None else threshold
+        left = self.left if left is None else left
+        right = self.right if right is None else right
+        new_index = np.cumsum(keep, dtype=np.int64).astype(np.int32) - 1
+        flat_forest = FlatForest(
+            feature=feature[keep],
+            threshold=threshold[keep],
+            left=new_index[left[keep]],
+            right=new_index[right[keep]],
+            missing_left=self.missing_left[keep],
+            value=self.value[keep],
+            roots=new_index[roots],
+            max_depth=0,
+            cover=None if self.cover is None else self.cover[keep],
+        )
+        flat_forest.max_depth = int(flat_forest.node_depths().max())
+        return flat_forest
+
+    def subset(self, trees):
+        """
+        Fungsi untuk mengambil sebagian pohon
+
+        Args:
+            trees: index pohon yang dipertahankan
+
+        Returns:
+            FlatForest baru yang hanya berisi pohon tersebut
+        """
+        trees = np.asarray(trees)
+        bounds = np.append(self.roots, self.node_count)
+        keep = np.zeros(self.node_count, dtype=bool)
+        for tree in trees:
+            keep[bounds[tree]:bounds[tree + 1]] = True
+        return self._compact(keep, self.roots[trees])
+
+    def truncate(self, max_depth):
+        """
+        Fungsi untuk membatasi kedalaman semua pohon
+
+        Node pada kedalaman max_depth dijadikan leaf dengan value miliknya
+        (rata-rata target sampel training di node tersebut), lalu node di
+        bawahnya dibuang.
+        """
+        depths = self.node_depths()
+        cut = (depths == max_depth) & (self.left != np.arange(self.node_count))
+        own = np.arange(self.node_count, dtype=np.int32)
+        return self._compact(
+            (depths >= 0) & (depths <= max_depth), self.roots,
+            feature=np.where(cut, 0, self.feature).astype(np.int32),
+            threshold=np.where(cut, np.inf, self.threshold),
+            left=np.where(cut, own, self.left),
+            right=np.where(cut, own, self.right),
+        )
+
+    def arrays(self):
+        """Semua array forest yang disimpan (array opsional hanya jika ada)"""
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        arrays.update({name: getattr(self, name) for name in self.OPTIONAL_ARRAYS
+                       if getattr(self, name) is not None})
+        return arrays
+
+    def save(self, path=FLAT_FOREST_PATH):
+        np.savez(path, max_depth=self.max_depth, metadata=np.array(json.dumps(self.metadata)),
+                 **self.arrays())
+
+    @classmethod
+    def load(cls, path=FLAT_FOREST_PATH):
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in cls.ARRAYS + cls.OPTIONAL_ARRAYS
+                      if name in data.files}
+            metadata = json.loads(str(data['metadata'])) if 'metadata' in data.files else {}
+            return cls(max_depth=int(data['max_depth']), metadata=metadata, **arrays)
+
+    def apply(self, X):
+        """
+        Fungsi untuk mencari leaf setiap baris di setiap pohon
+
+        Args:
+            X: array float32 berukuran (n_baris, n_fitur)
+
+        Returns:
+            nodes: array int32 berukuran (n_baris, n_pohon) berisi index leaf
+        """
+        # Index datar ke X agar gather cukup satu operasi take
+        X = np.ascontiguousarray(X)
+        row_offsets = (np.arange(len(X)) * X.shape[1])[:, None]
+        X_flat = X.ravel()
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            x = X_flat.take(row_offsets + self.feature[nodes])
+            go_left = x <= self.threshold[nodes]
+            nan = np.isnan(x)
+            if nan.any():
+                go_left = np.where(nan, self.missing_left[nodes], go_left)
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict(self, X):
+        """
+        Fungsi untuk prediksi (rata-rata output semua pohon)
+
+        Args:
+            X: DataFrame atau array fitur yang sudah di-encode
+
+        Returns:
+            predictions: np.ndarray float64
+        """
+        # scikit-learn membandingkan fitur dalam float32
+        X = np.asarray(X, dtype=np.float32)
+        predictions = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), ROW_BLOCK):
+            block = X[start:start + ROW_BLOCK]
+            predictions[start:start + ROW_BLOCK] = self.value[self.apply(block)].mean(axis=1)
+        return predictions
+
+    def contributions(self, X):
+        """
+        Fungsi untuk atribusi jalur (path attribution) setiap fitur
+
+        Saat baris menuruni pohon, perubahan nilai node (value anak - value
+        node) diberikan ke fitur yang dipakai untuk split. Semua pohon
+        ditelusuri bersamaan per blok baris dan kontribusi dijumlahkan
+        dengan satu np.bincount per level, lalu dirata-rata antar pohon.
+        bias + kontribusi.sum(axis=1) sama dengan predict(X).
+
+        Returns:
+            bias: rata-rata value root semua pohon
+            contributions: np.ndarray float64 berukuran (n_baris, n_fitur)
+        """
+        X = np.asarray(X, dtype=np.float32)
+        n_features = X.shape[1]
+        contributions = np.empty((len(X), n_features), dtype=np.float64)
+        for start in range(0, len(X), ROW_BLOCK):
+            block = np.ascontiguousarray(X[start:start + ROW_BLOCK])
+            n_rows = len(block)
+            row_offsets = (np.arange(n_rows) * n_features)[:, None]
+            X_flat = block.ravel()
+            nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+            totals = np.zeros(n_rows * n_features, dtype=np.float64)
+            for _ in range(self.max_depth):
+                positions = row_offsets + self.feature[nodes]
+                x = X_flat.take(positions)
+                go_left = x <= self.threshold[nodes]
+                nan = np.isnan(x)
+                if nan.any():
+                    go_left = np.where(nan, self.missing_left[nodes], go_left)
+                children = np.where(go_left, self.left[nodes], self.right[nodes])
+                # Leaf menunjuk ke dirinya sendiri sehingga selisihnya nol
+                totals += np.bincount(positions.ravel(),
+                                      weights=(self.value[children] - self.value[nodes]).ravel(),
+                                      minlength=n_rows * n_features)
+                nodes = children
+            contributions[start:start + n_rows] = totals.reshape(n_rows, n_features) / self.n_trees
+        return float(self.value[self.roots].mean()), contributions
+
+    def leaf_paths(self):
+        """
+        Ringkasan jalur root -> leaf untuk TreeSHAP (dihitung sekali per forest)
+
+        Jalur dibangun level demi level untuk semua pohon sekaligus. Split
+        berulang pada fitur yang sama digabung ke satu slot: interval
+        (lower, upper], zero fraction (hasil kali rasio cover anak/induk)
+        dan apakah nilai kosong mengikuti jalur. Leaf dikelompokkan menurut
+        jumlah fitur unik di jalurnya sehingga tidak ada slot kosong.
+
+        Returns:
+            groups: list dict per jumlah fitur unik d berisi 'feature',
+                'lower', 'upper', 'zero', 'nan_ok' berukuran (d, n_leaf),
+                'value' (n_leaf,) dan 'weights' Shapley k!(d-k-1)!/d! (d,)
+        """
+        if self._leaf_paths is not None:
+            return self._leaf_paths
+        if self.cover is None:
+            raise ValueError("TreeSHAP membutuhkan cover node; ekspor ulang forest dari model "
+                             "scikit-learn (python train_model.py atau compress_model.py)")
+        width = max(self.max_depth, 1)
+        nodes = self.roots
+        state = {
+            'feature': np.full((len(nodes), width), -1, dtype=np.int32),
+            'lower': np.full((len(nodes), width), -np.inf),
+            'upper': np.full((len(nodes), width), np.inf),
+            'zero': np.ones((len(nodes), width)),
+            'nan_ok': np.ones((len(nodes), width), dtype=bool),
+        }
+        leaves = {name: [] for name in list(state) + ['node']}
+        while len(nodes):
+            is_leaf = self.left[nodes] == nodes
+            for name, array in state.items():
+                leaves[name].append(array[is_leaf])
+            leaves['node'].append(nodes[is_leaf])
+            nodes = nodes[~is_leaf]
+            state = {name: array[~is_leaf] for name, array in state.items()}
+
+            feature = self.feature[nodes]
+            match = state['feature'] == feature[:, None]
+            slot = np.where(match.any(axis=1), match.argmax(axis=1),
+                            (state['feature'] >= 0).sum(axis=1))
+            rows = np.arange(len(nodes))
+            branches = []
+            for child, go_left in ((self.left[nodes], True), (self.right[nodes], False)):
+                branch = {name: array.copy() for name, array in state.items()}
+                branch['feature'][rows, slot] = feature
+                if go_left:
+                    branch['upper'][rows, slot] = np.minimum(branch['upper'][rows, slot],
+                                                             self.threshold[nodes])
+                else:
+                    branch['lower'][rows, slot] = np.maximum(branch['lower'][rows, slot],
+                                                             self.threshold[nodes])
+                branch['zero'][rows, slot] *= self.cover[child] / self.cover[nodes]
+                branch['nan_ok'][rows, slot] &= self.missing_left[nodes] == go_left
+                branches.append((child, branch))
+            nodes = np.concatenate([child for child, _ in branches])
+            state = {name: np.concatenate([branch[name] for _, branch in branches])
+                     for name in state}
+
+        paths = {name: np.concatenate(arrays) for name, arrays in leaves.items()}
+        n_unique = (paths['feature'] >= 0).sum(axis=1)
+        groups = []
+        for d in np.unique(n_unique):
+            members = n_unique == d
+            # Slot terisi berurutan, jadi d slot pertama adalah fitur unik jalur
+            group = {name: np.ascontiguousarray(paths[name][members, :d].T)
+                     for name in ('feature', 'lower', 'upper', 'zero', 'nan_ok')}
+            group['value'] = self.value[paths['node'][members]]
+            group['weights'] = np.array([
+                math.factorial(k) * math.factorial(d - k - 1) / math.factorial(d)
+                for k in range(d)
+            ])
+            groups.append(group)
+        self._leaf_paths = groups
+        return groups
+
+    def shap_values(self, X):
+        """
+        Fungsi untuk TreeSHAP eksak (path-dependent) tanpa paket shap
+
+        Untuk setiap leaf, E[f(x) | x_S] adalah value leaf dikali one
+        fraction (x memenuhi semua split fitur di S) dan zero fraction
+        (proporsi cover) fitur di luar S. Nilai Shapley per fitur dihitung
+        dari polinomial prod(zero + one * t) yang dibagi dengan faktor fitur
+        itu sendiri (unwind pada algoritma TreeSHAP), tervektorisasi untuk
+        semua leaf dan blok baris. bias + nilai.sum(axis=1) sama dengan
+        predict(X).
+
+        Returns:
+            bias: nilai harapan forest (rata-rata berbobot cover)
+            values: np.ndarray float64 berukuran (n_baris, n_fitur)
+        """
+        X = np.asarray(X, dtype=np.float32)
+        n_features = X.shape[1]
+        groups = self.leaf_paths()
+        values = np.empty((len(X), n_features), dtype=np.float64)
+        for start in range(0, len(X), SHAP_ROW_BLOCK):
+            block = X[start:start + SHAP_ROW_BLOCK]
+            n_rows = len(block)
+            offsets = (np.arange(n_rows) * n_features)[:, None]
+            totals = np.zeros(n_rows * n_features, dtype=np.float64)
+            for group in groups:
+                # Layout (slot, baris, leaf) agar setiap langkah memproses array kontigu
+                zero, weights, d = group['zero'][:, None, :], group['weights'], len(group['zero'])
+                x = block.T[group['feature']].transpose(0, 2, 1)
+                one = np.where(np.isnan(x), group['nan_ok'][:, None, :],
+                               (x > group['lower'][:, None, :])
+                               & (x <= group['upper'][:, None, :])).astype(np.float64)
+
+                # Koefisien prod_j (zero_j + one_j * t) per baris dan leaf
+                poly = np.zeros((d + 1, n_rows, len(group['value'])))
+                poly[0] = 1.0
+                for j in range(d):
+                    poly[1:j + 2] = poly[1:j + 2] * zero[j] + poly[:j + 1] * one[j]
+                    poly[0] *= zero[j]
+
+                # one = 1: bagi dengan (zero + t) mulai dari koefisien tertinggi
+                quotient = np.broadcast_to(poly[d], one.shape)
+                weighted_one = weights[d - 1] * quotient
+                for k in range(d - 1, 0, -1):
+                    quotient = poly[k] - zero * quotient
+                    weighted_one += weights[k - 1] * quotient
+                # one = 0: faktor fitur tersebut hanya konstanta zero
+                weighted_zero = np.tensordot(weights, poly[:d], axes=1) / zero
+
+                phi = group['value'] * (one - zero) * np.where(one > 0, weighted_one, weighted_zero)
+                totals += np.bincount((group['feature'][:, None, :] + offsets).ravel(),
+                                      weights=phi.ravel(), minlength=n_rows * n_features)
+            values[start:start + n_rows] = totals.reshape(n_rows, n_features) / self.n_trees
+        bias = sum(float((group['value'] * group['zero'].prod(axis=0)).sum()) for group in groups)
+        return bias / self.n_trees, values
+
+    def predict_trees(self, X):
+        """
+        Fungsi untuk output setiap pohon dalam satu penelusuran vektor
+
+        Returns:
+            tree_predictions: np.ndarray float64 berukuran (n_baris, n_pohon)
+        """
+        X = np.asarray(X, dtype=np.float32)
+        tree_predictions = np.empty((len(X), self.n_trees), dtype=np.float64)
+        for start in range(0, len(X), ROW_BLOCK):
+            tree_predictions[start:start + ROW_BLOCK] = self.value[self.apply(X[start:start + ROW_BLOCK])]
+        return tree_predictions
+
+    def predict_interval(self, X, coverage=INTERVAL_COVERAGE):
+        """
+        Fungsi untuk prediksi beserta sebaran prediksi antar pohon
+
+        Leaf semua pohon dicari sekali per blok baris (seperti predict), lalu
+        rata-rata, standar deviasi dan kuantil dihitung dari matriks output
+        pohon tersebut. Interval ini menggambarkan ketidakpastian model
+        (variasi antar pohon), bukan noise harga jual.
+
+        Args:
+            X: array fitur yang sudah di-encode
+            coverage: proporsi pohon di dalam interval (0.9 -> kuantil 5%-95%)
+
+        Returns:
+            result: dict berisi array 'prediction', 'std', 'lower', 'upper'
+        """
+        X = np.asarray(X, dtype=np.float32)
+        quantiles = [(1 - coverage) / 2, (1 + coverage) / 2]
+        result = {name: np.empty(len(X), dtype=np.float64)
+                  for name in ('prediction', 'std', 'lower', 'upper')}
+        for start in range(0, len(X), ROW_BLOCK):
+            block = slice(start, start + ROW_BLOCK)
+            tree_predictions = self.value[self.apply(X[block])]
+            result['prediction'][block] = tree_predictions.mean(axis=1)
+            result['std'][block] = tree_predictions.std(axis=1)
+            result['lower'][block], result['upper'][block] = np.quantile(
+                tree_predictions, quantiles, axis=1
+            )
+        return result
+
+
+def check_parity(model, flat_forest, X):
+    """
+    Fungsi untuk membandingkan FlatForest dengan model.predict
+
+    Returns:
+        max_abs_diff: selisih absolut terbesar antar prediksi
+    """
+    expected = model.predict(X)
+    actual = flat_forest.predict(X)
+    return float(np.max(np.abs(expected - actual)))
+
+
+def predict_sparse(model, X):
+    """
+    Fungsi untuk prediksi dari matriks fitur scipy.sparse (CSR)
+
+    RandomForestRegressor menerima CSR langsung, kecuali baris yang berisi
+    NaN (kolom tanpa median training) yang diprediksi dalam bentuk dense
+    agar tetap memakai aturan missing value pohon. FlatForest hanya
+    menerima array dense, sehingga matriks di-densify per blok.
+
+    Returns:
+        predictions: np.ndarray sesuai urutan baris input
+    """
+    X = X.tocsr()
+    n_rows = X.shape[0]
+    if isinstance(model, FlatForest) or n_rows == 0:
+        blocks = [model.predict(X[start:start + SPARSE_BLOCK].toarray())
+                  for start in range(0, n_rows, SPARSE_BLOCK)]
+        return np.concatenate(blocks) if blocks else model.predict(X.toarray())
+
+    entry_rows = np.repeat(np.arange(n_rows), np.diff(X.indptr))
+    nan_rows = np.unique(entry_rows[np.isnan(X.data)])
+    if len(nan_rows) == 0:
+        return model.predict(X)
+    predictions = np.empty(n_rows, dtype=np.float64)
+    rows = np.setdiff1d(np.arange(n_rows), nan_rows)
+    if len(rows):
+        predictions[rows] = model.predict(X[rows])
+    predictions[nan_rows] = model.predict(X[nan_rows].toarray())
+    return predictions
+
+
+def variant_path(variant, variants_dir=VARIANTS_DIR):
+    return os.path.join(variants_dir, f'{variant}.npz')
+
+
+def feature_signature(feature_columns):
+    """Hash urutan kolom fitur (matriks fitur harus sama persis dengan saat training)"""
+    return hashlib.sha1('\n'.join(feature_columns).encode()).hexdigest()
+
+
+def variant_metadata(model_path, feature_columns):
+    """Metadata asal varian: hash file model sumber dan kolom fitur"""
+    from dataset_cache import file_sha256
+
+    return {'model_sha256': file_sha256(model_path),
+            'feature_signature': feature_signature(feature_columns)}
+
+
+def check_origin(flat_forest, label, model_path, feature_columns=None, hint=''):
+    """
+    Tolak FlatForest yang tidak dibuat dari model dan kolom fitur yang sedang dipakai
+
+    Raises:
+        ValueError: forest tanpa metadata asal, atau dibuat dari model/kolom
+            fitur lain (model sudah di-train ulang tanpa ekspor ulang)
+    """
+    metadata = flat_forest.metadata
+    if 'model_sha256' not in metadata:
+        raise ValueError(f"{label} tidak punya metadata asal model; {hint}")
+    if feature_columns is not None and \
+            metadata.get('feature_signature') != feature_signature(feature_columns):
+        raise ValueError(f"{label} dibuat dengan kolom fitur yang berbeda; {hint}")
+    if os.path.exists(model_path):
+        from dataset_cache import file_sha256
+
+        if metadata['model_sha256'] != file_sha256(model_path):
+            raise ValueError(f"{label} dibuat dari model lain, bukan '{model_path}'; {hint}")
+
+
+def check_variant(flat_forest, variant, model_path, feature_columns=None):
+    """Tolak varian yang tidak dibuat dari model dan kolom fitur yang sedang dipakai"""
+    check_origin(flat_forest, f"Varian '{variant}'", model_path, feature_columns,
+                 f"jalankan ulang `python compress_model.py --model {model_path}`")
+
+
+def load_serving_model(engine=None, model_path='model.pkl', flat_path=FLAT_FOREST_PATH,
+                       variant=None, variants_dir=VARIANTS_DIR, feature_columns=None,
+                       artifact_dir=None):
+    """
+    Fungsi untuk memuat model serving sesuai engine yang dipilih
+
+    Args:
+        engine: 'sklearn', 'flat' atau 'mmap' (default dari env INFERENCE_ENGINE)
+        variant: nama varian terkompresi di variants_dir (default dari env
+            MODEL_VARIANT); jika diisi, varian dimuat sebagai FlatForest
+            setelah dicek berasal dari model_path dan feature_columns
+        artifact_dir: direktori artifact untuk engine 'mmap' (default
+            model_artifact.ARTIFACT_DIR); FlatForest hasilnya membawa
+            preprocessing_info dari artifact
+
+    Engine 'flat' dan 'mmap' memuat forest hasil ekspor, lalu mengecek hash
+    model_path yang tercatat di metadatanya, sehingga forest dari model lain
+    ditolak alih-alih dilayani diam-diam.
+
+    Returns:
+        model dengan method predict(X)
+
+    Raises:
+        ValueError: forest/artifact tidak dibuat dari model_path
+    """
+    variant = variant or os.environ.get('MODEL_VARIANT')
+    if variant and variant != 'full':
+        flat_forest = FlatForest.load(variant_path(variant, variants_dir))
+        check_variant(flat_forest, variant, model_path, feature_columns)
+        return flat_forest
+    engine = engine or os.environ.get('INFERENCE_ENGINE', 'sklearn')
+    hint = f"ekspor ulang dari '{model_path}' dengan train_model.export_flat_forest"
+    if engine == 'flat':
+        flat_forest = FlatForest.load(flat_path)
+        check_origin(flat_forest, f"'{flat_path}'", model_path, feature_columns, hint)
+        return flat_forest
+    if engine == 'mmap':
+        from model_artifact import ARTIFACT_DIR, load_artifact
+        artifact_dir = artifact_dir or ARTIFACT_DIR
+        flat_forest = load_artifact(artifact_dir)[0]
+        # Kolom fitur artifact berasal dari preprocessing_info miliknya sendiri
+        check_origin(flat_forest, f"Artifact '{artifact_dir}'", model_path, hint=hint)
+        return flat_forest
+    if engine == 'sklearn':
+        import joblib
+        return joblib.load(model_path)
+    raise ValueError(f"Engine tidak dikenal: {engine}")
+
+
+if __name__ == "__main__":
+    import joblib
+    import pandas as pd
+    from feature_encoder import FeatureEncoder
+
+    model = joblib.load('model.pkl')
+    encoder = FeatureEncoder(joblib.load('preprocessing_info.pkl'))
+    X_test = encoder.transform(pd.read_csv('test.csv'))
+    flat_forest = FlatForest.from_sklearn(model)
+    diff = check_parity(model, flat_forest, X_test)
+    print(f"Paritas FlatForest vs model.predict pada test.csv: selisih maks {diff:.3e}")
+    if diff > 1e-6:
+        raise SystemExit("❌ Paritas gagal!")
+    print("✅ Paritas OK")
@@ -0,0 +1,130 @@
+"""
+Pipeline inferensi bersama untuk Prediksi Harga Rumah.
+
+Modul ini tidak bergantung pada Streamlit sehingga bisa diimpor oleh
+aplikasi web, JSON API, maupun job batch. Imputasi (median, mode dan
+'None') dan encoding dilakukan FeatureEncoder langsung di array NumPy per
+blok kolom, tanpa DataFrame perantara.
+
+Contoh:
+    from inference import Predictor
+    predictor = Predictor.load()
+    predictor.predict({'GrLivArea': 1710, 'Neighborhood': 'CollgCr'})
+"""
+
+import os
+
+import joblib
+import pandas as pd
+
+from feature_encoder import FeatureEncoder
+from drift_monitor import DRIFT_REFERENCE_PATH, load_monitor
+from forest_engine import (FlatForest, FLAT_FOREST_PATH, INTERVAL_COVERAGE, VARIANTS_DIR,
+                           load_serving_model, predict_sparse)
+from metrics import stage
+
+
+class Predictor:
+    """
+    Gabungan model, preprocessing info dan encoder.
+
+    Input boleh berupa satu dictionary, list of dictionary, atau DataFrame.
+    Kolom yang tidak ada diisi nilai default, nilai kosong diisi median,
+    mode atau 'None' sesuai preprocessing saat training.
+
+    Dengan sparse=True matriks fitur dibangun sebagai CSR float32 (hanya
+    untuk model scikit-learn), sehingga batch besar tidak mengalokasikan
+    matriks one-hot dense.
+
+    Jika `monitor` (DriftMonitor) diberikan, setiap baris yang di-encode
+    ikut dicatat ke histogram drift; `drift_reference` adalah profil
+    training pembandingnya.
+    """
+
+    def __init__(self, model, preprocessing_info, sparse=False, monitor=None, drift_reference=None):
+        self.model = model
+        self.preprocessing_info = preprocessing_info
+        self.monitor = monitor
+        self.drift_reference = drift_reference
+        self.sparse = sparse and not isinstance(model, FlatForest)
+        self._tree_engine = model if isinstance(model, FlatForest) else None
+        self.encoder = FeatureEncoder(preprocessing_info)
+
+    @classmethod
+    def load(cls, engine=None, model_path='model.pkl', preprocessing_path='preprocessing_info.pkl',
+             sparse=None, variant=None, flat_path=FLAT_FOREST_PATH,
+             reference_path=DRIFT_REFERENCE_PATH, variants_dir=VARIANTS_DIR, artifact_dir=None):
+        """
+        Load model (sesuai engine) dan preprocessing info dari file
+
+        sparse default dari env SPARSE_FEATURES ('1' untuk mengaktifkan),
+        variant default dari env MODEL_VARIANT (varian terkompresi di
+        variants_dir, ditolak jika dibuat dari model atau kolom fitur lain).
+        Engine 'mmap' memakai preprocessing_info yang tertanam di artifact
+        (artifact_dir), bukan preprocessing_path.
+        Monitor drift aktif jika file referensi drift ada (env DRIFT_MONITOR=0
+        untuk mematikan).
+        """
+
+        if sparse is None:
+            sparse = os.environ.get('SPARSE_FEATURES', '0') == '1'
+        with stage('load_model'):
+            preprocessing_info = joblib.load(preprocessing_path)
+            model = load_serving_model(engine, model_path=model_path, flat_path=flat_path,
+                                       variant=variant, variants_dir=variants_dir,
+                                       feature_columns=preprocessing_info['feature_columns'],
+                                       artifact_dir=artifact_dir)
+            # Artifact mmap ditulis bersama preprocessing-nya sendiri
+            preprocessing_info = getattr(model, 'preprocessing_info', preprocessing_info)
+            monitor, reference = load_monitor(preprocessing_info, reference_path)
+            return cls(model, preprocessing_info, sparse=sparse,
+                       monitor=monitor, drift_reference=reference)
+
+    def encode(self, data, observe=True):
+        """
+        Imputasi + encoding menjadi matriks fitur model
+
+        Imputasi dilakukan encoder langsung di array NumPy, sehingga tidak
+        ada DataFrame perantara.
+        observe=False untuk encoding ulang data yang sudah dicatat monitor
+        drift (misalnya saat menjelaskan prediksi).
+        """
+        observer = self.monitor if observe else None
+        with stage('encode', rows=1 if isinstance(data, dict) else len(data)):
+            if isinstance(data, pd.DataFrame):
+                return self.encoder.transform(data, sparse=self.sparse, observer=observer)
+            return self.encoder.transform_records(data, sparse=self.sparse, observer=observer)
+
+    def drift_report(self):
+        """Tabel drift per kolom sejak proses dimulai, atau None jika monitor tidak aktif"""
+        if self.monitor is None:
+            return None
+        return self.monitor.report(self.drift_reference)
+
+    @property
+    def tree_engine(self):
+        """FlatForest untuk output per pohon (dibangun sekali dari model scikit-learn)"""
+        if self._tree_engine is None:
+            self._tree_engine = FlatForest.from_sklearn(self.model)
+        return self._tree_engine
+
+    def predict_interval(self, data, coverage=INTERVAL_COVERAGE):
+        """
+        Prediksi harga beserta interval dari sebaran output antar pohon
+
+        Returns:
+            result: dict berisi array 'prediction', 'std', 'lower', 'upper'
+        """
+        X = self.encode(data)
+        if hasattr(X, 'toarray'):
+            X = X.toarray()
+        with stage('predict_interval', rows=X.shape[0]):
+            return self.tree_engine.predict_interval(X, coverage)
+
+    def predict(self, data):
+        """Prediksi harga untuk satu atau banyak rumah"""
+        X = self.encode(data)
+        with stage('predict', rows=X.shape[0]):
+            if self.sparse:
+                return predict_sparse(self.model, X)
+            return self.model.predict(X)
@@ -0,0 +1,215 @@
+"""
+Instrumentasi ringan untuk jalur prediksi.
+
+Setiap tahap (load_model, read_csv, encode, predict, to_csv, ...) dicatat
+sebagai histogram latensi dengan bucket tetap, ditambah jumlah baris yang
+diproses dan jumlah error. Event seperti cache hit/miss dicatat sebagai
+counter. Satu observasi hanya berupa perf_counter, bisect dan penambahan
+angka di bawah lock (beberapa mikrodetik), sehingga aman untuk selalu aktif.
+
+Hasil bisa dibaca sebagai ringkasan (halaman diagnostik aplikasi) atau
+format teks Prometheus. Jika env METRICS_FILE diisi, file tersebut ditulis
+ulang secara atomik paling sering setiap METRICS_FLUSH_SECONDS detik.
+
+Contoh:
+    from metrics import stage
+    with stage('predict') as timer:
+        predictions = model.predict(X)
+        timer.rows = len(predictions)
+"""
+
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Batas atas bucket latensi (detik)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf)
+
+METRICS_FILE = os.environ.get('METRICS_FILE')
+FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 10))
+PREFIX = 'house_price'
+
+
+class Histogram:
+    """Histogram latensi dengan bucket tetap (kumulatif saat diekspor)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, q):
+        """Perkiraan kuantil dengan interpolasi linear di dalam bucket"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen, lower = 0, 0.0
+        for upper, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                if math.isinf(upper):
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return lower
+
+
+class StageTimer:
+    """Objek yang dikembalikan stage(); isi `rows` untuk mencatat jumlah baris"""
+
+    __slots__ = ('rows',)
+
+    def __init__(self, rows=0):
+        self.rows = rows
+
+
+class MetricsRegistry:
+    """
+    Registry metrik per proses, aman dipakai antar thread.
+    """
+
+    def __init__(self, path=METRICS_FILE, flush_seconds=FLUSH_SECONDS):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self.started_at = time.time()
+        self.histograms = {}
+        self.rows = {}
+        self.errors = {}
+        self.events = {}
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, rows=0, error=False):
+        """Catat satu eksekusi tahap `name`"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+                self.rows[name] = 0
+                self.errors[name] = 0
+            histogram.observe(seconds)
+            self.rows[name] += rows
+            if error:
+                self.errors[name] += 1
+        self._maybe_flush()
+
+    def inc(self, event, amount=1):
+        """Tambah counter event (misalnya 'cache_hit')"""
+        with self._lock:
+            self.events[event] = self.events.get(event, 0) + amount
+        self._maybe_flush()
+
+    @contextmanager
+    def stage(self, name, rows=0):
+        """Context manager untuk mengukur satu tahap; exception dicatat sebagai error"""
+        timer = StageTimer(rows)
+        start = time.perf_counter()
+        try:
+            yield timer
+        except BaseException:
+            self.observe(name, time.perf_counter() - start, timer.rows, error=True)
+            raise
+        self.observe(name, time.perf_counter() - start, timer.rows)
+
+    def summary(self):
+        """
+        Ringkasan per tahap untuk ditampilkan
+
+        Returns:
+            rows: list dictionary (stage, calls, rows, errors, mean_ms, p50_ms, p95_ms, p99_ms)
+        """
+        with self._lock:
+            result = []
+            for name in sorted(self.histograms):
+                histogram = self.histograms[name]
+                result.append({
+                    'stage': name,
+                    'calls': histogram.count,
+                    'rows': self.rows[name],
+                    'errors': self.errors[name],
+                    'mean_ms': histogram.sum / histogram.count * 1000 if histogram.count else 0.0,
+                    'p50_ms': histogram.quantile(0.50) * 1000,
+                    'p95_ms': histogram.quantile(0.95) * 1000,
+                    'p99_ms': histogram.quantile(0.99) * 1000,
+                })
+            return result
+
+    def to_prometheus(self):
+        """Seluruh metrik dalam format teks eksposisi Prometheus"""
+        lines = []
+        with self._lock:
+            lines.append(f'# HELP {PREFIX}_stage_seconds Latensi per tahap jalur prediksi')
+            lines.append(f'# TYPE {PREFIX}_stage_seconds histogram')
+            for name in sorted(self.histograms):
+                histogram = self.histograms[name]
+                cumulative = 0
+                for upper, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if math.isinf(upper) else repr(upper)
+                    lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{name}"}} {histogram.sum!r}')
+                lines.append(f'{PREFIX}_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+
+            lines.append(f'# HELP {PREFIX}_stage_rows_total Jumlah baris yang diproses per tahap')
+            lines.append(f'# TYPE {PREFIX}_stage_rows_total counter')
+            for name in sorted(self.rows):
+                lines.append(f'{PREFIX}_stage_rows_total{{stage="{name}"}} {self.rows[name]}')
+
+            lines.append(f'# HELP {PREFIX}_stage_errors_total Jumlah error per tahap')
+            lines.append(f'# TYPE {PREFIX}_stage_errors_total counter')
+            for name in sorted(self.errors):
+                lines.append(f'{PREFIX}_stage_errors_total{{stage="{name}"}} {self.errors[name]}')
+
+            lines.append(f'# HELP {PREFIX}_events_total Counter event (cache hit/miss, dll)')
+            lines.append(f'# TYPE {PREFIX}_events_total counter')
+            for event in sorted(self.events):
+                lines.append(f'{PREFIX}_events_total{{event="{event}"}} {self.events[event]}')
+
+        lines.append(f'# TYPE {PREFIX}_process_start_time_seconds gauge')
+        lines.append(f'{PREFIX}_process_start_time_seconds {self.started_at!r}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path=None):
+        """Tulis metrik ke file teks Prometheus secara atomik"""
+        path = path or self.path
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+        return path
+
+    def _maybe_flush(self):
+        if not self.path:
+            return
+        now = time.monotonic()
+        if now - self._last_flush < self.flush_seconds:
+            return
+        self._last_flush = now
+        try:
+            self.write_prometheus()
+        except OSError:
+            pass
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.rows.clear()
+            self.errors.clear()
+            self.events.clear()
+
+
+# Registry global proses
+REGISTRY = MetricsRegistry()
+stage = REGISTRY.stage
+inc = REGISTRY.inc
@@ -0,0 +1,197 @@
+"""
+Format artifact model yang ringkas dan cepat dimuat.
+
+Artifact berupa satu direktori berisi:
+    CURRENT                  -> nama versi yang aktif
+    <versi>/forest.bin       -> buffer biner tanpa kompresi, tiap array rata 64 byte
+    <versi>/manifest.json    -> dtype, shape dan offset setiap buffer, ukuran
+                                forest.bin dan metadata asal model
+
+Array pohon dan `preprocessing_info` (JSON) disimpan sebagai buffer di
+forest.bin. Loader memakai memory-map sehingga startup hampir instan dan
+page cache OS dibagi antar proses/worker yang membuka file yang sama.
+
+Setiap penulisan membuat direktori versi baru lalu mengganti CURRENT dengan
+satu os.replace, sehingga pembaca selalu melihat forest.bin dan manifest.json
+dari versi yang sama. Versi lama yang mungkin masih di-memory-map proses
+lain disimpan sebanyak KEEP_VERSIONS.
+
+Bandingkan waktu load dan ukuran memori dengan joblib:
+    python model_artifact.py
+"""
+
+import json
+import os
+import secrets
+import shutil
+import sys
+import time
+
+import numpy as np
+
+from forest_engine import FlatForest
+
+
+ARTIFACT_DIR = 'model_artifact'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+KEEP_VERSIONS = 2
+
+
+def _to_builtin(value):
+    """Ubah tipe NumPy di preprocessing_info menjadi tipe Python biasa"""
+    if isinstance(value, dict):
+        return {k: _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def resident_memory_bytes():
+    """Ukuran resident set (RSS) proses saat ini dalam byte"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss dalam KB di Linux dan byte di macOS
+        return usage if sys.platform == 'darwin' else usage * 1024
+
+
+def current_version_dir(directory=ARTIFACT_DIR):
+    """Direktori versi artifact yang aktif (layout lama tanpa CURRENT: directory itu sendiri)"""
+    pointer = os.path.join(directory, 'CURRENT')
+    if not os.path.exists(pointer):
+        return directory
+    with open(pointer) as f:
+        return os.path.join(directory, f.read().strip())
+
+
+def _prune_versions(directory, current, keep=KEEP_VERSIONS):
+    """Hapus versi lama (dan file layout lama) selain `keep` versi terbaru"""
+    for name in ('forest.bin', 'manifest.json'):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            os.remove(path)
+    versions = sorted((name for name in os.listdir(directory)
+                       if os.path.isdir(os.path.join(directory, name)) and name != current),
+                      key=lambda name: os.path.getmtime(os.path.join(directory, name)))
+    for name in versions[:max(len(versions) - (keep - 1), 0)]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def write_artifact(flat_forest, preprocessing_info, directory=ARTIFACT_DIR):
+    """
+    Fungsi untuk menulis FlatForest dan preprocessing_info ke artifact
+
+    Args:
+        flat_forest: FlatForest hasil ekspor model
+        preprocessing_info: dictionary hasil preprocess_data
+        directory: direktori tujuan
+
+    Returns:
+        total_bytes: ukuran forest.bin
+    """
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+    target = os.path.join(directory, version)
+    os.makedirs(target)
+    info_bytes = json.dumps(_to_builtin(preprocessing_info)).encode('utf-8')
+    buffers = {name: np.ascontiguousarray(array) for name, array in flat_forest.arrays().items()}
+    buffers['preprocessing_info'] = np.frombuffer(info_bytes, dtype=np.uint8)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'max_depth': flat_forest.max_depth,
+        'metadata': flat_forest.metadata,
+        'buffers': {},
+    }
+    offset = 0
+    with open(os.path.join(target, 'forest.bin'), 'wb') as f:
+        for name, array in buffers.items():
+            padding = (-offset) % ALIGNMENT
+            f.write(b'\0' * padding)
+            offset += padding
+            manifest['buffers'][name] = {
+                'dtype': array.dtype.str,
+                'shape': list(array.shape),
+                'offset': offset,
+                'nbytes': int(array.nbytes),
+            }
+            f.write(array.tobytes())
+            offset += array.nbytes
+    manifest['bin_bytes'] = offset
+    with open(os.path.join(target, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Versi baru baru terlihat setelah pointer CURRENT diganti secara atomik
+    pointer = os.path.join(directory, 'CURRENT')
+    with open(pointer + '.tmp', 'w') as f:
+        f.write(version)
+    os.replace(pointer + '.tmp', pointer)
+    _prune_versions(directory, version)
+    return offset
+
+
+def load_artifact(directory=ARTIFACT_DIR):
+    """
+    Fungsi untuk memuat artifact dengan memory-map
+
+    Returns:
+        flat_forest: FlatForest dengan array berupa view ke file; atribut
+            preprocessing_info berisi preprocessing yang ditulis bersamanya
+        preprocessing_info: dictionary preprocessing
+        stats: dict waktu load (detik), ukuran file, dan RSS proses
+    """
+    start = time.perf_counter()
+    rss_before = resident_memory_bytes()
+    directory = current_version_dir(directory)
+    with open(os.path.join(directory, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest['format_version'] != FORMAT_VERSION:
+        raise ValueError(f"Versi artifact tidak didukung: {manifest['format_version']}")
+
+    mapped = np.memmap(os.path.join(directory, 'forest.bin'), dtype=np.uint8, mode='r')
+    if manifest.get('bin_bytes', mapped.nbytes) != mapped.nbytes:
+        raise ValueError(f"forest.bin di '{directory}' berukuran {mapped.nbytes} byte, "
+                         f"manifest mencatat {manifest['bin_bytes']} byte")
+    arrays = {}
+    for name, spec in manifest['buffers'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = spec['nbytes'] // dtype.itemsize
+        arrays[name] = np.frombuffer(
+            mapped, dtype=dtype, count=count, offset=spec['offset']
+        ).reshape(spec['shape'])
+
+    preprocessing_info = json.loads(arrays.pop('preprocessing_info').tobytes())
+    flat_forest = FlatForest(max_depth=manifest['max_depth'],
+                             metadata=manifest.get('metadata'), **arrays)
+    stats = {
+        'load_seconds': time.perf_counter() - start,
+        'artifact_bytes': int(mapped.nbytes),
+        'rss_bytes': resident_memory_bytes(),
+        'rss_delta_bytes': resident_memory_bytes() - rss_before,
+    }
+    flat_forest.load_stats = stats
+    flat_forest.preprocessing_info = preprocessing_info
+    return flat_forest, preprocessing_info, stats
+
+
+if __name__ == "__main__":
+    import joblib
+
+    rss_before = resident_memory_bytes()
+    start = time.perf_counter()
+    model = joblib.load('model.pkl')
+    joblib_seconds = time.perf_counter() - start
+    joblib_rss = resident_memory_bytes() - rss_before
+    del model
+
+    flat_forest, _, stats = load_artifact()
+    print(f"joblib.load('model.pkl')  : {joblib_seconds * 1000:8.1f} ms, "
+          f"RSS +{joblib_rss / 1e6:.1f} MB")
+    print(f"load_artifact (mmap)      : {stats['load_seconds'] * 1000:8.1f} ms, "
+          f"RSS +{stats['rss_delta_bytes'] / 1e6:.1f} MB, "
+          f"file {stats['artifact_bytes'] / 1e6:.1f} MB")
@@ -0,0 +1,465 @@
+"""
+Registry model berbasis direktori dengan hot-swap dan routing A/B.
+
+Struktur direktori (REGISTRY_DIR, default model_registry/):
+    versions/v0001/  -> model.pkl, preprocessing_info.pkl, forest_flat.npz,
+                        drift_reference.npz dan metadata.json (metrik, waktu)
+    registry.json    -> versi 'production', versi 'candidate' (opsional)
+                        dan 'candidate_share' (porsi traffic ke kandidat)
+
+Versi ditulis ke direktori sementara lalu di-rename, dan registry.json
+ditulis ulang secara atomik, sehingga pembaca tidak pernah melihat versi
+setengah jadi. train_model.py mendaftarkan setiap model baru.
+
+Di sisi serving, ModelRouter memuat versi production dan kandidat, lalu
+thread latar belakang memeriksa registry.json setiap REGISTRY_POLL_SECONDS.
+Versi baru dimuat di thread tersebut dan ditukar dengan satu assignment,
+sehingga request yang sedang berjalan tidak pernah diblok atau melihat
+campuran dua versi. Latensi dan error dicatat per versi di metrics
+(tahap 'model:<versi>') untuk perbandingan production vs kandidat.
+
+Contoh:
+    python model_registry.py list
+    python model_registry.py candidate v0003 --share 0.1
+    python model_registry.py promote v0003
+"""
+
+import argparse
+import errno
+import hashlib
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import REGISTRY as METRICS, inc, stage
+
+
+REGISTRY_DIR = os.environ.get('MODEL_REGISTRY_DIR', 'model_registry')
+POLL_SECONDS = float(os.environ.get('REGISTRY_POLL_SECONDS', 5))
+KEEP_VERSIONS = 5
+STATE_FILE = 'registry.json'
+VERSION_FILES = ('model.pkl', 'preprocessing_info.pkl', 'forest_flat.npz', 'drift_reference.npz')
+
+
+def _write_json(path, payload):
+    """Tulis JSON secara atomik (file sementara + os.replace)"""
+    with open(path + '.tmp', 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def read_state(registry_dir=REGISTRY_DIR):
+    """Isi registry.json, atau state kosong jika registry belum ada"""
+    try:
+        with open(os.path.join(registry_dir, STATE_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'production': None, 'candidate': None, 'candidate_share': 0.0}
+
+
+def write_state(state, registry_dir=REGISTRY_DIR):
+    state = dict(state, updated_at=time.time())
+    _write_json(os.path.join(registry_dir, STATE_FILE), state)
+    return state
+
+
+def version_dir(version, registry_dir=REGISTRY_DIR):
+    return os.path.join(registry_dir, 'versions', version)
+
+
+def list_versions(registry_dir=REGISTRY_DIR):
+    """
+    Fungsi untuk membaca metadata semua versi
+
+    Returns:
+        list metadata (version, created_at, metrics, ...) terurut dari versi terlama
+    """
+    root = os.path.join(registry_dir, 'versions')
+    if not os.path.isdir(root):
+        return []
+    versions = []
+    for name in sorted(os.listdir(root)):
+        try:
+            with open(os.path.join(root, name, 'metadata.json')) as f:
+                versions.append(json.load(f))
+        except (FileNotFoundError, NotADirectoryError, ValueError):
+            continue
+    return versions
+
+
+def register_model(metrics=None, params=None, files=VERSION_FILES, registry_dir=REGISTRY_DIR, role='production',
+                   candidate_share=None, source=None, keep=KEEP_VERSIONS):
+    """
+    Fungsi untuk mendaftarkan file model saat ini sebagai versi baru
+
+    Args:
+        metrics: dict metrik evaluasi (misalnya rmse, r2)
+        params: dict parameter model (disimpan di metadata.json)
+        files: file yang disalin ke versi (yang tidak ada dilewati); list
+            path, atau dict {nama di versi: path sumber} untuk model yang
+            disimpan dengan nama lain
+        role: 'production' (langsung dilayani), 'candidate' (menerima
+            candidate_share traffic) atau None (hanya disimpan)
+        source: keterangan asal model (misalnya 'train_model.py')
+        keep: jumlah versi terbaru yang dipertahankan (versi yang sedang
+            production/candidate tidak pernah dihapus)
+
+    Returns:
+        version: ID versi baru (misalnya 'v0004')
+    """
+    root = os.path.join(registry_dir, 'versions')
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=root)
+    if not isinstance(files, dict):
+        files = {os.path.basename(path): path for path in files}
+    for name, path in files.items():
+        if os.path.exists(path):
+            shutil.copy2(path, os.path.join(staging, name))
+
+    # Nomor versi berikutnya; rename gagal jika proses lain lebih dulu memakainya
+    while True:
+        existing = [int(name[1:]) for name in os.listdir(root)
+                    if name.startswith('v') and name[1:].isdigit()]
+        version = f"v{max(existing, default=0) + 1:04d}"
+        _write_json(os.path.join(staging, 'metadata.json'), {
+            'version': version,
+            'created_at': time.time(),
+            'metrics': metrics or {},
+            'params': params or {},
+            'source': source,
+            'files': sorted(os.listdir(staging)),
+        })
+        try:
+            os.rename(staging, version_dir(version, registry_dir))
+            break
+        except OSError as e:
+            # Hanya tabrakan nomor versi yang dicoba ulang
+            if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+
+    state = read_state(registry_dir)
+    if role == 'production':
+        state['production'] = version
+    elif role == 'candidate':
+        state['candidate'] = version
+        if candidate_share is not None:
+            state['candidate_share'] = candidate_share
+    write_state(state, registry_dir)
+    prune_versions(keep, registry_dir)
+    return version
+
+
+def prune_versions(keep=KEEP_VERSIONS, registry_dir=REGISTRY_DIR):
+    """Hapus versi lama selain `keep` versi terbaru dan versi yang sedang dipakai"""
+    state = read_state(registry_dir)
+    in_use = {state.get('production'), state.get('candidate')}
+    versions = [meta['version'] for meta in list_versions(registry_dir)]
+    for version in versions[:-keep] if keep else versions:
+        if version not in in_use:
+            shutil.rmtree(version_dir(version, registry_dir), ignore_errors=True)
+
+
+def set_production(version, registry_dir=REGISTRY_DIR):
+    """Jadikan versi yang ada sebagai production (kandidat yang sama dilepas)"""
+    if not os.path.isdir(version_dir(version, registry_dir)):
+        raise ValueError(f"Versi tidak ditemukan: {version}")
+    state = read_state(registry_dir)
+    state['production'] = version
+    if state.get('candidate') == version:
+        state['candidate'] = None
+    return write_state(state, registry_dir)
+
+
+def set_candidate(version, share, registry_dir=REGISTRY_DIR):
+    """Arahkan `share` (0-1) traffic ke versi kandidat; version=None untuk menghentikan"""
+    if version is not None and not os.path.isdir(version_dir(version, registry_dir)):
+        raise ValueError(f"Versi tidak ditemukan: {version}")
+    if not 0.0 <= share <= 1.0:
+        raise ValueError("share harus di antara 0 dan 1")
+    state = read_state(registry_dir)
+    state['candidate'] = version
+    state['candidate_share'] = share if version is not None else 0.0
+    return write_state(state, registry_dir)
+
+
+def registry_exists(registry_dir=REGISTRY_DIR):
+    return os.path.exists(os.path.join(registry_dir, STATE_FILE))
+
+
+def load_version(version, registry_dir=REGISTRY_DIR, engine=None, sparse=None):
+    """
+    Load Predictor untuk satu versi registry
+
+    Engine 'mmap' tidak tersedia per versi (artifact hanya untuk model utama),
+    sehingga diganti 'flat' yang memakai forest_flat.npz milik versi.
+
+    Varian MODEL_VARIANT dicari di <versi>/model_variants/ (bukan
+    model_variants/ di root), sehingga production dan kandidat masing-masing
+    melayani varian dari modelnya sendiri. Buat dengan:
+        python compress_model.py --model <versi>/model.pkl --output-dir <versi>/model_variants
+    """
+    from forest_engine import VARIANTS_DIR, variant_path
+    from inference import Predictor
+
+    directory = version_dir(version, registry_dir)
+    engine = engine or os.environ.get('INFERENCE_ENGINE', 'sklearn')
+    if engine == 'mmap':
+        engine = 'flat'
+    variants_dir = os.path.join(directory, VARIANTS_DIR)
+    variant = os.environ.get('MODEL_VARIANT') or 'full'
+    if variant != 'full' and not os.path.exists(variant_path(variant, variants_dir)):
+        raise ValueError(f"Varian '{variant}' tidak ada untuk versi {version}; buat dengan "
+                         f"`python compress_model.py --model {directory}/model.pkl "
+                         f"--output-dir {variants_dir}`")
+    return Predictor.load(engine,
+                          model_path=os.path.join(directory, 'model.pkl'),
+                          preprocessing_path=os.path.join(directory, 'preprocessing_info.pkl'),
+                          flat_path=os.path.join(directory, 'forest_flat.npz'),
+                          reference_path=os.path.join(directory, 'drift_reference.npz'),
+                          variant=variant, variants_dir=variants_dir, sparse=sparse)
+
+
+class RoutingState:
+    """Snapshot versi yang dilayani; tidak pernah diubah setelah dibuat"""
+
+    __slots__ = ('production', 'candidate', 'candidate_share', 'predictors', 'mtime')
+
+    def __init__(self, production, candidate, candidate_share, predictors, mtime):
+        self.production = production
+        self.candidate = candidate
+        self.candidate_share = candidate_share
+        self.predictors = predictors
+        self.mtime = mtime
+
+
+class ModelRouter:
+    """
+    Pemilih model per request dengan hot-swap di latar belakang.
+
+    Request hanya membaca `self._state` sekali (satu referensi ke snapshot
+    RoutingState), sehingga pertukaran versi oleh thread watcher bersifat
+    atomik dan tidak memerlukan lock di jalur prediksi.
+    """
+
+    def __init__(self, registry_dir=REGISTRY_DIR, poll_seconds=POLL_SECONDS, engine=None,
+                 watch=True):
+        self.registry_dir = registry_dir
+        self.poll_seconds = poll_seconds
+        self.engine = engine
+        self.last_error = None
+        self.swaps = 0
+        self._state = None
+        self._stop = threading.Event()
+        self.refresh()
+        if self._state is None:
+            raise FileNotFoundError(f"Registry '{registry_dir}' belum punya versi production: "
+                                    f"{self.last_error}")
+        self._thread = None
+        if watch:
+            self._thread = threading.Thread(target=self._watch, name='model-registry-watcher',
+                                            daemon=True)
+            self._thread.start()
+
+    def refresh(self):
+        """
+        Baca registry.json; jika berubah, muat versi baru lalu tukar snapshot
+
+        Returns:
+            True jika snapshot ditukar
+        """
+        path = os.path.join(self.registry_dir, STATE_FILE)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError as e:
+            self.last_error = str(e)
+            return False
+        current = self._state
+        if current is not None and current.mtime == mtime:
+            return False
+
+        state = read_state(self.registry_dir)
+        production, candidate = state.get('production'), state.get('candidate')
+        share = float(state.get('candidate_share') or 0.0) if candidate else 0.0
+        loaded = current.predictors if current is not None else {}
+        predictors = {}
+        try:
+            with stage('registry_swap'):
+                for version in (production, candidate):
+                    if version is None or version in predictors:
+                        continue
+                    # Versi yang sudah dimuat dipakai ulang, hanya versi baru yang di-load
+                    predictors[version] = loaded.get(version) or load_version(
+                        version, self.registry_dir, self.engine)
+        except Exception as e:
+            # Snapshot lama tetap dilayani; dicoba lagi pada polling berikutnya
+            self.last_error = f"{type(e).__name__}: {e}"
+            return False
+        if production not in predictors:
+            self.last_error = "registry.json tidak punya versi production"
+            return False
+
+        self._state = RoutingState(production, candidate if share > 0 else None, share,
+                                   predictors, mtime)
+        self.last_error = None
+        if current is not None:
+            self.swaps += 1
+            inc('registry_swap')
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.refresh()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def production(self):
+        """Predictor versi production saat ini"""
+        state = self._state
+        return state.predictors[state.production]
+
+    def route(self, key=None):
+        """
+        Pilih versi untuk satu request
+
+        Args:
+            key: kunci request (misalnya hash input); jika diberikan, request
+                yang sama selalu diarahkan ke versi yang sama
+
+        Returns:
+            (version, predictor)
+        """
+        state = self._state
+        if state.candidate is not None:
+            if key is None:
+                draw = random.random()
+            else:
+                draw = int(hashlib.sha1(str(key).encode()).hexdigest()[:8], 16) / 2**32
+            if draw < state.candidate_share:
+                inc(f'route:{state.candidate}')
+                return state.candidate, state.predictors[state.candidate]
+        inc(f'route:{state.production}')
+        return state.production, state.predictors[state.production]
+
+    @contextmanager
+    def track(self, version, rows=1):
+        """Ukur latensi dan error prediksi untuk satu versi (tahap 'model:<versi>')"""
+        with stage(f'model:{version}', rows=rows) as timer:
+            yield timer
+
+    def predict(self, data, key=None):
+        """
+        Prediksi dengan versi hasil route(); bisa dipakai sebagai pengganti
+        Predictor.predict
+
+        List record (misalnya satu micro-batch API) di-route per record lalu
+        setiap versi memprediksi kelompoknya dalam satu panggilan; dict dan
+        DataFrame di-route sebagai satu request.
+        """
+        if not isinstance(data, list):
+            version, predictor = self.route(key)
+            with self.track(version, rows=1 if isinstance(data, dict) else len(data)):
+                return predictor.predict(data)
+
+        import numpy as np
+
+        groups = {}
+        for position, record in enumerate(data):
+            version, predictor = self.route()
+            groups.setdefault(version, (predictor, []))[1].append(position)
+        predictions = np.empty(len(data), dtype=np.float64)
+        for version, (predictor, positions) in groups.items():
+            with self.track(version, rows=len(positions)):
+                predictions[positions] = predictor.predict([data[i] for i in positions])
+        return predictions
+
+    def compare(self):
+        """
+        Perbandingan latensi dan error per versi yang pernah melayani request
+
+        Returns:
+            list dictionary: version, role, calls, rows, errors, error_rate,
+            p50/p95/p99 (ms) serta metrik evaluasi dari metadata versi
+        """
+        state = self._state
+        metadata = {meta['version']: meta for meta in list_versions(self.registry_dir)}
+        rows = []
+        for item in METRICS.summary():
+            if not item['stage'].startswith('model:'):
+                continue
+            version = item['stage'][len('model:'):]
+            role = ('production' if version == state.production
+                    else 'candidate' if version == state.candidate else 'lama')
+            rows.append({
+                'version': version,
+                'role': role,
+                'calls': item['calls'],
+                'rows': item['rows'],
+                'errors': item['errors'],
+                'error_rate': item['errors'] / item['calls'] if item['calls'] else 0.0,
+                'p50_ms': item['p50_ms'],
+                'p95_ms': item['p95_ms'],
+                'p99_ms': item['p99_ms'],
+                **{f'eval_{name}': value
+                   for name, value in metadata.get(version, {}).get('metrics', {}).items()},
+            })
+        return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registry model prediksi harga rumah")
+    parser.add_argument('--registry', default=REGISTRY_DIR, help="Direktori registry")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help="Tampilkan semua versi dan versi yang dilayani")
+    register_parser = subparsers.add_parser('register', help="Daftarkan model.pkl saat ini")
+    register_parser.add_argument('--role', choices=['production', 'candidate', 'none'],
+                                 default='candidate')
+    register_parser.add_argument('--share', type=float, default=0.1,
+                                 help="Porsi traffic untuk kandidat (default: 0.1)")
+    promote_parser = subparsers.add_parser('promote', help="Jadikan versi sebagai production")
+    promote_parser.add_argument('version')
+    candidate_parser = subparsers.add_parser('candidate', help="Arahkan sebagian traffic ke versi")
+    candidate_parser.add_argument('version')
+    candidate_parser.add_argument('--share', type=float, default=0.1,
+                                  help="Porsi traffic untuk kandidat (default: 0.1)")
+    subparsers.add_parser('stop-candidate', help="Hentikan routing ke kandidat")
+    args = parser.parse_args()
+
+    if args.command == 'register':
+        role = None if args.role == 'none' else args.role
+        version = register_model(registry_dir=args.registry, role=role,
+                                 candidate_share=args.share, source='model_registry.py register')
+        print(f"Model didaftarkan sebagai {version} ({args.role})")
+    elif args.command == 'promote':
+        set_production(args.version, args.registry)
+        print(f"{args.version} sekarang production")
+    elif args.command == 'candidate':
+        set_candidate(args.version, args.share, args.registry)
+        print(f"{args.share:.0%} traffic diarahkan ke kandidat {args.version}")
+    elif args.command == 'stop-candidate':
+        set_candidate(None, 0.0, args.registry)
+        print("Routing ke kandidat dihentikan")
+
+    state = read_state(args.registry)
+    for meta in list_versions(args.registry):
+        role = ('production' if meta['version'] == state.get('production')
+                else f"candidate ({state.get('candidate_share', 0):.0%})"
+                if meta['version'] == state.get('candidate') else '')
+        metrics = ', '.join(f"{name}={value:,.4f}" for name, value in meta.get('metrics', {}).items())
+        created = time.strftime('%Y-%m-%d %H:%M', time.localtime(meta['created_at']))
+        print(f"{meta['version']}  {created}  {role:16s}  {metrics}")
+
+
+if __name__ == "__main__":
+    main()
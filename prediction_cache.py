@@ -0,0 +1,126 @@
+"""
+Cache hasil prediksi di dalam proses.
+
+Kunci cache adalah hash dari baris input yang sudah diimputasi lengkap
+(urutan `numeric_cols` + `categorical_cols`) ditambah fingerprint file
+model, sehingga cache otomatis tidak berlaku lagi saat `model.pkl` berubah.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import inc, stage
+
+
+DEFAULT_MAX_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 1024))
+DEFAULT_TTL_SECONDS = float(os.environ.get('PREDICTION_CACHE_TTL', 3600))
+
+MODEL_FILES = ('model.pkl', 'forest_flat.npz', 'model_artifact/manifest.json', 'preprocessing_info.pkl')
+
+
+def model_fingerprint(paths=MODEL_FILES):
+    """
+    Fungsi untuk membuat fingerprint file model dari metadata file
+
+    Cukup memanggil os.stat, sehingga murah untuk dipanggil setiap rerun.
+    File yang tidak ada dilewati. Varian model (env MODEL_VARIANT) ikut
+    dimasukkan ke fingerprint.
+    """
+    digest = hashlib.sha1()
+    variant = os.environ.get('MODEL_VARIANT')
+    if variant:
+        digest.update(f"variant:{variant};".encode())
+        paths = tuple(paths) + (os.path.join('model_variants', f'{variant}.npz'),)
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:16]
+
+
+def make_key(fingerprint, imputed_row):
+    """Buat kunci cache dari fingerprint model dan baris yang sudah diimputasi"""
+    return hashlib.sha1(repr((fingerprint, imputed_row)).encode()).hexdigest()
+
+
+class PredictionCache:
+    """
+    LRU cache dengan batas ukuran dan TTL, aman dipakai antar thread.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Ambil nilai dari cache, atau None jika tidak ada/kedaluwarsa"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                inc('cache_hit')
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+        inc('cache_miss')
+        return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+def predict_deduplicated(model, X_encoded):
+    """
+    Fungsi untuk prediksi batch dengan menghapus baris duplikat terlebih dahulu
+
+    Args:
+        model: model dengan method predict(X)
+        X_encoded: matriks fitur hasil FeatureEncoder (matriks sparse
+            diprediksi langsung tanpa deduplikasi)
+
+    Returns:
+        predictions: np.ndarray sesuai urutan baris input
+        n_unique: jumlah baris unik yang benar-benar diprediksi
+    """
+    import numpy as np
+
+    with stage('predict', rows=X_encoded.shape[0]):
+        if hasattr(X_encoded, 'tocsr'):
+            from forest_engine import predict_sparse
+            return predict_sparse(model, X_encoded), X_encoded.shape[0]
+        if len(X_encoded) < 2:
+            return model.predict(X_encoded), len(X_encoded)
+        unique_rows, inverse = np.unique(X_encoded, axis=0, return_inverse=True)
+        predictions = model.predict(unique_rows)
+        return predictions[inverse.reshape(-1)], len(unique_rows)
@@ -0,0 +1,430 @@
+"""
+Script untuk retraining inkremental (warm start) dengan data penjualan baru.
+
+Alih-alih membaca ulang seluruh train.csv dan melatih ulang 100 pohon,
+data baru di-encode lalu ditambahkan ke dataset ter-encode yang tersimpan,
+statistik imputasi diperbarui dari hitungan nilai (value counts), dan
+forest diperbesar dengan `warm_start` menggunakan data terbaru. Pohon
+terlama bisa diganti agar ukuran forest tetap. Sebagian data baru
+disisihkan sebagai holdout untuk RMSE/R² versi baru, dan profil drift serta
+feature importance dibangun ulang dari baris yang dipakai melatih. Setiap
+versi data dan model dicatat di manifest lineage.
+
+Contoh:
+    python retrain.py init
+    python retrain.py update penjualan_baru.csv --new-trees 10 --replace-oldest
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import Counter
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_squared_error, r2_score
+
+from feature_encoder import FeatureEncoder, category_levels
+from train_model import export_flat_forest, output_paths, register_trained_model
+from dataset_cache import file_sha256, load_encoded_dataset, load_raw_frame
+import warnings
+warnings.filterwarnings('ignore')
+
+
+STORE_DIR = 'training_store'
+
+
+def median_from_counts(counts):
+    """Median (sama dengan pandas) dari dict nilai -> jumlah"""
+    values = sorted(counts)
+    total = sum(counts.values())
+    if total == 0:
+        return None
+    targets = [(total - 1) // 2, total // 2]
+    result, seen = [], 0
+    for value in values:
+        seen += counts[value]
+        while targets and targets[0] < seen:
+            result.append(value)
+            targets.pop(0)
+        if not targets:
+            break
+    return float(np.mean(result))
+
+
+def mode_from_counts(counts):
+    """Mode (sama dengan pandas: nilai terkecil jika seri) dari dict nilai -> jumlah"""
+    if not counts:
+        return None
+    best = max(counts.values())
+    return min(value for value, count in counts.items() if count == best)
+
+
+class TrainingStore:
+    """
+    Dataset ter-encode yang bisa ditambah (append-only) beserta statistik
+    value counts untuk imputasi.
+
+    File:
+        X.f32        -> matriks fitur float32 (baris demi baris)
+        y.f64        -> target SalePrice
+        raw.csv      -> baris mentah dengan urutan yang sama (untuk profil drift)
+        stats.json   -> value counts kolom numerik dan kategorikal
+        lineage.json -> riwayat versi data dan model
+    """
+
+    def __init__(self, directory=STORE_DIR):
+        self.directory = directory
+        self.X_path = os.path.join(directory, 'X.f32')
+        self.y_path = os.path.join(directory, 'y.f64')
+        self.raw_path = os.path.join(directory, 'raw.csv')
+        self.stats_path = os.path.join(directory, 'stats.json')
+        self.lineage_path = os.path.join(directory, 'lineage.json')
+
+    def exists(self):
+        return os.path.exists(self.lineage_path)
+
+    def load_stats(self):
+        with open(self.stats_path) as f:
+            raw = json.load(f)
+        return {
+            'numeric': {col: Counter({float(k): v for k, v in counts.items()})
+                        for col, counts in raw['numeric'].items()},
+            'categorical': {col: Counter(counts) for col, counts in raw['categorical'].items()},
+        }
+
+    def save_stats(self, stats):
+        raw = {
+            'numeric': {col: {repr(k): v for k, v in counts.items()}
+                        for col, counts in stats['numeric'].items()},
+            'categorical': {col: dict(counts) for col, counts in stats['categorical'].items()},
+        }
+        with open(self.stats_path, 'w') as f:
+            json.dump(raw, f)
+
+    def load_lineage(self):
+        with open(self.lineage_path) as f:
+            return json.load(f)
+
+    def save_lineage(self, lineage):
+        with open(self.lineage_path, 'w') as f:
+            json.dump(lineage, f, indent=2)
+
+    def append(self, X_encoded, y):
+        """Tambahkan baris baru ke akhir file (tanpa menulis ulang data lama)"""
+        with open(self.X_path, 'ab') as f:
+            f.write(np.ascontiguousarray(X_encoded, dtype=np.float32).tobytes())
+        with open(self.y_path, 'ab') as f:
+            f.write(np.ascontiguousarray(y, dtype=np.float64).tobytes())
+
+    def append_raw(self, df):
+        """Tambahkan baris mentah ke raw.csv dengan urutan kolom file yang sudah ada"""
+        if os.path.exists(self.raw_path):
+            columns = pd.read_csv(self.raw_path, nrows=0).columns
+            df.reindex(columns=columns).to_csv(self.raw_path, mode='a', header=False, index=False)
+        else:
+            df.to_csv(self.raw_path, index=False)
+
+    def load_raw_tail(self, n_rows, total_rows):
+        """Baca n_rows baris mentah terakhir (None jika store dibuat sebelum raw.csv ada)"""
+        if not os.path.exists(self.raw_path):
+            return None
+        return pd.read_csv(self.raw_path, skiprows=range(1, total_rows - n_rows + 1))
+
+    def load_arrays(self, n_features):
+        """Buka dataset sebagai memmap (X berukuran n_baris x n_fitur)"""
+        y = np.memmap(self.y_path, dtype=np.float64, mode='r')
+        X = np.memmap(self.X_path, dtype=np.float32, mode='r', shape=(len(y), n_features))
+        return X, y
+
+
+def count_values(df, preprocessing_info):
+    """Hitung value counts (tanpa NaN) untuk setiap kolom numerik dan kategorikal"""
+    stats = {'numeric': {}, 'categorical': {}}
+    for col in preprocessing_info['numeric_cols']:
+        if col in df.columns:
+            stats['numeric'][col] = Counter(df[col].dropna().astype(float).tolist())
+    for col in preprocessing_info['categorical_cols']:
+        if col in df.columns:
+            stats['categorical'][col] = Counter(df[col].dropna().astype(str).tolist())
+    return stats
+
+
+def merge_stats(stats, new_stats):
+    for kind in ('numeric', 'categorical'):
+        for col, counts in new_stats[kind].items():
+            stats[kind].setdefault(col, Counter()).update(counts)
+    return stats
+
+
+def update_imputation(preprocessing_info, stats, new_df):
+    """
+    Perbarui numeric_medians dan categorical_modes dari value counts
+
+    Kolom yang sebelumnya sudah punya median/mode selalu diperbarui, dan
+    kolom yang baru memiliki nilai kosong di data baru ikut ditambahkan.
+    """
+    info = dict(preprocessing_info)
+    medians = dict(info['numeric_medians'])
+    modes = dict(info['categorical_modes'])
+    na_cols = set(info['categorical_na_cols'])
+
+    for col in info['numeric_cols']:
+        if col in medians or (col in new_df.columns and new_df[col].isnull().any()):
+            median = median_from_counts(stats['numeric'].get(col, {}))
+            if median is not None:
+                medians[col] = median
+    for col in info['categorical_cols']:
+        if col in na_cols:
+            continue
+        if col in modes or (col in new_df.columns and new_df[col].isnull().any()):
+            mode = mode_from_counts(stats['categorical'].get(col, {}))
+            if mode is not None:
+                modes[col] = mode
+
+    info['numeric_medians'] = medians
+    info['categorical_modes'] = modes
+    return info
+
+
+def count_unseen_categories(df, preprocessing_info):
+    """Jumlah nilai kategori di data baru yang tidak punya kolom one-hot"""
+    unseen = {}
+    for col, pairs in category_levels(preprocessing_info).items():
+        if col not in df.columns:
+            continue
+        known = {level for level, _ in pairs} | {'None'}
+        values = df[col].dropna().astype(str)
+        n_unseen = int((~values.isin(known)).sum())
+        if n_unseen:
+            unseen[col] = n_unseen
+    return unseen
+
+
+def init_store(store, train_path='train.csv', model_path='model.pkl'):
+    """
+    Fungsi untuk membuat training store dari train.csv dan model saat ini
+    """
+    print("="*60)
+    print("INISIALISASI TRAINING STORE")
+    print("="*60)
+    os.makedirs(store.directory, exist_ok=True)
+    for path in (store.X_path, store.y_path, store.raw_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    df = load_raw_frame(train_path)
+    X_encoded, y, preprocessing_info, _ = load_encoded_dataset(train_path)
+    store.append(X_encoded.to_numpy(dtype=np.float32), y.to_numpy(dtype=np.float64))
+    store.append_raw(df)
+    store.save_stats(count_values(df, preprocessing_info))
+
+    model = joblib.load(model_path)
+    store.save_lineage({'versions': [{
+        'version': 1,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'data': {
+            'source': train_path,
+            'sha256': file_sha256(train_path),
+            'rows_added': len(df),
+            'total_rows': len(df),
+        },
+        'model': {
+            'n_estimators': len(model.estimators_),
+            'trees_added': len(model.estimators_),
+            'trees_replaced': 0,
+            'sha256': file_sha256(model_path),
+        },
+    }]})
+    print(f"   {len(df)} baris dan {X_encoded.shape[1]} fitur disimpan di '{store.directory}/'")
+
+
+def incremental_retrain(store, new_path, new_trees=10, replace_oldest=False, recent_rows=0,
+                        model_path='model.pkl', preprocessing_path='preprocessing_info.pkl',
+                        register='production', candidate_share=0.1, holdout=0.2, seed=42):
+    """
+    Fungsi untuk retraining inkremental dengan data baru
+
+    Args:
+        store: TrainingStore yang sudah diinisialisasi
+        new_path: CSV berisi penjualan baru (dengan kolom SalePrice)
+        new_trees: jumlah pohon baru yang dilatih
+        replace_oldest: buang `new_trees` pohon terlama agar ukuran forest tetap
+        recent_rows: jumlah baris terakhir dari store yang ikut dipakai
+            melatih pohon baru (selain data baru)
+        holdout: proporsi data baru yang tidak dipakai melatih, untuk
+            RMSE/R² yang dicatat di lineage dan registry
+        register: peran model baru di registry model ('production',
+            'candidate' atau None); tanpa registrasi model baru tidak
+            dilayani selama registry ada
+        candidate_share: porsi traffic untuk versi candidate
+
+    Returns:
+        entry: catatan lineage untuk versi baru
+    """
+    print("="*60)
+    print("RETRAINING INKREMENTAL")
+    print("="*60)
+    start_time = time.perf_counter()
+
+    print("\n1. Memuat data baru...")
+    new_df = pd.read_csv(new_path)
+    print(f"   {len(new_df)} baris baru dari '{new_path}'")
+
+    print("\n2. Memperbarui statistik imputasi...")
+    preprocessing_info = joblib.load(preprocessing_path)
+    stats = merge_stats(store.load_stats(), count_values(new_df, preprocessing_info))
+    preprocessing_info = update_imputation(preprocessing_info, stats, new_df)
+    store.save_stats(stats)
+    unseen = count_unseen_categories(new_df, preprocessing_info)
+    for col, value in preprocessing_info['numeric_medians'].items():
+        print(f"   Median {col}: {value}")
+    if unseen:
+        print(f"   ⚠️  Kategori baru tanpa kolom one-hot (di-encode sebagai nol): {unseen}")
+
+    print("\n3. Encoding dan menambahkan data baru ke store...")
+    encoder = FeatureEncoder(preprocessing_info)
+    X_new = encoder.transform(new_df).astype(np.float32)
+    y_new = new_df['SalePrice'].to_numpy(dtype=np.float64)
+    n_old = len(store.load_arrays(encoder.n_features)[1])
+    n_recent = min(recent_rows, n_old)
+    recent_raw = store.load_raw_tail(n_recent, n_old) if n_recent else None
+    store.append(X_new, y_new)
+    store.append_raw(new_df)
+    X_all, y_all = store.load_arrays(encoder.n_features)
+    print(f"   Total data di store: {len(y_all)} baris")
+
+    # Holdout dari data baru hanya untuk evaluasi, tidak ikut melatih pohon baru
+    is_holdout = np.random.default_rng(seed).random(len(y_new)) < holdout
+    if is_holdout.all():
+        is_holdout[:] = False
+    X_fit = np.concatenate([np.asarray(X_all[n_old - n_recent:n_old]), X_new[~is_holdout]])
+    y_fit = np.concatenate([np.asarray(y_all[n_old - n_recent:n_old]), y_new[~is_holdout]])
+    fit_raw = new_df[~is_holdout]
+    if n_recent and recent_raw is not None:
+        fit_raw = pd.concat([recent_raw, fit_raw], ignore_index=True)
+    elif n_recent:
+        print("   ⚠️  Store tanpa raw.csv: profil drift hanya dari data baru "
+              "(jalankan ulang `python retrain.py init` untuk memperbaikinya)")
+
+    print(f"\n4. Melatih {new_trees} pohon baru pada {len(y_fit)} baris terbaru (warm start)...")
+    model = joblib.load(model_path)
+    trees_replaced = 0
+    if replace_oldest:
+        trees_replaced = min(new_trees, len(model.estimators_) - 1)
+        model.estimators_ = model.estimators_[trees_replaced:]
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + new_trees)
+    model.fit(pd.DataFrame(X_fit, columns=encoder.feature_columns), y_fit)
+    model.set_params(warm_start=False)
+    print(f"   Forest sekarang berisi {len(model.estimators_)} pohon "
+          f"({trees_replaced} pohon terlama diganti)")
+
+    print(f"\n5. Mengevaluasi pada {int(is_holdout.sum())} baris holdout data baru...")
+    metrics = {}
+    if is_holdout.sum() >= 2:
+        y_pred = model.predict(pd.DataFrame(X_new[is_holdout], columns=encoder.feature_columns))
+        metrics = {'rmse': float(np.sqrt(mean_squared_error(y_new[is_holdout], y_pred))),
+                   'r2': float(r2_score(y_new[is_holdout], y_pred))}
+        print(f"   - RMSE: {metrics['rmse']:.2f}")
+        print(f"   - R² Score: {metrics['r2']:.4f}")
+    else:
+        print("   ⚠️  Holdout kurang dari 2 baris, metrik tidak dihitung")
+
+    print("\n6. Menyimpan model dan preprocessor...")
+    joblib.dump(model, model_path)
+    joblib.dump(preprocessing_info, preprocessing_path)
+    flat_forest = export_flat_forest(model, preprocessing_info, model_path)
+
+    print("\n7. Membangun ulang profil drift dan feature importance dari data training...")
+    from drift_monitor import save_reference
+    from explain import save_global_importance
+    from inference import Predictor
+
+    paths = output_paths(model_path)
+    save_reference(fit_raw.drop(columns=['Id', 'SalePrice'], errors='ignore'), preprocessing_info,
+                   paths['reference'])
+    print(f"   Profil referensi drift disimpan sebagai '{paths['reference']}'")
+    save_global_importance(Predictor(flat_forest, preprocessing_info), X_fit, model,
+                           path=paths['importance'])
+    print(f"   Feature importance disimpan sebagai '{paths['importance']}'")
+
+    lineage = store.load_lineage()
+    previous = lineage['versions'][-1]
+    entry = {
+        'version': previous['version'] + 1,
+        'parent_version': previous['version'],
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'data': {
+            'source': new_path,
+            'sha256': file_sha256(new_path),
+            'rows_added': len(new_df),
+            'total_rows': int(len(y_all)),
+            'unseen_categories': unseen,
+        },
+        'model': {
+            'n_estimators': len(model.estimators_),
+            'trees_added': new_trees,
+            'trees_replaced': trees_replaced,
+            'fit_rows': int(len(y_fit)),
+            'holdout_rows': int(is_holdout.sum()),
+            'sha256': file_sha256(model_path),
+        },
+        'metrics': metrics,
+        'numeric_medians': {k: float(v) for k, v in preprocessing_info['numeric_medians'].items()},
+        'categorical_modes': preprocessing_info['categorical_modes'],
+        'seconds': time.perf_counter() - start_time,
+    }
+    if register:
+        entry['registry_version'] = register_trained_model(
+            metrics, {'n_estimators': len(model.estimators_), 'trees_added': new_trees,
+                 'trees_replaced': trees_replaced, 'fit_rows': int(len(y_fit))},
+            'retrain.py', register, candidate_share, model_path, preprocessing_path)
+    lineage['versions'].append(entry)
+    store.save_lineage(lineage)
+
+    print("\n" + "="*60)
+    print(f"RETRAINING SELESAI (versi {entry['version']}) dalam {entry['seconds']:.1f} detik!")
+    print("="*60)
+    return entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retraining inkremental model prediksi harga rumah")
+    parser.add_argument('--store', default=STORE_DIR, help="Direktori training store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    init_parser = subparsers.add_parser('init', help="Buat store dari train.csv dan model.pkl")
+    init_parser.add_argument('--train', default='train.csv')
+
+    update_parser = subparsers.add_parser('update', help="Tambah data baru dan latih pohon baru")
+    update_parser.add_argument('new_data', help="CSV penjualan baru (dengan SalePrice)")
+    update_parser.add_argument('--new-trees', type=int, default=10)
+    update_parser.add_argument('--replace-oldest', action='store_true',
+                               help="Ganti pohon terlama sehingga jumlah pohon tetap")
+    update_parser.add_argument('--recent-rows', type=int, default=0,
+                               help="Jumlah baris lama terbaru yang ikut dipakai melatih")
+    update_parser.add_argument('--holdout', type=float, default=0.2,
+                               help="Proporsi data baru untuk evaluasi (default: 0.2)")
+    update_parser.add_argument('--register', choices=['production', 'candidate', 'none'],
+                               default='production',
+                               help="Peran model baru di registry model (default: production)")
+    update_parser.add_argument('--candidate-share', type=float, default=0.1,
+                               help="Porsi traffic untuk model candidate (default: 0.1)")
+
+    args = parser.parse_args()
+    store = TrainingStore(args.store)
+    if args.command == 'init':
+        init_store(store, args.train)
+    else:
+        if not store.exists():
+            raise SystemExit("❌ Store belum ada. Jalankan: python retrain.py init")
+        incremental_retrain(store, args.new_data, args.new_trees,
+                            args.replace_oldest, args.recent_rows,
+                            register=None if args.register == 'none' else args.register,
+                            candidate_share=args.candidate_share, holdout=args.holdout)
+
+
+if __name__ == "__main__":
+    main()
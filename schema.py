@@ -0,0 +1,287 @@
+"""
+Skema input dan validasi file batch.
+
+Skema dibangun dari preprocessing_info (kolom numerik/kategorikal dan level
+yang dikenal model), data_description.txt (kode yang valid untuk setiap
+kolom) dan profil referensi drift (rentang nilai training, jika ada).
+
+Validasi bekerja per kolom sekaligus, bukan per baris:
+    - kolom numerik dikonversi dengan pd.to_numeric; nilai yang bukan angka,
+      negatif (kolom yang di training tidak pernah negatif) atau kode di luar
+      data_description.txt menjadi error
+    - kolom kategorikal diubah ke dtype category; koreksi huruf besar/kecil
+      dan spasi dilakukan pada daftar kategori (bukan pada setiap baris)
+    - nilai di luar rentang training dan level yang tidak dikenal menjadi
+      warning (tetap diprediksi)
+
+Hasilnya adalah laporan per baris (baris, kolom, nilai, tingkat, pesan);
+hanya baris dengan error yang tidak diprediksi.
+
+Contoh:
+    python schema.py test.csv
+"""
+
+import argparse
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from feature_encoder import category_levels
+
+
+DESCRIPTION_PATH = 'data_description.txt'
+
+# Nama kolom di data_description.txt yang berbeda dengan header CSV
+DESCRIPTION_ALIASES = {'Bedroom': 'BedroomAbvGr', 'Kitchen': 'KitchenAbvGr'}
+
+REPORT_COLUMNS = ['row', 'Id', 'column', 'value', 'severity', 'message']
+
+
+def parse_data_description(path=DESCRIPTION_PATH):
+    """
+    Fungsi untuk membaca kode valid setiap kolom dari data_description.txt
+
+    Returns:
+        codes: dict {kolom: [kode, ...]} (hanya kolom yang punya daftar kode;
+            kode 'NA' dilewati karena dibaca pandas sebagai nilai kosong)
+    """
+    codes, current = {}, None
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            header = re.match(r'^(\S+):\s', line)
+            if header:
+                current = DESCRIPTION_ALIASES.get(header.group(1), header.group(1))
+                continue
+            if current is None or not line.strip():
+                continue
+            code = line.strip().split('\t')[0].strip()
+            if code and code != 'NA':
+                codes.setdefault(current, []).append(code)
+    return codes
+
+
+class BatchSchema:
+    """
+    Skema kolom yang diharapkan model beserta validator tervektorisasi.
+    """
+
+    def __init__(self, preprocessing_info, description_codes=None, numeric_ranges=None):
+        """
+        Args:
+            preprocessing_info: dictionary hasil preprocess_data
+            description_codes: hasil parse_data_description (opsional)
+            numeric_ranges: dict {kolom numerik: (min, max) training} (opsional)
+        """
+        description_codes = description_codes or {}
+        self.numeric_cols = list(preprocessing_info['numeric_cols'])
+        self.categorical_cols = list(preprocessing_info['categorical_cols'])
+        self.numeric_ranges = numeric_ranges or {}
+
+        # Kode numerik terdokumentasi (misalnya MSSubClass, OverallQual)
+        self.numeric_codes = {}
+        for col in self.numeric_cols:
+            try:
+                self.numeric_codes[col] = np.array(
+                    sorted(float(code) for code in description_codes.get(col, [])))
+            except ValueError:
+                continue
+        self.numeric_codes = {col: codes for col, codes in self.numeric_codes.items() if len(codes)}
+
+        # Level yang dikenal model dan level lain yang valid menurut deskripsi
+        self.levels = {col: {level for level, _ in pairs}
+                       for col, pairs in category_levels(preprocessing_info).items()}
+        self.documented = {col: set(description_codes.get(col, [])) - self.levels[col]
+                           for col in self.categorical_cols}
+        # Bentuk kanonik (huruf kecil, tanpa spasi) -> level yang ditulis benar
+        self.canonical = {}
+        for col in self.categorical_cols:
+            lookup = {_normalize(level): level for level in self.documented[col]}
+            lookup.update({_normalize(level): level for level in self.levels[col]})
+            self.canonical[col] = lookup
+
+    @classmethod
+    def load(cls, preprocessing_path='preprocessing_info.pkl', description_path=DESCRIPTION_PATH,
+             reference_path=None):
+        """
+        Bangun skema dari file; rentang numerik diambil dari profil drift
+        (drift_reference.npz) jika ada
+        """
+        import joblib
+        from drift_monitor import DRIFT_REFERENCE_PATH
+
+        preprocessing_info = joblib.load(preprocessing_path)
+        codes = parse_data_description(description_path) if os.path.exists(description_path) else {}
+        reference_path = reference_path or DRIFT_REFERENCE_PATH
+        ranges = None
+        if os.path.exists(reference_path):
+            with np.load(reference_path) as data:
+                edges = data['numeric_edges']
+            if len(edges) == len(preprocessing_info['numeric_cols']):
+                ranges = {col: (float(lo), float(hi)) for col, lo, hi in
+                          zip(preprocessing_info['numeric_cols'], edges[:, 0], edges[:, -1])}
+        return cls(preprocessing_info, codes, ranges)
+
+    def dtypes(self, numeric=True):
+        """
+        Hint dtype untuk pd.read_csv
+
+        Kolom kategorikal dibaca langsung sebagai category (jauh lebih hemat
+        memori dan di-encode lewat kode kategori). numeric=False tidak
+        memberi hint float64 sehingga nilai yang bukan angka tidak
+        menggagalkan pembacaan (dipakai saat membaca per chunk).
+        """
+        dtypes = {col: 'category' for col in self.categorical_cols}
+        if numeric:
+            dtypes.update({col: 'float64' for col in self.numeric_cols})
+        return dtypes
+
+    def read_csv(self, source, **kwargs):
+        """
+        Baca CSV dengan hint dtype; jika ada kolom numerik yang tidak bisa
+        di-parse, baca ulang tanpa hint numerik dan serahkan ke validate()
+        """
+        try:
+            return pd.read_csv(source, dtype=self.dtypes(), **kwargs)
+        except ValueError:
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            return pd.read_csv(source, dtype=self.dtypes(numeric=False), **kwargs)
+
+    def validate(self, df, start_row=0):
+        """
+        Fungsi untuk memeriksa dan mengoreksi seluruh kolom sekaligus
+
+        Args:
+            df: DataFrame mentah (hasil read_csv)
+            start_row: nomor baris data pertama (untuk file yang dibaca per chunk)
+
+        Returns:
+            clean: DataFrame dengan kolom numerik float64 dan kolom kategorikal
+                category (nilai error menjadi NaN)
+            report: DataFrame REPORT_COLUMNS, satu baris per masalah; `row`
+                adalah nomor baris data (0-based), NaN untuk masalah kolom
+            valid: array bool, True untuk baris tanpa error
+        """
+        clean = df.copy()
+        issues = []
+        valid = np.ones(len(df), dtype=bool)
+        ids = df['Id'].to_numpy() if 'Id' in df.columns else None
+
+        def add(mask, col, values, severity, message):
+            rows = np.flatnonzero(mask)
+            if len(rows) == 0:
+                return
+            if severity == 'error':
+                valid[rows] = False
+            issues.append(pd.DataFrame({
+                'row': rows + start_row,
+                'Id': ids[rows] if ids is not None else np.nan,
+                'column': col,
+                'value': np.asarray(values, dtype=object)[rows].astype(str),
+                'severity': severity,
+                'message': message,
+            }))
+
+        missing_cols = [col for col in self.numeric_cols + self.categorical_cols
+                        if col not in df.columns]
+        # Masalah tingkat kolom cukup dilaporkan sekali (chunk pertama)
+        if missing_cols and start_row == 0:
+            issues.append(pd.DataFrame({
+                'row': np.nan, 'Id': np.nan, 'column': missing_cols, 'value': None,
+                'severity': 'warning', 'message': 'kolom tidak ada, diisi nilai default training',
+            }))
+
+        for col in self.numeric_cols:
+            if col not in df.columns:
+                continue
+            raw = df[col]
+            values = raw if pd.api.types.is_numeric_dtype(raw) else pd.to_numeric(
+                raw.astype(str).str.strip().str.replace(',', '', regex=False), errors='coerce')
+            values = values.astype(np.float64)
+            array = values.to_numpy()
+            present = raw.notna().to_numpy()
+            add(present & np.isnan(array), col, raw, 'error', 'nilai bukan angka')
+
+            lower, upper = self.numeric_ranges.get(col, (np.nan, np.nan))
+            if lower >= 0:
+                negative = array < 0
+                add(negative, col, raw, 'error', 'nilai negatif')
+                array = np.where(negative, np.nan, array)
+            if col in self.numeric_codes:
+                codes = self.numeric_codes[col]
+                position = np.clip(np.searchsorted(codes, array), 0, len(codes) - 1)
+                invalid = ~np.isnan(array) & (codes[position] != array)
+                add(invalid, col, raw, 'error', 'kode tidak ada di data_description.txt')
+                array = np.where(invalid, np.nan, array)
+            elif not np.isnan(upper):
+                add((array < lower) | (array > upper), col, raw, 'warning',
+                    f'di luar rentang training [{lower:g}, {upper:g}]')
+            clean[col] = array
+
+        for col in self.categorical_cols:
+            if col not in df.columns:
+                continue
+            values = df[col]
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype('category')
+            # Koreksi dan klasifikasi dilakukan sekali per kategori unik
+            categories = values.cat.categories
+            names = [str(c) for c in categories]
+            corrected = [self.canonical[col].get(_normalize(name), name) for name in names]
+            status = np.array([
+                0 if name in self.levels[col] else 1 if name in self.documented[col] else 2
+                for name in corrected
+            ] + [0], dtype=np.int8)
+            row_status = status[values.cat.codes.to_numpy()]
+            add(row_status == 1, col, values, 'warning',
+                'level valid tetapi tidak ada di data training')
+            add(row_status == 2, col, values, 'warning', 'kategori tidak dikenal')
+            codes = pd.Index(pd.unique(np.array(corrected, dtype=object)))
+            clean[col] = pd.Categorical.from_codes(
+                np.append(codes.get_indexer(corrected), -1)[values.cat.codes.to_numpy()],
+                categories=codes,
+            )
+
+        report = (pd.concat(issues, ignore_index=True) if issues
+                  else pd.DataFrame(columns=REPORT_COLUMNS))
+        report['row'] = report['row'].astype('Int64')
+        if ids is not None and pd.api.types.is_integer_dtype(df['Id']):
+            report['Id'] = report['Id'].astype('Int64')
+        return clean, report, valid
+
+
+def _normalize(value):
+    return re.sub(r'\s+', '', str(value)).lower()
+
+
+def summarize_report(report):
+    """Jumlah masalah per kolom, tingkat dan pesan"""
+    if report.empty:
+        return pd.DataFrame(columns=['column', 'severity', 'message', 'rows'])
+    return (report.groupby(['column', 'severity', 'message'], sort=False).size()
+            .rename('rows').reset_index().sort_values('rows', ascending=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validasi file CSV terhadap skema model")
+    parser.add_argument('input', help="Path CSV input")
+    parser.add_argument('--preprocessing', default='preprocessing_info.pkl',
+                        help="Path preprocessing info")
+    parser.add_argument('--report', default=None, help="Simpan laporan per baris ke CSV ini")
+    args = parser.parse_args()
+
+    schema = BatchSchema.load(args.preprocessing)
+    df = schema.read_csv(args.input)
+    _, report, valid = schema.validate(df)
+    print(f"{len(df)} baris: {int(valid.sum())} valid, {int((~valid).sum())} dengan error, "
+          f"{int((report['severity'] == 'warning').sum())} warning")
+    print(summarize_report(report).head(20).to_string(index=False))
+    if args.report:
+        report.to_csv(args.report, index=False)
+        print(f"Laporan per baris disimpan di '{args.report}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+Script untuk prediksi batch paralel multi-proses pada file CSV besar.
+
+File input dibagi menjadi shard berisi jumlah baris tetap (berdasarkan
+offset byte, satu kali scan baris baru), lalu setiap shard dibaca,
+di-encode dan diprediksi oleh worker proses. Baris baru di dalam nilai
+ber-kutip tidak dianggap akhir baris, sehingga shard tidak pernah memotong
+satu record. Setiap worker memuat model sekali (default engine 'mmap',
+sehingga array pohon dibagi lewat page cache OS; 'sklearn' jika --model
+atau --preprocessing diberikan, karena artifact mmap membawa model dan
+preprocessing-nya sendiri). Hasil per shard ditulis ke direktori kerja
+secara atomik dan digabung sesuai urutan input di akhir, jadi proses yang
+terhenti bisa dilanjutkan dengan perintah yang sama (shard yang sudah
+selesai dilewati).
+
+Seperti aplikasi, jika registry model ada dan --model tidak diberikan,
+semua worker memakai versi production registry saat job dimulai (engine
+'mmap' diganti 'flat' milik versi tersebut). Resume hanya memakai shard
+dari versi registry dan file model (sha256) yang sama.
+
+Contoh:
+    python sharded_predict.py market.csv predictions.csv --workers 8
+    python sharded_predict.py market.csv predictions.csv --shard-rows 200000 --engine sklearn
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from inference import Predictor
+from prediction_cache import predict_deduplicated
+import warnings
+warnings.filterwarnings('ignore')
+
+
+DEFAULT_SHARD_ROWS = 100000
+SCAN_BLOCK = 1 << 22
+
+# Predictor milik setiap worker proses (dimuat sekali di initializer)
+_WORKER = {}
+
+
+def input_fingerprint(path):
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def record_ends(f, block_size=SCAN_BLOCK):
+    """
+    Offset byte akhir setiap record CSV dari posisi f saat ini sampai akhir file
+
+    Baris baru di dalam nilai ber-kutip tidak dianggap akhir record. Record
+    terakhir tanpa newline di akhir file berakhir di offset akhir file.
+
+    Raises:
+        ValueError: tanda kutip tidak tertutup sampai akhir file
+    """
+    offset = f.tell()
+    tail = b''
+    # Jumlah tanda kutip ganjil berarti baris baru berada di dalam nilai ber-kutip
+    # ("" di dalam nilai terhitung dua, jadi paritasnya tetap benar)
+    in_quotes = False
+    while True:
+        block = f.read(block_size)
+        if not block:
+            break
+        tail = block[-1:]
+        position = 0
+        while True:
+            newline = block.find(b'\n', position)
+            if newline < 0:
+                in_quotes ^= block.count(b'"', position) % 2 == 1
+                break
+            in_quotes ^= block.count(b'"', position, newline) % 2 == 1
+            position = newline + 1
+            if not in_quotes:
+                yield offset + position
+        offset += len(block)
+    if in_quotes:
+        raise ValueError(f"Tanda kutip di '{f.name}' tidak tertutup sampai akhir file")
+    # Baris terakhir tanpa newline di akhir file
+    if tail and tail != b'\n':
+        yield offset
+
+
+def count_records(path):
+    """Jumlah baris data CSV (tanpa header), baris baru di dalam nilai ber-kutip tidak dihitung"""
+    with open(path, 'rb') as f:
+        f.readline()
+        return sum(1 for _ in record_ends(f))
+
+
+def plan_shards(input_path, shard_rows=DEFAULT_SHARD_ROWS):
+    """
+    Fungsi untuk membagi CSV menjadi shard berdasarkan offset byte
+
+    Args:
+        input_path: path CSV input (baris pertama header)
+        shard_rows: jumlah baris data per shard
+
+    Returns:
+        plan: dict berisi fingerprint input, panjang header dan daftar shard
+            {'start', 'end' (offset byte), 'row_start', 'rows'}
+    """
+    shards = []
+    with open(input_path, 'rb') as f:
+        header = f.readline()
+        shard_start = end = f.tell()
+        row_start = rows_in_shard = 0
+        for end in record_ends(f):
+            rows_in_shard += 1
+            if rows_in_shard == shard_rows:
+                shards.append({'start': shard_start, 'end': end,
+                               'row_start': row_start, 'rows': rows_in_shard})
+                shard_start, row_start, rows_in_shard = end, row_start + rows_in_shard, 0
+        if rows_in_shard:
+            shards.append({'start': shard_start, 'end': end,
+                           'row_start': row_start, 'rows': rows_in_shard})
+
+    return {
+        'input': input_fingerprint(input_path),
+        'shard_rows': shard_rows,
+        'header_bytes': len(header),
+        'shards': shards,
+    }
+
+
+def shard_path(work_dir, index):
+    return os.path.join(work_dir, f'shard_{index:05d}.csv')
+
+
+def resolve_version(model_path=None):
+    """Versi production registry yang dipakai, atau None jika memakai file model langsung"""
+    from model_registry import read_state, registry_exists
+
+    if model_path is not None or not registry_exists():
+        return None
+    return read_state()['production']
+
+
+def model_sha256(model_path=None, version=None):
+    """Hash file model yang dipakai job (None jika file tidak ada, misalnya hanya artifact)"""
+    from dataset_cache import file_sha256
+    from model_registry import version_dir
+
+    path = os.path.join(version_dir(version), 'model.pkl') if version else model_path or 'model.pkl'
+    return file_sha256(path) if os.path.exists(path) else None
+
+
+def _init_worker(engine, model_path, preprocessing_path, sparse, version=None):
+    if version is not None:
+        from model_registry import load_version
+        predictor = load_version(version, engine=engine, sparse=sparse)
+    else:
+        predictor = Predictor.load(engine, model_path=model_path or 'model.pkl',
+                                   preprocessing_path=preprocessing_path, sparse=sparse)
+    # Paralelisme sudah di level proses, hindari oversubscription thread
+    if hasattr(predictor.model, 'n_jobs'):
+        predictor.model.n_jobs = 1
+    _WORKER['predictor'] = predictor
+
+
+def score_shard(input_path, header_bytes, index, shard, work_dir):
+    """
+    Fungsi untuk membaca, meng-encode dan memprediksi satu shard
+
+    Returns:
+        result: dict berisi index shard, jumlah baris, durasi dan throughput
+    """
+    start = time.perf_counter()
+    predictor = _WORKER['predictor']
+    with open(input_path, 'rb') as f:
+        header = f.read(header_bytes)
+        f.seek(shard['start'])
+        data = f.read(shard['end'] - shard['start'])
+    chunk = pd.read_csv(io.BytesIO(header + data))
+
+    predictions, _ = predict_deduplicated(predictor.model, predictor.encode(chunk))
+    if 'Id' not in chunk.columns:
+        chunk['Id'] = range(shard['row_start'] + 1, shard['row_start'] + len(chunk) + 1)
+    chunk['PredictedSalePrice'] = predictions
+
+    # Tulis ke file sementara lalu rename agar shard setengah jadi tidak dianggap selesai
+    path = shard_path(work_dir, index)
+    chunk.to_csv(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+
+    seconds = time.perf_counter() - start
+    return {'shard': index, 'rows': len(chunk), 'seconds': seconds,
+            'rows_per_sec': len(chunk) / seconds if seconds > 0 else 0.0}
+
+
+def load_or_create_plan(input_path, work_dir, shard_rows, model_version=None, model_hash=None):
+    """Pakai plan yang ada jika input, ukuran shard, versi dan file model sama (resume), jika tidak buat baru"""
+    plan_path = os.path.join(work_dir, 'plan.json')
+    if os.path.exists(plan_path):
+        with open(plan_path) as f:
+            plan = json.load(f)
+        if (plan['input'] == input_fingerprint(input_path) and plan['shard_rows'] == shard_rows
+                and plan.get('model_version') == model_version
+                and plan.get('model_sha256') == model_hash):
+            return plan, True
+        shutil.rmtree(work_dir)
+
+    os.makedirs(work_dir, exist_ok=True)
+    plan = plan_shards(input_path, shard_rows)
+    plan['model_version'] = model_version
+    plan['model_sha256'] = model_hash
+    with open(plan_path, 'w') as f:
+        json.dump(plan, f, indent=2)
+    return plan, False
+
+
+def merge_shards(work_dir, n_shards, output_path):
+    """Gabungkan file shard sesuai urutan; header hanya diambil dari shard pertama"""
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as output:
+        for index in range(n_shards):
+            with open(shard_path(work_dir, index), 'rb') as f:
+                if index > 0:
+                    f.readline()
+                shutil.copyfileobj(f, output)
+    os.replace(tmp_path, output_path)
+
+
+def predict_sharded(input_path, output_path, n_workers=None, shard_rows=DEFAULT_SHARD_ROWS,
+                    engine=None, model_path=None, preprocessing_path=None, sparse=None,
+                    work_dir=None, keep_shards=False):
+    """
+    Fungsi untuk prediksi batch paralel dengan shard dan resume
+
+    Args:
+        input_path: path CSV input
+        output_path: path CSV output (urutan baris sama dengan input)
+        n_workers: jumlah worker proses (default: jumlah CPU)
+        shard_rows: jumlah baris per shard
+        engine: engine inferensi setiap worker ('mmap', 'flat' atau 'sklearn');
+            default 'sklearn' jika model_path/preprocessing_path diberikan,
+            selain itu 'mmap'
+        model_path: path model; default versi production registry jika
+            registry ada, selain itu model.pkl
+        preprocessing_path: path preprocessing info (default
+            preprocessing_info.pkl); tidak bisa dipakai dengan engine 'mmap'
+        work_dir: direktori shard (default: <output>.shards)
+        keep_shards: jangan hapus direktori shard setelah digabung
+
+    Yields:
+        result: dict per shard (shard, rows, seconds, rows_per_sec, skipped)
+
+    Raises:
+        ValueError: preprocessing_path diberikan untuk engine 'mmap'
+    """
+    custom_files = model_path is not None or preprocessing_path is not None
+    engine = engine or ('sklearn' if custom_files else 'mmap')
+    if engine == 'mmap' and preprocessing_path is not None:
+        raise ValueError("Engine 'mmap' memakai preprocessing yang tertanam di artifact; "
+                         "pakai --engine sklearn atau flat untuk --preprocessing")
+    preprocessing_path = preprocessing_path or 'preprocessing_info.pkl'
+    work_dir = work_dir or output_path + '.shards'
+    version = resolve_version(model_path)
+    plan, resumed = load_or_create_plan(input_path, work_dir, shard_rows, version,
+                                        model_sha256(model_path, version))
+    shards = plan['shards']
+
+    pending = []
+    for index, shard in enumerate(shards):
+        if resumed and os.path.exists(shard_path(work_dir, index)):
+            yield {'shard': index, 'rows': shard['rows'], 'skipped': True}
+        else:
+            pending.append(index)
+
+    if pending:
+        n_workers = min(n_workers or os.cpu_count() or 1, len(pending))
+        with ProcessPoolExecutor(
+            max_workers=n_workers, initializer=_init_worker,
+            initargs=(engine, model_path, preprocessing_path, sparse, version),
+        ) as executor:
+            futures = [
+                executor.submit(score_shard, input_path, plan['header_bytes'],
+                                index, shards[index], work_dir)
+                for index in pending
+            ]
+            for future in as_completed(futures):
+                yield {**future.result(), 'skipped': False}
+
+    merge_shards(work_dir, len(shards), output_path)
+    if not keep_shards:
+        shutil.rmtree(work_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prediksi batch paralel multi-proses")
+    parser.add_argument('input', help="Path CSV input")
+    parser.add_argument('output', help="Path CSV output")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Jumlah worker proses (default: jumlah CPU)")
+    parser.add_argument('--shard-rows', type=int, default=DEFAULT_SHARD_ROWS,
+                        help=f"Jumlah baris per shard (default: {DEFAULT_SHARD_ROWS})")
+    parser.add_argument('--engine', choices=['sklearn', 'flat', 'mmap'], default=None,
+                        help="Engine inferensi setiap worker (default: mmap, atau sklearn "
+                             "jika --model/--preprocessing diberikan)")
+    parser.add_argument('--model', default=None,
+                        help="Path model (default: versi production registry, atau model.pkl)")
+    parser.add_argument('--preprocessing', default=None,
+                        help="Path preprocessing info (default: preprocessing_info.pkl)")
+    parser.add_argument('--sparse', action='store_true', default=None,
+                        help="Encode shard sebagai matriks sparse CSR")
+    parser.add_argument('--work-dir', default=None,
+                        help="Direktori shard untuk resume (default: <output>.shards)")
+    parser.add_argument('--keep-shards', action='store_true',
+                        help="Simpan file shard setelah digabung")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    total_rows = 0
+    for result in predict_sharded(args.input, args.output, args.workers, args.shard_rows,
+                                  args.engine, args.model, args.preprocessing, args.sparse,
+                                  args.work_dir, args.keep_shards):
+        total_rows += result['rows']
+        if result['skipped']:
+            print(f"   Shard {result['shard']}: {result['rows']} baris (sudah selesai, dilewati)")
+        else:
+            print(f"   Shard {result['shard']}: {result['rows']} baris dalam "
+                  f"{result['seconds']:.2f} s ({result['rows_per_sec']:,.0f} baris/detik)")
+    elapsed = time.perf_counter() - start
+    print(f"Prediksi selesai untuk {total_rows} rumah dalam {elapsed:.1f} s "
+          f"({total_rows / elapsed:,.0f} baris/detik). Hasil disimpan di '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+#!/bin/sh
+# Jalankan JSON API di background dan Streamlit UI di foreground
+uvicorn api:app --host 0.0.0.0 --port "${API_PORT:-8000}" &
+exec streamlit run app.py --server.port=8501 --server.address=0.0.0.0
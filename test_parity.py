@@ -0,0 +1,84 @@
+"""
+Test paritas dua invariant yang dipakai semua jalur serving:
+    - FeatureEncoder menghasilkan matriks yang sama dengan preprocessing
+      awal berbasis pd.get_dummies
+    - FlatForest memprediksi sama dengan RandomForestRegressor.predict
+
+Jalankan dengan:
+    python -m pytest -q test_parity.py
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from feature_encoder import FeatureEncoder
+from forest_engine import FlatForest, check_parity
+from train_model import preprocess_data
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TOLERANCE = 1e-6
+
+
+def baseline_dummies(df, preprocessing_info):
+    """Preprocessing awal aplikasi: fillna per kolom lalu pd.get_dummies"""
+    X = df.drop(columns=['Id', 'SalePrice'], errors='ignore').copy()
+    for col in preprocessing_info['categorical_na_cols']:
+        if col in X.columns:
+            X[col] = X[col].fillna('None')
+    for col, median_val in preprocessing_info['numeric_medians'].items():
+        X[col] = X[col].fillna(median_val)
+    for col, mode_val in preprocessing_info['categorical_modes'].items():
+        X[col] = X[col].fillna(mode_val)
+    X = X[preprocessing_info['numeric_cols'] + preprocessing_info['categorical_cols']]
+    return pd.get_dummies(X, columns=preprocessing_info['categorical_cols'], drop_first=False)
+
+
+def baseline_encode(df, preprocessing_info):
+    """baseline_dummies yang di-align ke feature_columns (kolom hilang diisi 0)"""
+    return baseline_dummies(df, preprocessing_info).reindex(
+        columns=preprocessing_info['feature_columns'], fill_value=0)
+
+
+@pytest.fixture(scope='module')
+def train_slice():
+    return pd.read_csv(os.path.join(HERE, 'train.csv'), nrows=400)
+
+
+@pytest.fixture(scope='module')
+def test_slice():
+    return pd.read_csv(os.path.join(HERE, 'test.csv'), nrows=300)
+
+
+@pytest.fixture(scope='module')
+def fitted(train_slice):
+    X_encoded, y, preprocessing_info = preprocess_data(train_slice.copy())
+    model = RandomForestRegressor(n_estimators=5, max_depth=8, random_state=42)
+    model.fit(X_encoded, y)
+    return model, preprocessing_info
+
+
+def test_feature_columns_match_get_dummies(train_slice, fitted):
+    _, preprocessing_info = fitted
+    dummies = baseline_dummies(train_slice, preprocessing_info)
+    assert preprocessing_info['feature_columns'] == dummies.columns.tolist()
+
+
+@pytest.mark.parametrize('frame', ['train_slice', 'test_slice'])
+def test_encoder_matches_get_dummies(request, frame, fitted):
+    _, preprocessing_info = fitted
+    df = request.getfixturevalue(frame)
+    expected = baseline_encode(df, preprocessing_info).to_numpy(dtype=np.float64)
+    actual = np.asarray(FeatureEncoder(preprocessing_info).transform(df), dtype=np.float64)
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=TOLERANCE)
+
+
+def test_flat_forest_matches_sklearn(test_slice, fitted):
+    model, preprocessing_info = fitted
+    X = FeatureEncoder(preprocessing_info).transform(test_slice)
+    assert check_parity(model, FlatForest.from_sklearn(model), X) <= TOLERANCE
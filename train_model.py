@@ -3,17 +3,38 @@ Script untuk training model Random Forest Regressor untuk prediksi harga rumah
 dan menyimpan model serta preprocessor ke file.
 """
 
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
 import pandas as pd
 import numpy as np
-import pickle
 import joblib
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, KFold, ParameterGrid, ParameterSampler
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score
+from feature_encoder import FeatureEncoder
+from forest_engine import FlatForest, FLAT_FOREST_PATH, check_parity, variant_metadata
+from model_artifact import ARTIFACT_DIR, write_artifact
+from dataset_cache import load_encoded_dataset, load_raw_frame
 import warnings
 warnings.filterwarnings('ignore')
 
 
+# Kolom kategorikal yang nilai NA-nya berarti "tidak ada"
+CATEGORICAL_NA_COLS = ['PoolQC', 'MiscFeature', 'Alley', 'Fence', 'FireplaceQu', 
+                       'GarageType', 'GarageFinish', 'GarageQual', 'GarageCond',
+                       'BsmtQual', 'BsmtCond', 'BsmtExposure', 'BsmtFinType1', 'BsmtFinType2',
+                       'MasVnrType']
+
+# Naikkan setiap kali logika preprocess_data berubah (membatalkan dataset cache)
+PREPROCESSING_VERSION = 1
+
+
 def preprocess_data(df):
     """
     Fungsi untuk preprocessing data
@@ -30,10 +51,7 @@ def preprocess_data(df):
     y = df['SalePrice']
     
     # Kolom kategorikal yang nilai NA-nya berarti "tidak ada"
-    categorical_na_cols = ['PoolQC', 'MiscFeature', 'Alley', 'Fence', 'FireplaceQu', 
-                           'GarageType', 'GarageFinish', 'GarageQual', 'GarageCond',
-                           'BsmtQual', 'BsmtCond', 'BsmtExposure', 'BsmtFinType1', 'BsmtFinType2',
-                           'MasVnrType']
+    categorical_na_cols = list(CATEGORICAL_NA_COLS)
     
     # Imputasi 'None' untuk kolom kategorikal yang NA berarti tidak ada
     for col in categorical_na_cols:
@@ -49,25 +67,29 @@ def preprocess_data(df):
         numeric_cols.remove('Id')
         X = X.drop('Id', axis=1)
     
-    # Imputasi nilai Median untuk semua kolom numerik yang tersisa
+    # Median untuk kolom numerik dan mode untuk kolom kategorikal yang tersisa
+    # (selain yang sudah diisi 'None'), hanya untuk kolom yang punya nilai kosong
+    null_counts = X.isnull().sum()
     numeric_medians = {}
     for col in numeric_cols:
-        if X[col].isnull().sum() > 0:
-            median_value = X[col].median()
-            numeric_medians[col] = median_value
-            X[col] = X[col].fillna(median_value)
+        if null_counts[col] > 0:
+            numeric_medians[col] = X[col].median()
     
-    # Imputasi untuk kolom kategorikal yang tersisa (selain yang sudah diisi 'None')
     categorical_modes = {}
     for col in categorical_cols:
-        if X[col].isnull().sum() > 0:
-            # Isi dengan mode (nilai paling sering muncul)
-            mode_value = X[col].mode()[0] if len(X[col].mode()) > 0 else 'Unknown'
-            categorical_modes[col] = mode_value
-            X[col] = X[col].fillna(mode_value)
+        if null_counts[col] > 0:
+            # Mode (nilai paling sering muncul)
+            mode = X[col].mode()
+            categorical_modes[col] = mode[0] if len(mode) > 0 else 'Unknown'
     
-    # One-Hot Encoding untuk semua fitur kategorikal
-    X_encoded = pd.get_dummies(X, columns=categorical_cols, drop_first=False)
+    # Imputasi semua kolom sekaligus dalam satu fillna
+    X = X.fillna({**numeric_medians, **categorical_modes})
+    
+    # Daftar kolom hasil One-Hot Encoding (urutan sama dengan pd.get_dummies)
+    feature_columns = list(numeric_cols)
+    for col in categorical_cols:
+        levels = sorted(X[col].dropna().unique())
+        feature_columns.extend(f"{col}_{level}" for level in levels)
     
     # Simpan informasi preprocessing untuk digunakan saat prediksi
     preprocessing_info = {
@@ -76,28 +98,134 @@ def preprocess_data(df):
         'categorical_cols': categorical_cols,
         'numeric_medians': numeric_medians,
         'categorical_modes': categorical_modes,
-        'feature_columns': X_encoded.columns.tolist()
+        'feature_columns': feature_columns
     }
     
+    # One-Hot Encoding memakai encoder yang sama dengan aplikasi,
+    # sehingga matriks fitur training dan serving identik
+    encoder = FeatureEncoder(preprocessing_info)
+    X_encoded = encoder.to_frame(X)
+    
     return X_encoded, y, preprocessing_info
 
 
-def train_model():
+def output_paths(model_path='model.pkl'):
+    """
+    Path file turunan yang menyertai model_path
+
+    Model utama (model.pkl) memakai path serving di root. Model lain
+    mendapat file berawalan nama model (misalnya /tmp/x.pkl ->
+    /tmp/x_forest_flat.npz), sehingga training ke path lain tidak menimpa
+    forest, artifact dan profil yang sedang dilayani.
+    """
+    from drift_monitor import DRIFT_REFERENCE_PATH
+    from explain import IMPORTANCE_PATH
+
+    if os.path.abspath(model_path) == os.path.abspath('model.pkl'):
+        return {'preprocessing': 'preprocessing_info.pkl', 'flat': FLAT_FOREST_PATH,
+                'artifact': ARTIFACT_DIR, 'reference': DRIFT_REFERENCE_PATH,
+                'importance': IMPORTANCE_PATH}
+    stem = os.path.splitext(model_path)[0]
+    return {'preprocessing': f'{stem}_preprocessing_info.pkl', 'flat': f'{stem}_forest_flat.npz',
+            'artifact': f'{stem}_artifact', 'reference': f'{stem}_drift_reference.npz',
+            'importance': f'{stem}_feature_importance.csv'}
+
+
+def export_flat_forest(rf_model, preprocessing_info, model_path='model.pkl'):
+    """
+    Fungsi untuk mengekspor forest ke array datar dan mengecek paritasnya
+    terhadap model.predict pada test.csv
+
+    model_path adalah file model yang sudah disimpan; hash-nya dicatat di
+    metadata forest dan artifact agar engine 'flat'/'mmap' menolak hasil
+    ekspor dari model lain. Forest dan artifact ditulis ke output_paths(model_path).
+    """
+    paths = output_paths(model_path)
+    flat_forest = FlatForest.from_sklearn(rf_model)
+    flat_forest.metadata.update(variant_metadata(model_path, preprocessing_info['feature_columns']))
+    flat_forest.save(paths['flat'])
+    print(f"   {flat_forest.n_trees} pohon, {flat_forest.node_count} node disimpan sebagai '{paths['flat']}'")
+    X_parity = FeatureEncoder(preprocessing_info).transform(pd.read_csv('test.csv'))
+    parity_diff = check_parity(rf_model, flat_forest, X_parity)
+    print(f"   Paritas dengan model.predict pada test.csv: selisih maks {parity_diff:.3e}")
+    if parity_diff > 1e-6:
+        raise RuntimeError("Prediksi FlatForest tidak sama dengan model.predict")
+    artifact_bytes = write_artifact(flat_forest, preprocessing_info, paths['artifact'])
+    print(f"   Artifact memory-map ({artifact_bytes / 1e6:.1f} MB) disimpan di '{paths['artifact']}/'")
+    return flat_forest
+
+
+def register_trained_model(metrics, params, source, role='production', candidate_share=0.1,
+                           model_path='model.pkl', preprocessing_path='preprocessing_info.pkl'):
+    """
+    Fungsi untuk mendaftarkan file model hasil training ke registry
+
+    Registry adalah sumber model yang dilayani app, API dan job batch, jadi
+    setiap script yang menulis model (train_model.py, retrain.py,
+    train_out_of_core.py) mendaftarkan hasilnya di sini.
+
+    Args:
+        metrics: dict metrik evaluasi (rmse, r2)
+        params: parameter model yang dipakai
+        role: 'production', 'candidate' (menerima candidate_share traffic)
+            atau None untuk tidak mendaftarkan
+        model_path, preprocessing_path: file model yang didaftarkan (forest
+            datar dan profil drift diambil dari output_paths(model_path))
+    """
+    from model_registry import REGISTRY_DIR, VERSION_FILES, register_model
+
+    if role is None:
+        return None
+    params = {name: value for name, value in params.items()
+              if value is None or isinstance(value, (bool, int, float, str))}
+    files = {os.path.basename(path): path for path in VERSION_FILES}
+    paths = output_paths(model_path)
+    files.update({'model.pkl': model_path, 'preprocessing_info.pkl': preprocessing_path,
+                  'forest_flat.npz': paths['flat'], 'drift_reference.npz': paths['reference']})
+    version = register_model(metrics=metrics, params=params, files=files, role=role,
+                             candidate_share=candidate_share, source=source)
+    share = f" ({candidate_share:.0%} traffic)" if role == 'candidate' else ''
+    print(f"   Model didaftarkan di '{REGISTRY_DIR}/' sebagai {version}: {role}{share}")
+    return version
+
+
+def train_model(sparse=False, register='production', candidate_share=0.1):
     """
     Fungsi untuk training model dan menyimpan hasilnya
+
+    Args:
+        sparse: latih dengan matriks fitur scipy.sparse CSR (float32) alih-alih
+            DataFrame one-hot dense; model dan preprocessing info yang
+            dihasilkan tetap sama formatnya. Matriks ~4.5x lebih kecil,
+            tetapi fit scikit-learn ~5x lebih lambat (benchmark.py
+            --representations)
+        register: peran versi baru di registry model ('production',
+            'candidate' atau None untuk tidak mendaftarkan)
+        candidate_share: porsi traffic untuk versi candidate
     """
+    from drift_monitor import DRIFT_REFERENCE_PATH, save_reference
+    from explain import IMPORTANCE_PATH, save_global_importance
+    from inference import Predictor
+
     print("="*60)
     print("TRAINING MODEL PREDIKSI HARGA RUMAH")
     print("="*60)
     
-    # Memuat dataset
+    # Memuat dataset + preprocessing (dari dataset cache jika CSV tidak berubah)
     print("\n1. Memuat dataset...")
-    df = pd.read_csv('train.csv')
-    print(f"   Dataset dimuat: {df.shape[0]} baris, {df.shape[1]} kolom")
+    X_encoded, y, preprocessing_info, cache_hit = load_encoded_dataset('train.csv')
+    print(f"   Dataset dimuat: {X_encoded.shape[0]} baris "
+          f"({'dari cache' if cache_hit else 'cache dibangun'})")
     
     # Preprocessing
     print("\n2. Melakukan preprocessing data...")
-    X_encoded, y, preprocessing_info = preprocess_data(df)
+    feature_columns = preprocessing_info['feature_columns']
+    if sparse:
+        # Encode ulang frame mentah langsung ke CSR (imputasi sama dengan preprocess_data)
+        raw = load_raw_frame('train.csv').drop(columns=['Id', 'SalePrice'])
+        X_encoded = FeatureEncoder(preprocessing_info).transform(raw, sparse=True)
+        print(f"   Matriks sparse: {X_encoded.nnz} nilai bukan nol "
+              f"({X_encoded.nnz / np.prod(X_encoded.shape):.1%} terisi)")
     print(f"   Preprocessing selesai. Fitur setelah encoding: {X_encoded.shape[1]}")
     
     # Split data
@@ -136,23 +264,255 @@ def train_model():
     print("   Model disimpan sebagai 'model.pkl'")
     print("   Preprocessing info disimpan sebagai 'preprocessing_info.pkl'")
     
+    # Ekspor forest ke array datar untuk engine inferensi cepat
+    print("\n7. Mengekspor forest ke format array...")
+    flat_forest = export_flat_forest(rf_model, preprocessing_info)
+    
     # Feature Importance
     feature_importance = pd.DataFrame({
-        'Feature': X_encoded.columns,
+        'Feature': feature_columns,
         'Importance': rf_model.feature_importances_
     }).sort_values('Importance', ascending=False)
     
-    print("\n7. Top 10 Fitur Terpenting:")
+    print("\n8. Top 10 Fitur Terpenting:")
     print("   " + "-"*60)
     top_10 = feature_importance.head(10)
     for idx, row in top_10.iterrows():
         print(f"   {row['Feature']:40s} : {row['Importance']:.6f}")
     
+    # Importance global per kolom asli (kontribusi rata-rata + impurity)
+    print("\n9. Menyimpan feature importance global per kolom asli...")
+    if sparse:
+        X_encoded = load_encoded_dataset('train.csv')[0]
+    save_global_importance(Predictor(flat_forest, preprocessing_info), X_encoded, rf_model)
+    print(f"   Feature importance disimpan sebagai '{IMPORTANCE_PATH}'")
+    
+    # Profil distribusi input training untuk monitoring drift saat serving
+    print("\n10. Menyimpan profil referensi untuk monitoring drift...")
+    save_reference(load_raw_frame('train.csv').drop(columns=['Id', 'SalePrice']), preprocessing_info)
+    print(f"   Profil referensi disimpan sebagai '{DRIFT_REFERENCE_PATH}'")
+
+    if register:
+        print("\n11. Mendaftarkan model ke registry...")
+        register_trained_model({'rmse': float(rmse), 'r2': float(r2)}, rf_model.get_params(),
+                               'train_model.py', register, candidate_share)
+    
     print("\n" + "="*60)
     print("TRAINING SELESAI!")
     print("="*60)
 
 
+# Grid default untuk mode tuning
+DEFAULT_PARAM_GRID = {
+    'n_estimators': [100, 200],
+    'max_depth': [10, 15, None],
+    'max_features': [1.0, 'sqrt', 0.5],
+    'min_samples_leaf': [1, 2],
+}
+
+# Array bersama (memory-mapped) di setiap worker proses tuning
+_SHARED = {}
+
+
+def _init_tuning_worker(X_path, y_path):
+    """Buka matriks fitur hasil encoding sebagai memmap (tanpa pickle ke worker)"""
+    _SHARED['X'] = np.load(X_path, mmap_mode='r')
+    _SHARED['y'] = np.load(y_path, mmap_mode='r')
+
+
+def _fit_fold(config_id, params, fold, train_idx, valid_idx):
+    """Fit satu konfigurasi pada satu fold dan kembalikan skor validasinya"""
+    X, y = _SHARED['X'], _SHARED['y']
+    model = RandomForestRegressor(random_state=42, n_jobs=1, **params)
+    start = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_time = time.perf_counter() - start
+    y_pred = model.predict(X[valid_idx])
+    return {
+        'config_id': config_id,
+        'fold': fold,
+        'rmse': float(np.sqrt(mean_squared_error(y[valid_idx], y_pred))),
+        'r2': float(r2_score(y[valid_idx], y_pred)),
+        'fit_time': fit_time,
+    }
+
+
+def tune_model(param_grid=None, search='grid', n_iter=20, n_folds=5, n_workers=None,
+               time_budget=None, results_path='tuning_results.csv', register='production',
+               candidate_share=0.1):
+    """
+    Fungsi untuk mencari hyperparameter terbaik dengan k-fold cross-validation
+
+    Setiap pasangan (konfigurasi, fold) dijalankan di process pool. Matriks
+    fitur disimpan sekali ke file .npy dan dibuka worker sebagai memmap.
+
+    Args:
+        param_grid: dict parameter RandomForestRegressor -> list nilai
+        search: 'grid' (semua kombinasi) atau 'random' (n_iter sampel)
+        n_iter: jumlah konfigurasi untuk random search
+        n_folds: jumlah fold cross-validation
+        n_workers: jumlah worker proses (default: jumlah CPU)
+        time_budget: batas waktu dalam detik; fold baru tidak dijalankan
+            setelah batas terlewati
+        results_path: path CSV tabel hasil per konfigurasi
+        register: peran model terbaik di registry model (lihat train_model)
+        candidate_share: porsi traffic untuk versi candidate
+
+    Returns:
+        results: DataFrame hasil per konfigurasi, terurut dari RMSE terbaik
+    """
+    from drift_monitor import DRIFT_REFERENCE_PATH, save_reference
+    from explain import IMPORTANCE_PATH, save_global_importance
+    from inference import Predictor
+
+    print("="*60)
+    print("TUNING HYPERPARAMETER MODEL PREDIKSI HARGA RUMAH")
+    print("="*60)
+    start_time = time.perf_counter()
+    
+    print("\n1. Memuat dan memproses dataset...")
+    X_encoded, y, preprocessing_info, _ = load_encoded_dataset('train.csv')
+    print(f"   {X_encoded.shape[0]} baris, {X_encoded.shape[1]} fitur")
+    
+    param_grid = param_grid or DEFAULT_PARAM_GRID
+    if search == 'random':
+        configs = list(ParameterSampler(param_grid, n_iter=n_iter, random_state=42))
+    else:
+        configs = list(ParameterGrid(param_grid))
+    folds = list(KFold(n_splits=n_folds, shuffle=True, random_state=42).split(X_encoded))
+    print(f"\n2. {len(configs)} konfigurasi x {n_folds} fold ({search} search)")
+    
+    # Simpan matriks fitur (float32, sama seperti yang dipakai sklearn) untuk memmap
+    shared_dir = tempfile.mkdtemp(prefix='tuning_')
+    X_path = os.path.join(shared_dir, 'X.npy')
+    y_path = os.path.join(shared_dir, 'y.npy')
+    np.save(X_path, X_encoded.to_numpy(dtype=np.float32))
+    np.save(y_path, y.to_numpy(dtype=np.float64))
+    
+    tasks = [(config_id, params, fold, train_idx, valid_idx)
+             for config_id, params in enumerate(configs)
+             for fold, (train_idx, valid_idx) in enumerate(folds)]
+    n_workers = n_workers or os.cpu_count()
+    fold_results = []
+    skipped = 0
+    
+    print(f"\n3. Menjalankan cross-validation dengan {n_workers} worker...")
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_tuning_worker,
+                                 initargs=(X_path, y_path)) as executor:
+            pending = set()
+            task_iter = iter(tasks)
+            while True:
+                # Jaga jumlah task yang berjalan agar batas waktu bisa dihormati
+                while len(pending) < n_workers * 2:
+                    if time_budget is not None and time.perf_counter() - start_time > time_budget:
+                        break
+                    task = next(task_iter, None)
+                    if task is None:
+                        break
+                    pending.add(executor.submit(_fit_fold, *task))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    fold_results.append(result)
+                    print(f"   Konfigurasi {result['config_id']:3d} fold {result['fold']}: "
+                          f"RMSE {result['rmse']:.2f} ({result['fit_time']:.1f}s)")
+            skipped = sum(1 for _ in task_iter)
+    finally:
+        shutil.rmtree(shared_dir, ignore_errors=True)
+    
+    if skipped:
+        print(f"   ⚠️  Batas waktu tercapai, {skipped} fold tidak dijalankan")
+    if not fold_results:
+        raise RuntimeError("Tidak ada fold yang selesai dalam batas waktu")
+    
+    # Tabel hasil per konfigurasi
+    fold_df = pd.DataFrame(fold_results)
+    results = fold_df.groupby('config_id').agg(
+        mean_rmse=('rmse', 'mean'),
+        std_rmse=('rmse', 'std'),
+        mean_r2=('r2', 'mean'),
+        mean_fit_time=('fit_time', 'mean'),
+        folds_completed=('fold', 'count'),
+    ).reset_index()
+    results['params'] = results['config_id'].map(lambda i: json.dumps(configs[i]))
+    # Konfigurasi yang belum menyelesaikan semua fold tidak dipilih sebagai terbaik
+    results = results.sort_values(
+        ['folds_completed', 'mean_rmse'], ascending=[False, True]
+    ).reset_index(drop=True)
+    results.to_csv(results_path, index=False)
+    print(f"\n4. Tabel hasil disimpan sebagai '{results_path}'")
+    print(results[['config_id', 'mean_rmse', 'mean_r2', 'mean_fit_time', 'params']].head(5).to_string(index=False))
+    
+    # Fit ulang konfigurasi terbaik pada seluruh data
+    best_params = configs[int(results.loc[0, 'config_id'])]
+    print(f"\n5. Melatih model terbaik pada seluruh data: {best_params}")
+    rf_model = RandomForestRegressor(random_state=42, n_jobs=-1, **best_params)
+    rf_model.fit(X_encoded, y)
+    joblib.dump(rf_model, 'model.pkl')
+    joblib.dump(preprocessing_info, 'preprocessing_info.pkl')
+    print("   Model disimpan sebagai 'model.pkl'")
+    flat_forest = export_flat_forest(rf_model, preprocessing_info)
+    save_global_importance(Predictor(flat_forest, preprocessing_info), X_encoded, rf_model)
+    print(f"   Feature importance disimpan sebagai '{IMPORTANCE_PATH}'")
+    save_reference(load_raw_frame('train.csv').drop(columns=['Id', 'SalePrice']), preprocessing_info)
+    print(f"   Profil referensi drift disimpan sebagai '{DRIFT_REFERENCE_PATH}'")
+    # Metrik registry berasal dari cross-validation konfigurasi terbaik
+    register_trained_model({'rmse': float(results.loc[0, 'mean_rmse']),
+                            'r2': float(results.loc[0, 'mean_r2'])},
+                           best_params, 'train_model.py --tune', register, candidate_share)
+    
+    print("\n" + "="*60)
+    print(f"TUNING SELESAI dalam {time.perf_counter() - start_time:.1f} detik!")
+    print("="*60)
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Training model prediksi harga rumah")
+    parser.add_argument('--tune', action='store_true',
+                        help="Jalankan tuning hyperparameter dengan cross-validation")
+    parser.add_argument('--search', choices=['grid', 'random'], default='grid',
+                        help="Jenis pencarian parameter (default: grid)")
+    parser.add_argument('--param-grid', help="Path file JSON berisi grid parameter")
+    parser.add_argument('--n-iter', type=int, default=20,
+                        help="Jumlah konfigurasi untuk random search (default: 20)")
+    parser.add_argument('--folds', type=int, default=5, help="Jumlah fold (default: 5)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Jumlah worker proses (default: jumlah CPU)")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="Batas waktu tuning dalam detik")
+    parser.add_argument('--results', default='tuning_results.csv',
+                        help="Path CSV tabel hasil tuning")
+    parser.add_argument('--sparse', action='store_true',
+                        help="Latih dengan matriks fitur sparse CSR (hemat memori, fit ~5x lebih lambat)")
+    parser.add_argument('--compress', action='store_true',
+                        help="Buat juga varian model terkompresi untuk serving (compress_model.py)")
+    parser.add_argument('--register', choices=['production', 'candidate', 'none'],
+                        default='production',
+                        help="Peran model baru di registry model (default: production)")
+    parser.add_argument('--candidate-share', type=float, default=0.1,
+                        help="Porsi traffic untuk model candidate (default: 0.1)")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    train_model()
+    args = parse_args()
+    register = None if args.register == 'none' else args.register
+    if args.tune:
+        param_grid = None
+        if args.param_grid:
+            with open(args.param_grid) as f:
+                param_grid = json.load(f)
+        tune_model(param_grid=param_grid, search=args.search, n_iter=args.n_iter,
+                   n_folds=args.folds, n_workers=args.workers,
+                   time_budget=args.time_budget, results_path=args.results,
+                   register=register, candidate_share=args.candidate_share)
+    else:
+        train_model(sparse=args.sparse, register=register, candidate_share=args.candidate_share)
+    if args.compress:
+        from compress_model import compress_model
+        compress_model()
 
@@ -0,0 +1,346 @@
+"""
+Script untuk training out-of-core pada CSV yang lebih besar dari RAM.
+
+Alur:
+    1. Pass pertama membaca CSV per chunk: tipe kolom, jumlah nilai kosong,
+       sampel reservoir berukuran tetap per kolom numerik (median perkiraan,
+       eksak jika jumlah baris <= ukuran sampel) dan value counts kategori
+       yang dibatasi (vocabulary + mode).
+    2. Pass kedua meng-encode setiap chunk dengan FeatureEncoder dan
+       menuliskannya ke matriks float32 memory-mapped di disk.
+    3. Setiap pohon dilatih pada sampel bootstrap yang dibaca dari memmap
+       (baris unik + jumlah kemunculan sebagai sample_weight, seperti
+       bootstrap RandomForestRegressor), lalu semua pohon dirakit menjadi
+       satu RandomForestRegressor.
+
+Ukuran chunk dan ukuran sampel bootstrap per pohon diturunkan dari
+--memory-mb, sehingga memori puncak tidak bergantung pada jumlah baris.
+
+Contoh:
+    python train_out_of_core.py sales_history.csv --memory-mb 512
+"""
+
+import argparse
+import os
+import shutil
+import time
+from collections import Counter
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.tree import DecisionTreeRegressor
+
+from drift_monitor import N_BINS, DriftMonitor
+from feature_encoder import FeatureEncoder
+from retrain import mode_from_counts
+from train_model import (CATEGORICAL_NA_COLS, export_flat_forest, output_paths,
+                         register_trained_model)
+import warnings
+warnings.filterwarnings('ignore')
+
+
+DEFAULT_MEMORY_MB = 512
+DEFAULT_SAMPLE_SIZE = 100000
+MAX_CATEGORIES = 10000
+WORK_DIR = 'ooc_store'
+
+# Perkiraan byte per sel CSV mentah setelah dibaca pandas (objek string)
+RAW_BYTES_PER_CELL = 64
+
+
+class Reservoir:
+    """Sampel acak berukuran tetap dari aliran nilai (algoritma R, tervektorisasi)"""
+
+    def __init__(self, size, rng):
+        self.size = size
+        self.rng = rng
+        self.sample = np.empty(size, dtype=np.float64)
+        self.seen = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        fill = min(max(self.size - self.seen, 0), len(values))
+        self.sample[self.seen:self.seen + fill] = values[:fill]
+        rest = values[fill:]
+        if len(rest):
+            # Item ke-t (0-based) menggantikan posisi acak j < size dengan peluang size/(t+1)
+            positions = self.rng.integers(0, np.arange(self.seen + fill, self.seen + len(values)) + 1)
+            keep = positions < self.size
+            self.sample[positions[keep]] = rest[keep]
+        self.seen += len(values)
+
+    def median(self):
+        return np.median(self.sample[:min(self.seen, self.size)])
+
+    def quantiles(self, q):
+        return np.quantile(self.sample[:min(self.seen, self.size)], q)
+
+
+def bounded_update(counts, values, max_size=MAX_CATEGORIES):
+    """Tambah value counts; jika kategori terlalu banyak, hanya yang tersering dipertahankan"""
+    counts.update(values)
+    if len(counts) > 2 * max_size:
+        kept = counts.most_common(max_size)
+        counts.clear()
+        counts.update(dict(kept))
+
+
+def chunk_rows_for_budget(n_columns, memory_mb):
+    """Jumlah baris per chunk sehingga chunk mentah memakai sekitar 1/4 anggaran"""
+    return max(1000, int(memory_mb * 1e6 / 4 / (n_columns * RAW_BYTES_PER_CELL)))
+
+
+def scan_statistics(csv_path, chunk_rows, sample_size=DEFAULT_SAMPLE_SIZE, seed=42):
+    """
+    Fungsi untuk pass pertama: statistik imputasi dan vocabulary kategori
+
+    Returns:
+        preprocessing_info: dictionary dengan format sama seperti preprocess_data
+        n_rows: jumlah baris data
+        numeric_edges: batas desil per kolom numerik (untuk profil drift)
+    """
+    rng = np.random.default_rng(seed)
+    header = pd.read_csv(csv_path, nrows=0).columns.tolist()
+    na_cols = [col for col in CATEGORICAL_NA_COLS if col in header]
+    text_cols, nulls, reservoirs, counts = set(), Counter(), {}, {}
+    n_rows = 0
+
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+        n_rows += len(chunk)
+        X = chunk.drop(columns=['SalePrice', 'Id'], errors='ignore')
+        X = X.fillna({col: 'None' for col in na_cols})
+        nulls.update(X.isnull().sum().to_dict())
+        for col in X.columns:
+            series = X[col].dropna()
+            if col in text_cols or not (pd.api.types.is_numeric_dtype(X[col]) or series.empty):
+                if col not in text_cols:
+                    text_cols.add(col)
+                    # Kolom ternyata teks; nilai numerik dari chunk sebelumnya
+                    # tidak masuk vocabulary (di-encode sebagai kategori tak dikenal)
+                    counts[col] = Counter()
+                    reservoirs.pop(col, None)
+                bounded_update(counts[col], series.astype(str).tolist())
+            elif not series.empty:
+                reservoirs.setdefault(col, Reservoir(sample_size, rng)).update(series.to_numpy())
+
+    columns = [col for col in header if col not in ('SalePrice', 'Id')]
+    numeric_cols = [col for col in columns if col not in text_cols]
+    categorical_cols = [col for col in columns if col in text_cols]
+    numeric_medians = {col: reservoirs[col].median() for col in numeric_cols
+                       if nulls[col] > 0 and col in reservoirs}
+    categorical_modes = {}
+    for col in categorical_cols:
+        if nulls[col] > 0:
+            mode = mode_from_counts(counts[col])
+            categorical_modes[col] = mode if mode is not None else 'Unknown'
+
+    feature_columns = list(numeric_cols)
+    for col in categorical_cols:
+        levels = set(counts[col])
+        if col in categorical_modes:
+            levels.add(categorical_modes[col])
+        feature_columns.extend(f"{col}_{level}" for level in sorted(levels))
+
+    preprocessing_info = {
+        'categorical_na_cols': list(CATEGORICAL_NA_COLS),
+        'numeric_cols': numeric_cols,
+        'categorical_cols': categorical_cols,
+        'numeric_medians': numeric_medians,
+        'categorical_modes': categorical_modes,
+        'feature_columns': feature_columns,
+    }
+    quantiles = np.linspace(0, 1, N_BINS + 1)
+    numeric_edges = np.array([reservoirs[col].quantiles(quantiles) if col in reservoirs
+                              else np.zeros(N_BINS + 1) for col in numeric_cols])
+    return preprocessing_info, n_rows, numeric_edges.reshape(len(numeric_cols), N_BINS + 1)
+
+
+def encode_to_disk(csv_path, preprocessing_info, n_rows, chunk_rows, work_dir, observer=None):
+    """
+    Fungsi untuk pass kedua: encode per chunk ke memmap float32 di disk
+
+    observer (DriftMonitor) ikut menghitung profil referensi drift per chunk.
+
+    Returns:
+        X: memmap (n_rows, n_fitur) float32, y: memmap float64
+    """
+    encoder = FeatureEncoder(preprocessing_info)
+    X = np.lib.format.open_memmap(os.path.join(work_dir, 'X.npy'), mode='w+',
+                                  dtype=np.float32, shape=(n_rows, encoder.n_features))
+    y = np.lib.format.open_memmap(os.path.join(work_dir, 'y.npy'), mode='w+',
+                                  dtype=np.float64, shape=(n_rows,))
+    start = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+        end = start + len(chunk)
+        X[start:end] = encoder.transform(chunk, observer=observer)
+        y[start:end] = chunk['SalePrice'].to_numpy(dtype=np.float64)
+        start = end
+    X.flush()
+    y.flush()
+    return X, y
+
+
+def fit_tree_from_disk(X, y, rows, sample_rows, seed, tree_params):
+    """
+    Fungsi untuk melatih satu pohon dari sampel bootstrap di disk
+
+    Baris bootstrap diurutkan agar pembacaan memmap berurutan, dan baris
+    duplikat diganti sample_weight sehingga sama dengan bootstrap sklearn.
+    """
+    rng = np.random.default_rng(seed)
+    picked = rows[rng.integers(0, len(rows), sample_rows)]
+    unique_rows, weights = np.unique(picked, return_counts=True)
+    tree = DecisionTreeRegressor(random_state=seed, **tree_params)
+    tree.fit(X[unique_rows], y[unique_rows], sample_weight=weights.astype(np.float64))
+    return tree
+
+
+def assemble_forest(trees, feature_columns, n_estimators, tree_params, seed):
+    """Rakit pohon-pohon yang dilatih terpisah menjadi RandomForestRegressor"""
+    forest = RandomForestRegressor(n_estimators=n_estimators, random_state=seed, **tree_params)
+    forest.estimator_ = DecisionTreeRegressor(**tree_params)
+    forest.estimators_ = trees
+    forest.n_outputs_ = 1
+    forest.n_features_in_ = len(feature_columns)
+    forest.feature_names_in_ = np.array(feature_columns, dtype=object)
+    return forest
+
+
+def evaluate_from_disk(model, X, y, rows, block_rows):
+    """RMSE dan R² pada baris validasi, dibaca per blok dari memmap"""
+    predictions = np.concatenate([
+        model.predict(X[rows[start:start + block_rows]])
+        for start in range(0, len(rows), block_rows)
+    ])
+    actual = y[rows]
+    return float(np.sqrt(mean_squared_error(actual, predictions))), float(r2_score(actual, predictions))
+
+
+def train_out_of_core(csv_path='train.csv', memory_mb=DEFAULT_MEMORY_MB, n_estimators=100,
+                      max_depth=15, holdout=0.2, sample_size=DEFAULT_SAMPLE_SIZE, seed=42,
+                      work_dir=WORK_DIR, model_path='model.pkl',
+                      preprocessing_path=None, keep_work_dir=False,
+                      register='production', candidate_share=0.1):
+    """
+    Fungsi untuk training Random Forest secara out-of-core
+
+    Args:
+        csv_path: path CSV training (kolom SalePrice wajib)
+        memory_mb: anggaran memori (menentukan ukuran chunk dan sampel per pohon)
+        holdout: proporsi baris untuk validasi (tidak dipakai bootstrap)
+        sample_size: ukuran sampel reservoir untuk median setiap kolom numerik
+        model_path: path output model; preprocessing (default), forest datar,
+            artifact dan profil drift ditulis ke train_model.output_paths,
+            jadi model di luar model.pkl tidak menimpa file yang sedang dilayani
+        register: peran model baru di registry model ('production',
+            'candidate' atau None); tanpa registrasi model baru tidak
+            dilayani selama registry ada
+    """
+    paths = output_paths(model_path)
+    preprocessing_path = preprocessing_path or paths['preprocessing']
+    print("="*60)
+    print("TRAINING OUT-OF-CORE")
+    print("="*60)
+    header = pd.read_csv(csv_path, nrows=0).columns
+    chunk_rows = chunk_rows_for_budget(len(header), memory_mb)
+    os.makedirs(work_dir, exist_ok=True)
+
+    print(f"\n1. Pass 1: statistik dan vocabulary ({chunk_rows} baris per chunk)...")
+    start = time.perf_counter()
+    preprocessing_info, n_rows, numeric_edges = scan_statistics(csv_path, chunk_rows,
+                                                                sample_size, seed)
+    n_features = len(preprocessing_info['feature_columns'])
+    print(f"   {n_rows} baris, {n_features} fitur ({time.perf_counter() - start:.1f} s)")
+
+    print("\n2. Pass 2: encoding ke memmap di disk...")
+    start = time.perf_counter()
+    reference = DriftMonitor(preprocessing_info, numeric_edges)
+    X, y = encode_to_disk(csv_path, preprocessing_info, n_rows, chunk_rows, work_dir, reference)
+    print(f"   {X.nbytes / 1e6:.1f} MB ditulis ke '{work_dir}/' ({time.perf_counter() - start:.1f} s)")
+
+    # Pembagian train/validasi tanpa memuat data
+    rng = np.random.default_rng(seed)
+    is_valid = rng.random(n_rows) < holdout
+    train_rows = np.flatnonzero(~is_valid)
+    valid_rows = np.flatnonzero(is_valid)
+
+    # Separuh anggaran untuk sampel bootstrap satu pohon (float32 + index + bobot)
+    bytes_per_row = n_features * 4 + 24
+    sample_rows = min(len(train_rows), int(memory_mb * 1e6 / 2 / bytes_per_row))
+    print(f"\n3. Melatih {n_estimators} pohon (bootstrap {sample_rows} dari "
+          f"{len(train_rows)} baris per pohon)...")
+    tree_params = {'max_depth': max_depth}
+    start = time.perf_counter()
+    seeds = np.random.default_rng(seed).integers(0, 2**31 - 1, n_estimators)
+    trees = [fit_tree_from_disk(X, y, train_rows, sample_rows, int(tree_seed), tree_params)
+             for tree_seed in seeds]
+    model = assemble_forest(trees, preprocessing_info['feature_columns'],
+                            n_estimators, tree_params, seed)
+    print(f"   Training selesai ({time.perf_counter() - start:.1f} s)")
+
+    if len(valid_rows):
+        print("\n4. Mengevaluasi pada baris validasi...")
+        block_rows = max(1, int(memory_mb * 1e6 / 4 / bytes_per_row))
+        rmse, r2 = evaluate_from_disk(model, X, y, valid_rows, block_rows)
+        print(f"   - RMSE: {rmse:.2f}")
+        print(f"   - R² Score: {r2:.4f}")
+
+    print("\n5. Menyimpan model dan preprocessor...")
+    joblib.dump(model, model_path)
+    joblib.dump(preprocessing_info, preprocessing_path)
+    print(f"   Model disimpan sebagai '{model_path}'")
+    print(f"   Preprocessing info disimpan sebagai '{preprocessing_path}'")
+    export_flat_forest(model, preprocessing_info, model_path)
+    reference.save(paths['reference'])
+    print(f"   Profil referensi drift disimpan sebagai '{paths['reference']}'")
+    if register:
+        metrics = {'rmse': float(rmse), 'r2': float(r2)} if len(valid_rows) else {}
+        register_trained_model(metrics, {'n_estimators': n_estimators, 'max_depth': max_depth},
+                               'train_out_of_core.py', register, candidate_share,
+                               model_path, preprocessing_path)
+
+    del X, y
+    if not keep_work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print("\n" + "="*60)
+    print("TRAINING SELESAI!")
+    print("="*60)
+    return model, preprocessing_info
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Training out-of-core untuk CSV besar")
+    parser.add_argument('input', nargs='?', default='train.csv', help="Path CSV training")
+    parser.add_argument('--memory-mb', type=float, default=DEFAULT_MEMORY_MB,
+                        help=f"Anggaran memori dalam MB (default: {DEFAULT_MEMORY_MB})")
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--max-depth', type=int, default=15)
+    parser.add_argument('--holdout', type=float, default=0.2,
+                        help="Proporsi baris validasi (default: 0.2)")
+    parser.add_argument('--sample-size', type=int, default=DEFAULT_SAMPLE_SIZE,
+                        help="Ukuran sampel reservoir untuk median (default: 100000)")
+    parser.add_argument('--work-dir', default=WORK_DIR, help="Direktori memmap sementara")
+    parser.add_argument('--keep-work-dir', action='store_true')
+    parser.add_argument('--model', default='model.pkl', help="Path output model")
+    parser.add_argument('--preprocessing', default=None,
+                        help="Path output preprocessing info (default: preprocessing_info.pkl "
+                             "untuk model.pkl, selain itu <model>_preprocessing_info.pkl)")
+    parser.add_argument('--register', choices=['production', 'candidate', 'none'],
+                        default='production',
+                        help="Peran model baru di registry model (default: production)")
+    parser.add_argument('--candidate-share', type=float, default=0.1,
+                        help="Porsi traffic untuk model candidate (default: 0.1)")
+    args = parser.parse_args()
+    train_out_of_core(args.input, args.memory_mb, args.n_estimators, args.max_depth,
+                      args.holdout, args.sample_size, work_dir=args.work_dir,
+                      model_path=args.model, preprocessing_path=args.preprocessing,
+                      keep_work_dir=args.keep_work_dir,
+                      register=None if args.register == 'none' else args.register,
+                      candidate_share=args.candidate_share)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Analisis what-if: sensitivitas harga terhadap satu atau dua kolom.
+
+Untuk satu rumah dasar, semua variasi kolom yang dipilih dibangun sebagai
+satu matriks fitur lalu diprediksi dalam satu pass forest (gaya partial
+dependence untuk satu rumah, beserta interval antar pohon). Rumah dasar
+hanya di-encode sekali. Setiap variasi adalah salinan baris fitur
+tersebut dengan kolom numerik atau blok one-hot yang diganti, sehingga
+kurva 100 titik hampir sama murahnya dengan satu prediksi.
+
+Grid numerik mencakup rentang data training (dari profil referensi drift)
+ditambah nilai rumah dasar. Grid kategorikal berisi semua level yang
+dikenal model. Untuk dua kolom, kolom kedua yang numerik dibatasi
+PAIR_POINTS nilai agar kurva per nilai tetap terbaca.
+
+Contoh:
+    python what_if.py test.csv --row 0 --features OverallQual
+    python what_if.py test.csv --row 0 --features GrLivArea Neighborhood --points 40
+"""
+
+import argparse
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from forest_engine import INTERVAL_COVERAGE
+from metrics import stage
+
+
+GRID_POINTS = 100
+PAIR_POINTS = 6
+
+
+def feature_grid(predictor, feature, base_value=None, n_points=GRID_POINTS):
+    """
+    Fungsi untuk membuat nilai-nilai variasi satu kolom
+
+    Args:
+        predictor: Predictor yang dipakai
+        feature: nama kolom asli (numerik atau kategorikal)
+        base_value: nilai kolom pada rumah dasar (selalu ikut di grid numerik)
+        n_points: jumlah titik untuk kolom numerik
+
+    Returns:
+        values: list nilai (level kategori, atau float terurut untuk numerik)
+    """
+    encoder = predictor.encoder
+    if feature in encoder.category_maps:
+        return list(encoder.category_maps[feature][0])
+    if feature not in encoder.numeric_cols:
+        raise ValueError(f"Kolom tidak dikenal model: {feature}")
+
+    reference = predictor.drift_reference
+    j = encoder.numeric_cols.index(feature)
+    if reference is not None:
+        lower, upper = reference.numeric_edges[j, 0], reference.numeric_edges[j, -1]
+    else:
+        # Tanpa profil training: variasi +-50% di sekitar nilai dasar
+        center = float(base_value) if base_value is not None else float(encoder.numeric_fill[j])
+        lower, upper = 0.5 * center, 1.5 * center
+    values = np.linspace(lower, upper, n_points)
+    bounds = [lower, upper] + ([base_value] if base_value is not None else [])
+    # Kolom bernilai bulat (tahun, kualitas, jumlah ruangan) memakai nilai bulat
+    if all(float(value).is_integer() for value in bounds):
+        values = np.round(values)
+    if base_value is not None:
+        values = np.append(values, float(base_value))
+    return [float(value) for value in np.unique(values)]
+
+
+def sensitivity_grid(predictor, record, features, n_points=GRID_POINTS, coverage=INTERVAL_COVERAGE):
+    """
+    Fungsi untuk memprediksi semua variasi kolom dari satu rumah dasar
+
+    Args:
+        predictor: Predictor yang dipakai
+        record: dictionary input rumah dasar (kolom boleh tidak lengkap)
+        features: satu atau dua nama kolom yang divariasikan
+        n_points: jumlah titik untuk kolom numerik pertama
+
+    Returns:
+        grid: DataFrame berisi kolom `features`, prediction, std, lower,
+            upper dan is_base (True untuk nilai rumah dasar; jika nilai itu
+            tidak ada di grid, rumah dasar ditambahkan sebagai baris terakhir)
+    """
+    features = [features] if isinstance(features, str) else list(features)
+    if not 1 <= len(features) <= 2 or len(set(features)) != len(features):
+        raise ValueError("Pilih satu atau dua kolom yang berbeda")
+    encoder = predictor.encoder
+    imputed = dict(zip(encoder.numeric_cols + encoder.categorical_cols,
+                       encoder.impute_record(record)))
+
+    grids = []
+    for position, feature in enumerate(features):
+        points = n_points if position == 0 else min(n_points, PAIR_POINTS)
+        grids.append(feature_grid(predictor, feature, imputed[feature], points))
+
+    # Rumah dasar di-encode sekali (tidak dicatat ulang di monitor drift)
+    base = predictor.encode(record, observe=False)
+    if hasattr(base, 'toarray'):
+        base = base.toarray()
+    combinations = list(itertools.product(*grids))
+    base_values = tuple(imputed[feature] for feature in features)
+    n_variations = len(combinations)
+    X = np.repeat(np.asarray(base, dtype=np.float64), n_variations, axis=0)
+    if base_values not in combinations:
+        # Nilai dasar di luar grid (kategori yang tidak dikenal model):
+        # baris fitur rumah dasar ikut diprediksi apa adanya
+        combinations.append(base_values)
+        X = np.vstack([X, base])
+    rows = np.arange(n_variations)
+    for position, feature in enumerate(features):
+        values = [combination[position] for combination in combinations[:n_variations]]
+        if feature in encoder.category_maps:
+            levels, indices = encoder.category_maps[feature]
+            X[np.ix_(rows, indices)] = 0.0
+            X[rows, indices[levels.get_indexer(values)]] = 1.0
+        else:
+            X[rows, encoder.numeric_index[encoder.numeric_cols.index(feature)]] = values
+
+    with stage('what_if', rows=len(X)):
+        result = predictor.tree_engine.predict_interval(X, coverage)
+    grid = pd.DataFrame(combinations, columns=features)
+    for name, values in result.items():
+        grid[name] = values
+    grid['is_base'] = [combination == base_values for combination in combinations]
+    return grid
+
+
+def main():
+    from inference import Predictor
+
+    parser = argparse.ArgumentParser(description="Sensitivitas harga terhadap kolom input")
+    parser.add_argument('input', help="Path CSV berisi rumah dasar")
+    parser.add_argument('--row', type=int, default=0, help="Nomor baris rumah dasar (default: 0)")
+    parser.add_argument('--features', nargs='+', required=True, help="Satu atau dua kolom")
+    parser.add_argument('--points', type=int, default=GRID_POINTS,
+                        help=f"Jumlah titik kolom numerik (default: {GRID_POINTS})")
+    parser.add_argument('--output', default=None, help="Simpan grid ke CSV ini")
+    args = parser.parse_args()
+
+    predictor = Predictor.load()
+    record = pd.read_csv(args.input).drop(columns=['Id'], errors='ignore').iloc[args.row]
+    grid = sensitivity_grid(predictor, record.to_dict(), args.features, args.points)
+    print(grid.to_string(index=False, float_format=lambda v: f'{v:,.2f}'))
+    if args.output:
+        grid.to_csv(args.output, index=False)
+        print(f"Grid disimpan di '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()